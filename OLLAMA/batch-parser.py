@@ -5,22 +5,28 @@ import os
 import sys
 import json
 import re
-import time
 from pathlib import Path
 from typing import Any, List, Dict, Set
 
 import pandas as pd
 from pydantic import ValidationError
 from dotenv import load_dotenv
-from google import genai
 from google.api_core import exceptions as google_exceptions
 
 load_dotenv()
 
 # --- Configuration ---
 MAX_ATTEMPTS_PER_COURSE = 2
+# Free-tier ceiling for the preview model; core.rate_limit paces calls to it
+# (override with LLM_RPM_GEMINI_FLASH_LITE)
 API_CALLS_PER_MINUTE = 12
-RETRY_BASE_DELAY_SECONDS = 10  # Initial delay for exponential backoff
+# Requisite strings packed into one request; the ~75 KB prompt is sent once per batch
+BATCH_SIZE = 20
+# Batches per checkpoint (results and the processed log are written after each);
+# about a minute's work, leaving half the call budget for single-string retries
+BATCHES_PER_MINUTE = max(1, API_CALLS_PER_MINUTE // 2)
+# The template's single-input tail starts here; batched prompts replace it
+FINAL_INSTRUCTION_MARKER = "**VII. Final Instruction**"
 
 # --- Path Setup ---
 try:
@@ -44,6 +50,10 @@ FAILED_LOG_PATH = SCRIPT_DIR / "failed_courses.log"
 # --- Import Pydantic Models ---
 try:
     from core.models.course import RequisiteExpression
+    from core.artifacts import read_json, write_json
+    from core.llm_batch import BatchParser
+    from core.llm_backend import GenAIBackend
+    from core.rate_limit import get_limiter
 except ImportError as e:
     print(f"❌ Error: Could not import Pydantic models from '{ETL_DIR}'.")
     print("   Please ensure the directory structure is 'etl/core/models/course.py'.")
@@ -51,20 +61,14 @@ except ImportError as e:
     sys.exit(1)
 
 
+LIMITER = get_limiter("gemini-flash-lite", rpm=API_CALLS_PER_MINUTE)
+BACKEND = GenAIBackend("gemini-2.5-flash-lite-preview-06-17", limiter=LIMITER, json_mode=True)
+
+
 def call_gemini_flash(prompt: str) -> dict:
-    """Sends the full prompt to the Google Gemini model."""
+    """Sends the full prompt to the Google Gemini model, paced and retried by LIMITER."""
     try:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is not set.")
-
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-lite-preview-06-17", 
-            contents=prompt,
-            config={"response_mime_type": "application/json"}
-        )
-        return {"message": {"content": response.text}}
+        return {"message": {"content": BACKEND.complete(prompt).text}}
     except ValueError as ve:
         print(f"Configuration Error: {ve}")
         return {"message": {"content": ""}, "error": str(ve)}
@@ -138,21 +142,46 @@ def parse_prerequisite(prereq_string: str, prompt_template: str) -> RequisiteExp
             print("      ✅ Validation Successful!")
             return RequisiteExpression.model_validate(final_result)
 
-        except google_exceptions.ResourceExhausted as e:
-            backoff_time = RETRY_BASE_DELAY_SECONDS * (2 ** (attempt - 1))
-            print(f"      RATE LIMIT HIT on attempt {attempt}. Waiting {backoff_time}s.")
-            time.sleep(backoff_time)
-
         except (ValidationError, json.JSONDecodeError, Exception) as e:
+            # Rate limits were already waited out by LIMITER; this is a bad or failed answer
             err_msg = get_concise_error_message(e)
             print(f"      ❌ Attempt {attempt} failed. Error: {err_msg}")
-            if attempt < MAX_ATTEMPTS_PER_COURSE:
-                time.sleep(1)
             continue
 
     return None
 
 
+def call_gemini_for_batch(prompt: str) -> tuple:
+    """BatchParser transport: one Gemini call (LIMITER waits out rate limits)."""
+    response = call_gemini_flash(prompt)
+    if response.get("error"):
+        raise Exception(response["error"])
+    return response["message"]["content"], None
+
+
+def validate_batch_entry(entry: Any) -> dict:
+    """Validates and simplifies one entry of a batched response (raises ValidationError)."""
+    validated = RequisiteExpression.model_validate(entry)
+    result = _simplify_logical_container(validated.model_dump(mode="json", exclude_none=True))
+    return RequisiteExpression.model_validate(result).model_dump(mode="json", exclude_none=True)
+
+
+def make_batch_parser(prompt_template: str) -> BatchParser:
+    """Batched parsing with the shared instructions; bad entries fall back to `parse_prerequisite`."""
+    def parse_single(prereq_string: str) -> dict | None:
+        parsed = parse_prerequisite(prereq_string, prompt_template)
+        return parsed.model_dump(mode="json", exclude_none=True) if parsed else None
+
+    return BatchParser(
+        instructions=prompt_template.split(FINAL_INSTRUCTION_MARKER)[0],
+        call=call_gemini_for_batch,
+        validate=validate_batch_entry,
+        single=parse_single,
+        batch_size=BATCH_SIZE,
+        label="Prerequisite batches"
+    )
+
+
 def load_processed_courses(path: Path) -> Set[str]:
     """Loads already processed course codes from the log file into a set."""
     if not path.exists():
@@ -176,16 +205,14 @@ def append_results_to_json(new_results: List[Dict], path: Path):
     existing_results = []
     if path.exists() and path.stat().st_size > 0:
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                existing_results = json.load(f)
-        except json.JSONDecodeError:
+            existing_results = read_json(path)
+        except ValueError:
             print(f"⚠️ Warning: Output file '{path}' is corrupted. Starting fresh.")
             existing_results = []
 
     existing_results.extend(new_results)
 
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(existing_results, f, indent=2, sort_keys=True)
+    write_json(path, existing_results, sort_keys=True)
 
 
 def main():
@@ -193,6 +220,7 @@ def main():
     print("--- Starting Prerequisite Parsing Pipeline ---")
 
     prompt_template = load_prompt_template()
+    batch_parser = make_batch_parser(prompt_template)
     processed_courses = load_processed_courses(PROCESSED_LOG_PATH)
     print(f"✅ Loaded {len(processed_courses)} previously processed courses from log.")
 
@@ -218,8 +246,7 @@ def main():
     cleanup_pattern = re.compile(r'\s*-\s*Must be (?:completed|taken either) prior to.*$', re.IGNORECASE)
 
     while processed_count < total_to_process:
-        batch_start_time = time.monotonic()
-        batch_slice = to_do_list[processed_count: processed_count + API_CALLS_PER_MINUTE]
+        batch_slice = to_do_list[processed_count: processed_count + BATCH_SIZE * BATCHES_PER_MINUTE]
 
         print("-" * 70)
         print(f"Processing Batch: Courses {processed_count + 1} to {processed_count + len(batch_slice)} of {total_to_process}")
@@ -228,20 +255,23 @@ def main():
         batch_results = []
         failed_courses_in_batch = []
 
+        clean_reqs = {row['course_code']: cleanup_pattern.sub('', row["requisites"]).strip() for row in batch_slice}
+        parsed_by_string = batch_parser.parse_all(req for req in clean_reqs.values() if req)
+
         for row in batch_slice:
             course_code = row['course_code']
             print(f"  > Processing Course: {course_code}")
-            clean_req = cleanup_pattern.sub('', row["requisites"]).strip()
+            clean_req = clean_reqs[course_code]
 
             if not clean_req:
                 print("      - Skipping (empty requisite after cleanup).")
                 continue
 
-            if parsed := parse_prerequisite(clean_req, prompt_template):
+            if parsed := parsed_by_string.get(clean_req):
                 batch_results.append({
                     "course_code": course_code,
                     "raw_requisite": row["requisites"],
-                    "prerequisites": parsed.model_dump(mode="json", exclude_none=True)
+                    "prerequisites": parsed
                 })
             else:
                 print(f"      ⚠️  Could not generate a valid structure for {course_code}. Logging as failed.")
@@ -259,12 +289,12 @@ def main():
 
         processed_count += len(batch_slice)
 
-        if processed_count < total_to_process:
-            elapsed_time = time.monotonic() - batch_start_time
-            pause_duration = max(0, 60.0 - elapsed_time)
-            print(f"\n  Batch took {elapsed_time:.2f}s. Pausing for {pause_duration:.2f}s to respect rate limit...")
-            time.sleep(pause_duration)
-
+    stats = batch_parser.stats()
+    print(f"  {stats['strings']} requisite strings in {stats['calls']} API calls "
+          f"({stats['batch_calls']} batched, {stats['retries']} single retries).")
+    limits = LIMITER.stats()
+    print(f"  Rate limiter: {limits['retries']} retries, {limits['throttled']} throttled, "
+          f"{limits['waited_seconds']}s spent waiting for the {API_CALLS_PER_MINUTE}/min budget.")
     print("\n--- Pipeline Complete ---")
     print("✅ All courses have been processed.")
 
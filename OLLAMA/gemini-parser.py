@@ -10,16 +10,16 @@ from pathlib import Path
 import pandas as pd
 from typing import Any
 from pydantic import ValidationError
-import requests # This import is no longer strictly needed if OpenRouter is removed, but kept for potential future use or if other parts of your project use it.
 from dotenv import load_dotenv
 load_dotenv() 
-import time
-from google import genai
 
 # --- Configuration ---
 MAX_ATTEMPTS = 3
+# Free-tier ceiling for the preview model; core.rate_limit paces calls to it
+# (override with LLM_RPM_GEMINI_FLASH_LITE)
+API_CALLS_PER_MINUTE = 12
 
-# IMPORTANT: genai.configure is removed as per user request to use genai.Client directly in the function.
+# core.llm_backend.GenAIBackend builds one genai.Client for the run.
 # Ensure your GEMINI_API_KEY environment variable is set.
 # Example: export GEMINI_API_KEY="YOUR_ACTUAL_API_KEY"
 
@@ -41,6 +41,9 @@ CSV_PATH = SCRIPT_DIR / "Course_Codes_and_Requisites.csv"
 # --- Import Pydantic Models ---
 try:
     from core.models.course import RequisiteExpression
+    from core.artifacts import write_json
+    from core.llm_backend import GenAIBackend
+    from core.rate_limit import get_limiter
 except ImportError as e:
     print(f"❌ Error: Could not import Pydantic models from '{ETL_DIR}'.")
     print(f"   Please ensure the directory structure is 'etl/core/models/course.py'.")
@@ -48,9 +51,14 @@ except ImportError as e:
     sys.exit(1)
 
 
+LIMITER = get_limiter("gemini-flash-lite", rpm=API_CALLS_PER_MINUTE)
+# model="gemini-2.0-flash"
+BACKEND = GenAIBackend("gemini-2.5-flash-lite-preview-06-17", limiter=LIMITER, json_mode=False)
+
+
 def call_gemini_flash(prompt: str) -> dict:
     """
-    Sends the full prompt to Google Gemini 2.0 Flash model using the genai.Client format.
+    Sends the full prompt to Google Gemini through the shared GenAIBackend.
 
     Args:
         prompt: The input text prompt for the model.
@@ -61,20 +69,8 @@ def call_gemini_flash(prompt: str) -> dict:
         Example: {"message": {"content": "Generated text goes here."}}
     """
     try:
-        # Get the API key from environment variables
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is not set.")
-
-        # Initialize the client using genai.Client as requested
-        client = genai.Client(api_key=api_key)
-
-        # Generate content using client.models.generate_content as requested
-        response = client.models.generate_content(
-            # model="gemini-2.0-flash", 
-            model="gemini-2.5-flash-lite-preview-06-17", 
-            contents=prompt
-        )
+        # One genai.Client for the run, paced and retried (429s, 5xx) by the shared limiter
+        response = BACKEND.complete(prompt)
 
         # Return the generated text in the expected dictionary format
         return {"message": {"content": response.text}}
@@ -245,7 +241,6 @@ def parse_prerequisite(prereq_string: str, prompt_template: str) -> RequisiteExp
                 f"Please re-parse *exactly*: \"{final_string_for_llm}\""
             )
             messages_history.append({"role": "user", "content": feedback})
-        time.sleep(1.0)    # pause 1 second between courses
     return None
     
 
@@ -310,7 +305,7 @@ def main():
         out_path = SCRIPT_DIR / args.output
         print("-" * 60)
         print(f"Writing {len(final_results)} parsed prerequisites to '{out_path}'...")
-        out_path.write_text(json.dumps(final_results, indent=2), encoding="utf-8")
+        write_json(out_path, final_results)
         print("✅ Done.")
     else:
         print("No prerequisites parsed; nothing written.")
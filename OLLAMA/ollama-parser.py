@@ -10,17 +10,16 @@ from pathlib import Path
 import pandas as pd
 from typing import Any
 from pydantic import ValidationError
-import requests
 from dotenv import load_dotenv
 load_dotenv() 
-import time
-from google import genai
 # --- Configuration ---
 # MODEL_NAME = 'llama3:8b-instruct-q8_0'
 # MODEL_NAME = 'gemma3:12b'
 MAX_ATTEMPTS = 3
+# OpenRouter's free-model ceiling; core.rate_limit paces calls to it
+# (override with LLM_RPM_OPENROUTER)
+OPENROUTER_CALLS_PER_MINUTE = 20
 
-from google import genai
 
 
 
@@ -40,6 +39,9 @@ CSV_PATH = SCRIPT_DIR / "Course_Codes_and_Requisites.csv"
 # --- Import Pydantic Models ---
 try:
     from core.models.course import RequisiteExpression
+    from core.artifacts import write_json
+    from core.llm_backend import OPENROUTER_BASE_URL, OpenAIChatBackend
+    from core.rate_limit import get_limiter
 except ImportError as e:
     print(f"❌ Error: Could not import Pydantic models from '{ETL_DIR}'.")
     print(f"   Please ensure the directory structure is 'etl/core/models/course.py'.")
@@ -47,37 +49,29 @@ except ImportError as e:
     sys.exit(1)
 
 
+LIMITER = get_limiter("openrouter", rpm=OPENROUTER_CALLS_PER_MINUTE)
+# "deepseek/deepseek-chat-v3-0324:free"
+OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemma-3-27b-it:free")
+BACKEND = OpenAIChatBackend(OPENROUTER_MODEL, limiter=LIMITER, base_url=OPENROUTER_BASE_URL,
+                            api_key=os.getenv("OPENROUTER_API_KEY"), json_mode=False, max_tokens=8192)
+
+
 def call_gemma3_27b(prompt: str) -> dict:
     """
     Sends the full prompt to Google Gemma 3 27B (free) on OpenRouter
     and returns a dict with the same shape as ollama.chat response.
     """
-    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
+    if not BACKEND.api_key:
         raise RuntimeError("OPENROUTER_API_KEY not set")
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
-    payload = {
-        # "model": "google/gemma-3-27b-it:free",
-        # "model": "deepseek/deepseek-chat-v3-0324:free",
-        "messages": [{"role": "system", "content": prompt}],
-        "temperature": 0.0,
-         "max_tokens": 8192,
-    }
-    r = requests.post(url, headers=headers, json=payload)
-    r.raise_for_status()
-    data = r.json()
+    # Paced and retried (429s, 5xx, connection errors) by the shared limiter
+    response = BACKEND.complete(prompt, role="system")
 
     # ─── DEBUG DUMP ───────────────────────────────────────────────
-    print("🛠️  [DEBUG] Raw OpenRouter JSON response:")
-    print(json.dumps(data, indent=2))
+    print(f"🛠️  [DEBUG] Raw OpenRouter response ({response.total_tokens} tokens):")
+    print(response.text)
     # match ollama.chat’s return shape
-    return {"message": {"content": data["choices"][0]["message"]["content"]}}
+    return {"message": {"content": response.text}}
 # In ollama_parser.py, locate the _simplify_logical_container function
 
 def _simplify_logical_container(node: dict) -> dict:
@@ -254,7 +248,6 @@ def parse_prerequisite(prereq_string: str, prompt_template: str) -> RequisiteExp
                 f"Please re-parse *exactly*: \"{final_string_for_llm}\""
             )
             messages_history.append({"role": "user", "content": feedback})
-        time.sleep(1.0)   # pause 1 second between courses
     return None
     
 
@@ -320,7 +313,7 @@ def main():
         out_path = SCRIPT_DIR / args.output
         print("-" * 60)
         print(f"Writing {len(final_results)} parsed prerequisites to '{out_path}'...")
-        out_path.write_text(json.dumps(final_results, indent=2), encoding="utf-8")
+        write_json(out_path, final_results)
         print("✅ Done.")
     else:
         print("No prerequisites parsed; nothing written.")
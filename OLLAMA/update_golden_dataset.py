@@ -3,7 +3,6 @@
 #              with options to force-update, add a specific course, remove entries,
 #              or exclude courses from merging.
 
-import json
 import argparse
 import sys
 from pathlib import Path
@@ -15,6 +14,10 @@ try:
 except NameError:
     # Fallback for interactive environments
     SCRIPT_DIR = Path.cwd()
+if str(SCRIPT_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from core.artifacts import read_json, write_json
 
 # Define the paths for the input (newly parsed) and the golden dataset files
 NEW_DATA_PATH = SCRIPT_DIR / "parsed_requisites.json"
@@ -30,9 +33,8 @@ def load_json_file(file_path: Path) -> list:
         print(f"ℹ️  Info: '{file_path.name}' exists but is empty. Starting with an empty dataset.")
         return []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        return read_json(file_path)
+    except (ValueError, IOError) as e:
         print(f"❌ Error: Could not read or parse '{file_path.name}'. Aborting.")
         print(f"   Error details: {e}")
         sys.exit(1)
@@ -41,8 +43,7 @@ def load_json_file(file_path: Path) -> list:
 def save_json_file(file_path: Path, data: list):
     """Safely saves a list of objects to a JSON file."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        write_json(file_path, data)
     except IOError as e:
         print(f"❌ Error: Could not write to '{file_path.name}'.")
         print(f"   Error details: {e}")
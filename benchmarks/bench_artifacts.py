@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# bench_artifacts.py
+
+"""
+Read/write time and on-disk size of the current UoG artifacts, for the stdlib
+json baseline and each core.artifacts format (plain, gzip, zstd if installed;
+single document and NDJSON).
+
+    python -m benchmarks.bench_artifacts [--repeat 3]
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+from core import artifacts
+
+UOG_DIR = Path(__file__).resolve().parent.parent / 'connectors' / 'uog'
+ARTIFACTS = [
+    UOG_DIR / 'extract' / 'data' / 'course_catalog' / 'subjects_with_courses_raw.json',
+    UOG_DIR / 'extract' / 'data' / 'programs' / 'programs_with_sections_raw.json',
+    UOG_DIR / 'raw' / 'programs_with_sections.json',
+    UOG_DIR / 'transformers' / 'test_output_universal_courses.json',
+]
+
+
+def as_records(obj: Any) -> List[Any]:
+    """NDJSON needs a sequence of records; subject -> courses maps become one record per subject."""
+    if isinstance(obj, dict):
+        return [{'key': k, 'value': v} for k, v in obj.items()]
+    return obj
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def formats(tmp: Path, name: str) -> List[Tuple[str, Path, Callable, Callable]]:
+    def stdlib_write(path, obj):
+        path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    def stdlib_read(path):
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    rows = [('stdlib json', tmp / f'{name}.json', stdlib_write, stdlib_read),
+            ('artifacts json', tmp / f'{name}.json', artifacts.write_json, artifacts.read_json),
+            ('artifacts json.gz', tmp / f'{name}.json.gz', artifacts.write_json, artifacts.read_json)]
+    if artifacts.zstandard is not None:
+        rows.append(('artifacts json.zst', tmp / f'{name}.json.zst', artifacts.write_json, artifacts.read_json))
+    ndjson_read = lambda path: list(artifacts.iter_ndjson(path))
+    rows.append(('artifacts ndjson', tmp / f'{name}.ndjson', artifacts.write_ndjson, ndjson_read))
+    rows.append(('artifacts ndjson.gz', tmp / f'{name}.ndjson.gz', artifacts.write_ndjson, ndjson_read))
+    if artifacts.zstandard is not None:
+        rows.append(('artifacts ndjson.zst', tmp / f'{name}.ndjson.zst', artifacts.write_ndjson, ndjson_read))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"serializer: {'orjson' if artifacts.orjson else 'stdlib json'}; "
+          f"zstd: {'yes' if artifacts.zstandard else 'not installed'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for source in ARTIFACTS:
+            if not source.exists():
+                continue
+            obj = json.loads(source.read_text(encoding='utf-8'))
+            print(f"\n{source.relative_to(UOG_DIR)}")
+            print(f"{'format':>22} {'write ms':>9} {'read ms':>8} {'KB':>8}")
+            for label, path, write, read in formats(Path(tmp), source.stem):
+                payload = as_records(obj) if 'ndjson' in label else obj
+                write_s = best_of(args.repeat, lambda: write(path, payload))
+                read_s = best_of(args.repeat, lambda: read(path))
+                print(f"{label:>22} {1e3 * write_s:>9.1f} {1e3 * read_s:>8.1f} {path.stat().st_size / 1024:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
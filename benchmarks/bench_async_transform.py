@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# bench_async_transform.py
+
+"""
+Thread-pool engine (`transform_courses_universal`) vs asyncio engine
+(`transform_courses_universal_async`) against a local stub LLM server with
+injected latency. Synthetic courses carry requisite and restriction strings
+that no local tier resolves, so every course makes two remote calls.
+
+    python -m benchmarks.bench_async_transform [--courses 400] [--latency 0.2] [--in-flight 64] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.stub_llm_server import StubLLMServer
+
+
+def synthetic_courses(n: int, tag: str) -> List[Dict[str, Any]]:
+    return [{
+        'code': f'BNCH*{1000 + i}',
+        'name': f'Benchmark Course {i}',
+        'description': '',
+        'credits': '[0.50]',
+        'departments': 'Department of Economics and Finance',
+        'offered': 'Fall Only',
+        'requisites': f'Consent of the instructor ({tag} {i})',
+        'restrictions': f'Restricted to students in Program {tag} {i}.',
+        'sections': [],
+    } for i in range(n)]
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--courses', type=int, default=400)
+    cli.add_argument('--latency', type=float, default=0.2, help='Seconds per stub request')
+    cli.add_argument('--in-flight', type=int, default=64, help='Async engine concurrency limit')
+    cli.add_argument('--error-rate', type=float, default=0.0, help='Share of stub requests answered with a 429')
+    args = cli.parse_args()
+
+    with StubLLMServer(latency=args.latency, error_rate=args.error_rate, retry_after=0.05, seed=0) as stub, \
+            tempfile.TemporaryDirectory() as tmp:
+        # The parsers build their backends at import time
+        os.environ.update({
+            'LLM_STUB_URL': stub.url,
+            'PARSE_CACHE_PATH': str(Path(tmp) / 'cache.sqlite3'),
+            'TRANSFORM_STORE_PATH': str(Path(tmp) / 'transforms.sqlite3'),
+            # Measure the engines, not the provider ceilings in core.rate_limit
+            'LLM_RPM_OPENAI': '0', 'LLM_TPM_OPENAI': '0', 'LLM_RPM_GEMINI': '0', 'LLM_TPM_GEMINI': '0',
+        })
+        from connectors.uog.transformers.main import (
+            MAX_WORKERS, transform_courses_universal, transform_courses_universal_async
+        )
+        logging.getLogger().setLevel(logging.WARNING)
+        # Injected 429s show up in the table, not as one retry warning each
+        logging.getLogger('core.rate_limit').setLevel(logging.ERROR)
+
+        print(f'{args.courses} courses x 2 calls, {args.latency * 1000:.0f} ms stub latency')
+        print(f"{'engine':<28} {'seconds':>8} {'courses/s':>10} {'requests':>9} {'429s':>6} {'peak in flight':>15}")
+        runs = [
+            (f'threads ({MAX_WORKERS} workers)',
+             lambda courses: transform_courses_universal(courses, batch_restrictions=False)),
+            (f'asyncio ({args.in_flight} in flight)',
+             lambda courses: asyncio.run(transform_courses_universal_async(
+                 courses, max_in_flight=args.in_flight, batch_restrictions=False))),
+        ]
+        outputs = []
+        for label, run in runs:
+            courses = synthetic_courses(args.courses, label.split()[0])
+            stub.requests = stub.errors = stub.peak_in_flight = 0
+            start = time.perf_counter()
+            result = run(courses)
+            elapsed = time.perf_counter() - start
+            outputs.append([c['courseCode'] for c in result])
+            print(f'{label:<28} {elapsed:>8.2f} {len(result) / elapsed:>10.1f} '
+                  f'{stub.requests:>9} {stub.errors:>6} {stub.peak_in_flight:>15}')
+        assert outputs[0] == outputs[1], 'engines returned courses in different orders'
+
+
+if __name__ == '__main__':
+    main()
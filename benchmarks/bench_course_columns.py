@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# bench_course_columns.py
+
+"""
+Record-by-record vs columnar computation of the deterministic course fields
+(department, level, credits, terms offered) for every course in the catalog,
+alone and as part of assembling each universal course (everything except the
+LLM parses). Both paths must produce identical courses. Times are CPU seconds,
+best of N rounds, with the parsers' memo caches cleared before each round.
+
+    python -m benchmarks.bench_course_columns [--rounds 10] [--copies 1]
+"""
+import argparse
+import copy
+import logging
+import time
+from pathlib import Path
+from typing import Callable
+
+from connectors.uog.extract.parsers.subjects_with_courses_parser import iter_raw_courses
+from connectors.uog.transformers.course_transformer.course_columns import local_course_fields
+from connectors.uog.transformers.course_transformer.course_helper_parsers.antirequisite_parser import (
+    parse_antirequisites
+)
+from connectors.uog.transformers.course_transformer.course_helper_parsers.text_scanner import scan_text
+from connectors.uog.transformers.course_transformer.course_processor import _assemble_course, local_fields_of
+
+RAW_FILE = Path(__file__).resolve().parent.parent / 'connectors' / 'uog' / 'raw' / 'subjects_with_courses.json'
+
+
+def cpu_seconds(rounds: int, call: Callable[[], object]) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        scan_text.cache_clear()
+        start = time.process_time()
+        call()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--rounds', type=int, default=10, help='Timed rounds; the best is reported')
+    cli.add_argument('--copies', type=int, default=1, help='Repeat the catalog to simulate a larger one')
+    args = cli.parse_args()
+    logging.disable(logging.INFO)
+
+    catalog = [course for _, course in iter_raw_courses(RAW_FILE)]
+    courses = [copy.copy(course) for _ in range(args.copies) for course in catalog]
+    antireqs = [parse_antirequisites(c.get('restrictions'), c.get('code')) for c in courses]
+
+    def per_record_fields():
+        return [local_fields_of(course) for course in courses]
+
+    def per_record_courses():
+        return [_assemble_course(course, a) for course, a in zip(courses, antireqs)]
+
+    def columnar_courses():
+        return [_assemble_course(course, a, fields)
+                for course, a, fields in zip(courses, antireqs, local_course_fields(courses))]
+
+    assert per_record_fields() == local_course_fields(courses), 'columnar fields differ'
+    assert per_record_courses() == columnar_courses(), 'columnar courses differ'
+
+    print(f'{len(courses)} courses ({args.copies} x {RAW_FILE.name}), CPU ms, best of {args.rounds}')
+    print(f"{'stage':<22} {'per-record':>11} {'columnar':>9}")
+    for stage, per_record, columnar in (
+            ('local fields', per_record_fields, lambda: local_course_fields(courses)),
+            ('assembled courses', per_record_courses, columnar_courses)):
+        print(f'{stage:<22} {cpu_seconds(args.rounds, per_record) * 1000:>11.1f} '
+              f'{cpu_seconds(args.rounds, columnar) * 1000:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# bench_course_records.py
+
+"""
+Compare the memory held by the full UoG catalog as cleaned dicts versus
+slotted, interned CourseRecords (both loaded from the same raw file).
+
+    python -m benchmarks.bench_course_records
+"""
+import gc
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Tuple
+
+from connectors.uog.extract.parsers.course_records import load_course_records
+from connectors.uog.extract.parsers.subjects_with_courses_parser import load_subjects_with_courses
+
+RAW_FILE = (Path(__file__).resolve().parent.parent / 'connectors' / 'uog' / 'extract'
+            / 'data' / 'course_catalog' / 'subjects_with_courses_raw.json')
+
+
+def retained(loader: Callable[[Path], dict]) -> Tuple[float, float, int]:
+    """Bytes still allocated after `loader` returns (result kept alive), plus load time."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = loader(RAW_FILE)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    courses = sum(len(v) for v in result.values())
+    del result
+    return size / 1e6, elapsed, courses
+
+
+def main():
+    dict_mb, dict_s, n = retained(load_subjects_with_courses)
+    rec_mb, rec_s, _ = retained(load_course_records)
+    print(f"{n} courses from {RAW_FILE.name}")
+    print(f"{'form':>8} {'MB held':>8} {'load s':>7}")
+    print(f"{'dicts':>8} {dict_mb:>8.2f} {dict_s:>7.3f}")
+    print(f"{'records':>8} {rec_mb:>8.2f} {rec_s:>7.3f}")
+    print(f"saving: {100 * (1 - rec_mb / dict_mb):.1f}%")
+
+
+if __name__ == '__main__':
+    main()
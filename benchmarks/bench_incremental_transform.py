@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# bench_incremental_transform.py
+
+"""
+Full vs incremental re-runs of `transform_courses_universal` against a local
+stub LLM server with injected latency. A cold run fills the transform store;
+re-runs then change a share of the courses and transform only those. The
+parsers' in-run memos and the parse cache are reset before every run, as in
+a fresh process, so each recomputed course costs its remote calls.
+
+    python -m benchmarks.bench_incremental_transform [--courses 400] [--latency 0.2] [--changed 0 0.05 0.25]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_async_transform import synthetic_courses
+from benchmarks.stub_llm_server import StubLLMServer
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--courses', type=int, default=400)
+    cli.add_argument('--latency', type=float, default=0.2, help='Seconds per stub request')
+    cli.add_argument('--changed', type=float, nargs='+', default=[0.0, 0.05, 0.25],
+                     help='Shares of courses changed before each re-run')
+    args = cli.parse_args()
+
+    with StubLLMServer(latency=args.latency) as stub, tempfile.TemporaryDirectory() as tmp:
+        # The parsers build their backends and the store opens its file at import time
+        os.environ.update({
+            'LLM_STUB_URL': stub.url,
+            'PARSE_CACHE_PATH': str(Path(tmp) / 'cache.sqlite3'),
+            'TRANSFORM_STORE_PATH': str(Path(tmp) / 'transforms.sqlite3'),
+            'LLM_RPM_OPENAI': '0', 'LLM_TPM_OPENAI': '0', 'LLM_RPM_GEMINI': '0', 'LLM_TPM_GEMINI': '0',
+        })
+        from connectors.uog.transformers import main as transformer
+        from connectors.uog.transformers.course_transformer.course_helper_parsers import (
+            program_restriction_parser, requisite_parser
+        )
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.parse_cache import ParseCache
+        logging.getLogger().setLevel(logging.WARNING)
+
+        def run(label: str, courses: list, incremental: bool = True) -> list:
+            requisite_parser._MODEL_RESULTS.clear()
+            program_restriction_parser._PRIMED.clear()
+            requisite_parser.PARSE_CACHE = ParseCache(Path(tmp) / f'cache-{label}.sqlite3')
+            stub.requests = 0
+            start = time.perf_counter()
+            result = transformer.transform_courses_universal(courses, batch_restrictions=False,
+                                                             incremental=incremental)
+            elapsed = time.perf_counter() - start
+            print(f'{label:<24} {elapsed:>8.2f} {stub.requests:>9}')
+            return result
+
+        courses = synthetic_courses(args.courses, 'incremental')
+        print(f'{args.courses} courses x 2 calls, {args.latency * 1000:.0f} ms stub latency')
+        print(f"{'run':<24} {'seconds':>8} {'requests':>9}")
+        cold = run('cold (store empty)', courses)
+        for share in args.changed:
+            changed = int(len(courses) * share)
+            edited = [dict(course, requisites=f"{course['requisites']} (rev {share})") if i < changed else course
+                      for i, course in enumerate(courses)]
+            incremental = run(f'{share:.0%} changed', edited)
+            full = run(f'{share:.0%} changed, full', edited, incremental=False)
+            assert incremental == full, 'incremental and full runs differ'
+            assert incremental[changed:] == cold[changed:], 'unchanged courses differ from the cold run'
+
+
+if __name__ == '__main__':
+    main()
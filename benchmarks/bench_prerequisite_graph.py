@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# bench_prerequisite_graph.py
+
+"""
+Transitive prerequisite queries over the whole catalog: walking the nested
+`prerequisites` JSON per query (breadth-first through a code -> course dict)
+vs the precomputed `PrerequisiteGraph`. Requisites are parsed locally with
+the rule-based grammar, so no LLM is needed; strings it rejects are left
+without prerequisites. Both must give the same answers for every course.
+
+    python -m benchmarks.bench_prerequisite_graph [--rounds 5]
+"""
+import argparse
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set
+
+from core.prerequisite_graph import PrerequisiteGraph, requisite_edges
+from connectors.uog.extract.parsers.subjects_with_courses_parser import iter_raw_courses
+from connectors.uog.transformers.course_transformer.course_helper_parsers.requisite_grammar import parse_requisite
+
+RAW_FILE = Path(__file__).resolve().parent.parent / 'connectors' / 'uog' / 'raw' / 'subjects_with_courses.json'
+
+
+def walk_requirements(by_code: Dict[str, Dict[str, Any]], code: str) -> Set[str]:
+    """The per-query walk: re-reads every expression on the way down."""
+    found: Set[str] = set()
+    queue = deque([code])
+    while queue:
+        course = by_code.get(queue.popleft())
+        if course is None:
+            continue
+        for prerequisite in requisite_edges(course.get('prerequisites'))[0]:
+            if prerequisite not in found:
+                found.add(prerequisite)
+                queue.append(prerequisite)
+    return found
+
+
+def walk_unlocked(courses: List[Dict[str, Any]], code: str) -> Set[str]:
+    """The per-query reverse walk: every course's expression is scanned per level."""
+    found: Set[str] = set()
+    frontier = {code}
+    while frontier:
+        frontier = {course['courseCode'] for course in courses
+                    if frontier.intersection(requisite_edges(course.get('prerequisites'))[0])} - found
+        found |= frontier
+    return found
+
+
+def best_of(rounds: int, call: Callable[[], object]) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--rounds', type=int, default=5, help='Timed rounds; the best is reported')
+    args = cli.parse_args()
+    logging.disable(logging.WARNING)
+
+    courses = []
+    for _, course in iter_raw_courses(RAW_FILE):
+        requisites = course.get('requisites')
+        parsed = parse_requisite(requisites) if requisites else None
+        courses.append({'courseCode': course.get('code'), 'prerequisites': parsed})
+    by_code = {course['courseCode']: course for course in courses}
+    codes = list(by_code)
+
+    graph = PrerequisiteGraph.from_courses(courses)
+    for code in codes:
+        assert set(graph.all_requirements(code)) == walk_requirements(by_code, code), code
+    sample = codes[::50]
+    for code in sample:
+        assert set(graph.all_unlocked(code)) == walk_unlocked(courses, code), code
+
+    stats = graph.stats()
+    print(f"{len(codes)} courses, {sum(1 for c in courses if c['prerequisites'])} with parsed prerequisites, "
+          f"{stats['requirement_edges']} edges, {stats['cycles']} cycles")
+    print(f'build (edges, closures, cycles): {best_of(args.rounds, lambda: PrerequisiteGraph.from_courses(courses)) * 1000:.1f} ms')
+    print(f"{'query':<34} {'walk us':>10} {'graph us':>10}")
+    rows = (
+        ('all requirements (every course)', len(codes),
+         lambda: [walk_requirements(by_code, code) for code in codes],
+         lambda: [graph.all_requirements(code) for code in codes]),
+        ('is A required before B', len(codes),
+         lambda: [codes[0] in walk_requirements(by_code, code) for code in codes],
+         lambda: [graph.is_required_before(codes[0], code) for code in codes]),
+        (f'all unlocked ({len(sample)} courses)', len(sample),
+         lambda: [walk_unlocked(courses, code) for code in sample],
+         lambda: [graph.all_unlocked(code) for code in sample]),
+    )
+    for label, queries, walk, indexed in rows:
+        print(f'{label:<34} {best_of(args.rounds, walk) * 1e6 / queries:>10.1f} '
+              f'{best_of(args.rounds, indexed) * 1e6 / queries:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# bench_program_sections_parser.py
+
+"""
+Benchmark the Stage 4 program-sections parser on the checked-in raw calendar
+dump, replicated 10x..100x, to check parse time stays linear in input size.
+
+    python -m benchmarks.bench_program_sections_parser [--scales 10 25 50 100] [--repeat 3]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import List
+
+from connectors.uog.extract.parsers.programs_with_sections_parser import iter_programs_with_sections
+
+RAW_FILE = (Path(__file__).resolve().parent.parent / 'connectors' / 'uog' / 'extract'
+            / 'data' / 'programs' / 'programs_with_sections_raw.json')
+
+
+def count_lines(programs: List[dict]) -> int:
+    return sum(len(c) for p in programs for c in (p.get('sections') or {}).values() if isinstance(c, list))
+
+
+def bench(programs: List[dict], repeat: int) -> float:
+    """Best wall time of `repeat` full passes over the generator."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in iter_programs_with_sections(programs):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 25, 50, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    raw = json.loads(RAW_FILE.read_text(encoding='utf-8'))
+    lines = count_lines(raw)
+    print(f"{len(raw)} programs / {lines} section lines per copy")
+    print(f"{'scale':>6} {'programs':>9} {'lines':>10} {'seconds':>9} {'us/line':>8}")
+    for scale in args.scales:
+        programs = raw * scale
+        elapsed = bench(programs, args.repeat)
+        print(f"{scale:>6} {len(programs):>9} {lines * scale:>10} {elapsed:>9.3f} "
+              f"{1e6 * elapsed / (lines * scale):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
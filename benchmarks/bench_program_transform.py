@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# bench_program_transform.py
+
+"""
+Course-reference resolution for the program transformer: scanning the course
+list for every reference (and walking the course's prerequisites each time)
+vs the code index `build_course_index` builds once per run. Both must produce
+identical programs. Courses are assembled locally from the raw catalog (no LLM
+parses), with a synthetic prerequisite per course so the prerequisite map is
+exercised. Times are CPU seconds, best of N rounds, index build included.
+
+    python -m benchmarks.bench_program_transform [--rounds 5] [--copies 1]
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from core.prerequisite_graph import requisite_edges
+from connectors.uog.extract.parsers.programs_with_sections_parser import parse_programs_with_sections
+from connectors.uog.extract.parsers.subjects_with_courses_parser import iter_raw_courses
+from connectors.uog.transformers.course_transformer.course_processor import _assemble_course
+from connectors.uog.transformers.program_transformer.program_processor import (
+    IndexedCourse, build_course_index, process_single_program
+)
+
+UOG_DIR = Path(__file__).resolve().parent.parent / 'connectors' / 'uog'
+COURSES_FILE = UOG_DIR / 'raw' / 'subjects_with_courses.json'
+PROGRAMS_FILE = UOG_DIR / 'extract' / 'data' / 'programs' / 'programs_with_sections_raw.json'
+
+
+class ScanIndex:
+    """The lookup without an index: a linear scan of the course list per reference."""
+
+    def __init__(self, courses: List[Dict[str, Any]]):
+        self.courses = courses
+
+    def get(self, code: str) -> Optional[IndexedCourse]:
+        for course in self.courses:
+            if course['courseCode'] == code:
+                return IndexedCourse(course['courseId'], course['title'], course['credits'],
+                                     requisite_edges(course['prerequisites'])[0])
+        return None
+
+
+def cpu_seconds(rounds: int, call: Callable[[], object]) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.process_time()
+        call()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--rounds', type=int, default=5, help='Timed rounds; the best is reported')
+    cli.add_argument('--copies', type=int, default=1, help='Repeat the program list to simulate a larger run')
+    args = cli.parse_args()
+    logging.disable(logging.INFO)
+
+    courses = [_assemble_course(course, []) for _, course in iter_raw_courses(COURSES_FILE)]
+    for previous, course in zip(courses, courses[1:]):
+        course['prerequisites'] = {'type': 'COURSE', 'courses': [previous['courseCode']]}
+    with open(PROGRAMS_FILE, encoding='utf-8') as f:
+        programs = parse_programs_with_sections(json.load(f)) * args.copies
+
+    def scanned():
+        index = ScanIndex(courses)
+        return [process_single_program(program, index) for program in programs]
+
+    def indexed():
+        index = build_course_index(courses)
+        return [process_single_program(program, index) for program in programs]
+
+    assert scanned() == indexed(), 'indexed programs differ'
+
+    references = sum(len(group['courses']) for program in indexed() for group in program['requirementGroups'] or ())
+    print(f'{len(programs)} programs, {references} course references, {len(courses)} courses; '
+          f'CPU ms, best of {args.rounds}')
+    for label, call in (('scan per reference', scanned), ('code index', indexed)):
+        print(f'{label:<20} {cpu_seconds(args.rounds, call) * 1000:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# bench_result_spool.py
+
+"""
+Peak memory and time of writing transformed courses as they complete: collecting
+every result and writing the array at the end vs appending to a `ResultSpool`
+and merging it into the same ordered artifact. Results are copies of the
+checked-in universal course sample, produced one at a time in a shuffled
+completion order, as the thread pool would. Both outputs must be identical.
+
+    python -m benchmarks.bench_result_spool [--copies 4]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from core import artifacts
+from core.result_spool import ResultSpool
+
+SAMPLE_FILE = Path(__file__).resolve().parent.parent / 'connectors' / 'uog' / 'transformers' / 'test_output_universal_courses.json'
+
+
+def completions(templates: List[str], copies: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(index, fresh course) pairs in a fixed shuffled order; each course is built when asked for."""
+    order = list(range(len(templates) * copies))
+    random.Random(0).shuffle(order)
+    for index in order:
+        yield index, json.loads(templates[index % len(templates)])
+
+
+def measure(call: Callable[[], Any]) -> Tuple[float, float]:
+    """(seconds, peak MiB allocated) of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--copies', type=int, default=4, help='Repeat the sample to simulate a larger run')
+    args = cli.parse_args()
+
+    templates = [json.dumps(course) for course in artifacts.read_json(SAMPLE_FILE)]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        def collected():
+            by_index = dict(completions(templates, args.copies))
+            artifacts.write_json(tmp / 'collected.json', [by_index.pop(i) for i in sorted(by_index)])
+
+        def streamed():
+            spool = ResultSpool(tmp / 'streamed.json.partial.ndjson')
+            with spool:
+                for index, course in completions(templates, args.copies):
+                    spool.write(index, course)
+            spool.merge_to(tmp / 'streamed.json')
+            spool.remove()
+
+        rows = [('collect, then write', measure(collected)), ('spool, then merge', measure(streamed))]
+        assert (tmp / 'collected.json').read_bytes() == (tmp / 'streamed.json').read_bytes(), 'outputs differ'
+
+        print(f'{len(templates) * args.copies} courses, {(tmp / "streamed.json").stat().st_size / 2 ** 20:.1f} MiB output '
+              f'(timed under tracemalloc)')
+        print(f"{'writer':<22} {'seconds':>8} {'peak MiB':>9}")
+        for label, (seconds, peak) in rows:
+            print(f'{label:<22} {seconds:>8.2f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# bench_text_scanner.py
+
+"""
+Per-keyword regex parsing (the implementation `text_scanner` replaced) vs the
+single-pass scanner, for antirequisites, the stripped restriction string and
+terms offered over every course in the catalog. Both must return identical
+results; the scanner's cache is cleared before each timed round.
+
+    python -m benchmarks.bench_text_scanner [--rounds 20]
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from connectors.uog.extract.parsers.subjects_with_courses_parser import iter_raw_courses
+from connectors.uog.transformers.course_transformer.course_helper_parsers.antirequisite_parser import (
+    parse_antirequisites
+)
+from connectors.uog.transformers.course_transformer.course_helper_parsers.terms_offered_parser import (
+    parse_terms_offered
+)
+from connectors.uog.transformers.course_transformer.course_helper_parsers.text_scanner import (
+    ANTIREQUISITE_TRIGGERS, COURSE_CODE_REGEX, SEASONS, YEAR_PATTERNS, scan_text
+)
+from connectors.uog.transformers.course_transformer.course_processor import strip_antirequisites
+
+RAW_FILE = Path(__file__).resolve().parent.parent / 'connectors' / 'uog' / 'raw' / 'subjects_with_courses.json'
+
+
+# --- Reference: the per-keyword implementation ---
+
+def legacy_antirequisites(restrictions_string: Optional[str], current_course_code: Optional[str]) -> List[str]:
+    if not restrictions_string or not current_course_code:
+        return []
+    lower_restrictions = restrictions_string.lower()
+    trigger_found = any(trigger in lower_restrictions for trigger in ANTIREQUISITE_TRIGGERS)
+    if not trigger_found and re.match(COURSE_CODE_REGEX, restrictions_string):
+        trigger_found = True
+    if trigger_found:
+        return [code for code in re.findall(COURSE_CODE_REGEX, restrictions_string) if code != current_course_code]
+    return []
+
+
+def legacy_strip(restrictions_text: Optional[str], antireqs: List[str]) -> Optional[str]:
+    filtered_restrictions = restrictions_text
+    if antireqs and filtered_restrictions:
+        for code in antireqs:
+            filtered_restrictions = re.sub(rf'\b{re.escape(code)}\b\s*[.,]?', '', filtered_restrictions).strip()
+    return filtered_restrictions
+
+
+def legacy_terms(offered_string: Optional[str]) -> List[Dict[str, Any]]:
+    if not offered_string or offered_string.strip().lower() == 'n/a':
+        return []
+    found_seasons, found_years = [], []
+    note_text = offered_string
+    for season in SEASONS:
+        if re.search(rf'\b{season}\b', offered_string, re.IGNORECASE):
+            found_seasons.append(season)
+            note_text = re.sub(rf'\b{season}\b', '', note_text, flags=re.IGNORECASE)
+    for pattern_text, pattern_enum in YEAR_PATTERNS.items():
+        if re.search(rf'\b{pattern_text}\b', offered_string, re.IGNORECASE):
+            if pattern_enum not in found_years:
+                found_years.append(pattern_enum)
+            note_text = re.sub(rf'\b{pattern_text}\b', '', note_text, flags=re.IGNORECASE)
+    note_text = re.sub(r',|\band\b|&', '', note_text, flags=re.IGNORECASE)
+    return [{"terms": found_seasons, "years": found_years, "note": note_text.strip() or None}]
+
+
+def run(courses: List[Dict[str, Any]], antirequisites: Callable, strip: Callable, terms: Callable) -> list:
+    results = []
+    for course in courses:
+        restrictions, code = course.get('restrictions'), course.get('code')
+        antireqs = antirequisites(restrictions, code)
+        results.append((antireqs, strip(restrictions, antireqs), terms(course.get('offered'))))
+    return results
+
+
+def timed(rounds: int, call: Callable[[], list]) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        scan_text.cache_clear()
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    cli.add_argument('--rounds', type=int, default=20, help='Timed rounds; the best is reported')
+    args = cli.parse_args()
+
+    courses = [course for _, course in iter_raw_courses(RAW_FILE)]
+    # Antirequisite logging is per course; keep it out of the timings
+    import logging
+    logging.disable(logging.INFO)
+
+    legacy = lambda: run(courses, legacy_antirequisites, legacy_strip, legacy_terms)
+    scanner = lambda: run(courses, parse_antirequisites, strip_antirequisites, parse_terms_offered)
+    assert legacy() == scanner(), 'scanner results differ from the per-keyword parsers'
+
+    legacy_s, scanner_s = timed(args.rounds, legacy), timed(args.rounds, scanner)
+    print(f'{len(courses)} courses from {RAW_FILE.name}, best of {args.rounds} rounds (scanner cache cleared)')
+    print(f"{'parser':<12} {'ms':>8} {'us/course':>10}")
+    for label, seconds in (('per-keyword', legacy_s), ('scanner', scanner_s)):
+        print(f'{label:<12} {seconds * 1000:>8.1f} {seconds * 1e6 / len(courses):>10.1f}')
+    print(f'speedup: {legacy_s / scanner_s:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
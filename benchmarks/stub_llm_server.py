@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# stub_llm_server.py
+
+"""
+A local stand-in for the OpenAI chat completions and Gemini generateContent
+endpoints, with injected latency and errors, for load-testing and benchmarking
+the transformer without network access or API spend.
+
+    with StubLLMServer(latency=0.2, error_rate=0.05, responder=GoldenResponder()) as stub:
+        os.environ['LLM_STUB_URL'] = stub.url      # every core.llm_backend adapter
+        ...
+        print(stub.requests, stub.errors, stub.peak_in_flight)
+
+Every input gets `responder(text)` back (RAW_UNPARSED echo by default;
+`GoldenResponder` replays the golden dataset). Batched Gemini prompts
+(`core.llm_batch`) get a keyed object back. With `error_rate`, that share of
+requests fails with a 429 carrying a Retry-After header.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+def echo_unparsed(text: str) -> Dict[str, Any]:
+    return {'type': 'RAW_UNPARSED', 'value': text}
+
+
+class GoldenResponder:
+    """
+    Answers with the golden dataset's prerequisites for known requisite strings,
+    and `echo_unparsed` for everything else.
+
+    Args:
+        path: Golden NDJSON file; defaults to the one `GoldenIndex` uses.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.golden_index import GoldenIndex
+
+        self.index = GoldenIndex(path)
+
+    def __call__(self, text: str) -> Any:
+        found, prereqs = self.index.lookup(text)
+        return prereqs if found else echo_unparsed(text)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open hundreds of connections at once
+    request_queue_size = 1024
+
+
+class StubLLMServer:
+    def __init__(self, latency: float = 0.0, responder: Callable[[str], Any] = echo_unparsed,
+                 host: str = '127.0.0.1', port: int = 0, error_rate: float = 0.0,
+                 retry_after: float = 0.1, seed: Optional[int] = None):
+        self.latency = latency
+        self.responder = responder
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def openai_base_url(self) -> str:
+        return f'{self.url}/v1'
+
+    @property
+    def gemini_url(self) -> str:
+        return f'{self.url}/v1beta/models/stub:generateContent'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, the body
+            # waits ~40 ms for the client's delayed ACK on every keep-alive request
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+                    fail = stub.error_rate and stub._random.random() < stub.error_rate
+                    if fail:
+                        stub.errors += 1
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if fail:
+                        self._reply(429, {'error': {'code': 429, 'message': 'Stub rate limit'}},
+                                    {'Retry-After': str(stub.retry_after)})
+                        return
+                    if self.path.endswith('/chat/completions'):
+                        answer = stub._openai_answer(body)
+                    elif 'generateContent' in self.path:
+                        answer = stub._gemini_answer(body)
+                    else:
+                        self.send_error(404)
+                        return
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                self._reply(200, answer)
+
+            def _reply(self, status: int, answer: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(answer).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _openai_answer(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        text = body['messages'][-1]['content']
+        content = json.dumps(self.responder(text))
+        return {
+            'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': len(text) // 4, 'completion_tokens': len(content) // 4,
+                      'total_tokens': (len(text) + len(content)) // 4},
+        }
+
+    def _gemini_answer(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = body['contents'][0]['parts'][0]['text']
+        if 'Inputs: ' in prompt:
+            inputs = json.loads(prompt.rsplit('Inputs: ', 1)[1])
+            reply = {key: self.responder(text) for key, text in inputs.items()}
+        else:
+            reply = self.responder(prompt.rsplit('Input: ', 1)[-1].strip().strip('"“”'))
+        return {
+            'candidates': [{'content': {'parts': [{'text': json.dumps(reply)}]}}],
+            'usageMetadata': {'promptTokenCount': len(prompt) // 4},
+        }
+
+    def start(self) -> 'StubLLMServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubLLMServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    cli = argparse.ArgumentParser(description='Serve stub OpenAI / Gemini endpoints.')
+    cli.add_argument('--port', type=int, default=8765)
+    cli.add_argument('--latency', type=float, default=0.2, help='Seconds added to every request')
+    cli.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 429')
+    cli.add_argument('--retry-after', type=float, default=0.1, help='Retry-After seconds sent with each 429')
+    cli.add_argument('--seed', type=int, default=None, help='Seed for reproducible error injection')
+    cli.add_argument('--golden', nargs='?', const='', default=None, metavar='PATH',
+                     help='Replay golden-dataset answers (default dataset if no path)')
+    args = cli.parse_args()
+    responder = GoldenResponder(args.golden or None) if args.golden is not None else echo_unparsed
+    server = StubLLMServer(latency=args.latency, responder=responder, port=args.port,
+                           error_rate=args.error_rate, retry_after=args.retry_after, seed=args.seed).start()
+    print(f'LLM_STUB_URL={server.url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 # connectors/uog/connector.py
 
-import json
 import logging
 from pathlib import Path
 
+from core.artifacts import write_json
 from core.connector_base import BaseConnector
 from connectors.uog.extract.driver import main as run_scrapers
 from connectors.uog.extract.parsers.subjects_with_courses_parser import parse_subjects_with_courses
@@ -58,13 +58,8 @@ class UoGConnector(BaseConnector):
 
 
         out_dir = Path(__file__).parent / "cleaned"
-        out_dir.mkdir(exist_ok=True)
-        (out_dir / "universal_courses_cleaned.json").write_text(
-            json.dumps(courses_norm, indent=2), encoding='utf-8'
-        )
-        (out_dir / "universal_programs_cleaned.json").write_text(
-            json.dumps(programs_norm, indent=2), encoding='utf-8'
-        )
+        write_json(out_dir / "universal_courses_cleaned.json", courses_norm)
+        write_json(out_dir / "universal_programs_cleaned.json", programs_norm)
 
         return {
             'courses': courses_norm,
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 # course_catalog.py
 
-import json
 import logging
 from pathlib import Path
 
+from core.artifacts import write_artifact
 from .scrapper_modules.scrape_subjects_list import load_subjects, parse_subjects
 
 # Configure logging
@@ -36,14 +36,10 @@ def extract_and_parse_course_catalog(write_json: bool = True) -> list:
     if write_json:
         base_dir = Path(__file__).resolve().parent
         output_dir = base_dir / 'data' / 'course_catalog'
-        output_dir.mkdir(parents=True, exist_ok=True)
         output_file = output_dir / 'course_catalog.json'
 
         logger.info(f"Stage 1: Writing parsed subjects ({len(subjects)}) to {output_file}")
-        output_file.write_text(
-            json.dumps(subjects, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
+        write_artifact(output_file, subjects)
 
     return subjects
 
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# crawl_planner.py
+
+"""
+Change-aware planning for the detail stages (2 and 4).
+
+Before a stage opens any browser, the planner decides per catalog entry whether
+it needs a full detail scrape or whether last run's result can be reused:
+
+- Programs (Stage 4) are probed with a plain conditional HTTP GET on their
+  calendar page. A 304, or a 200 whose body digest matches the stored one,
+  means the calendar is unchanged.
+- Subjects (Stage 2) are served by the Colleague JS app, which has no plain
+  HTTP probe. They are refetched when new, missing from the last run, past
+  their age limit, or when a `subject_probe` reports a course list that differs
+  from the stored `course_list_digest`. Stage 2 passes a probe that lists a
+  subject's course codes without expanding any course. The age limit is spread
+  per subject between (1 - SUBJECT_AGE_SPREAD) and 1 times SUBJECT_MAX_AGE_DAYS,
+  so subjects recorded in the same run do not all expire together.
+
+Validators, digests and content hashes live in data/crawl_state.json and are
+updated after each incremental run. Every decision and the resulting savings
+are logged.
+"""
+import hashlib
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import requests
+
+from core.artifacts import read_json, write_json
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    datefmt="%H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_FILE = BASE_DIR / 'data' / 'crawl_state.json'
+
+# Force a full scrape after this long even if nothing looks changed
+SUBJECT_MAX_AGE_DAYS = 7
+PROGRAM_MAX_AGE_DAYS = 30
+# Subjects expire between (1 - spread) and 1 times SUBJECT_MAX_AGE_DAYS
+SUBJECT_AGE_SPREAD = 0.5
+# Concurrent HTTP probes
+PROBE_WORKERS = 8
+# Concurrent subject probes (each holds a browser page)
+SUBJECT_PROBE_WORKERS = 4
+PROBE_TIMEOUT = 20
+
+
+class CrawlPlan(NamedTuple):
+    fetch: List[dict]          # catalog entries that need a detail scrape
+    reuse: List[dict]          # catalog entries whose previous result is still valid
+    reasons: Dict[str, str]    # entry id -> decision reason
+
+
+def content_hash(obj: Any) -> str:
+    """Stable hash of a scraped result."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def course_list_digest(codes: List[str]) -> str:
+    """Stored and probed value of a subject: the set of course codes it lists."""
+    return hashlib.sha256('\n'.join(sorted(codes)).encode('utf-8')).hexdigest()
+
+
+def subject_max_age(code: str, max_age_days: float, spread: float = SUBJECT_AGE_SPREAD) -> float:
+    """A subject's own age limit in days, fixed per code, within the spread below `max_age_days`."""
+    fraction = int(hashlib.sha256(code.encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+    return max_age_days * (1 - spread * fraction)
+
+
+def program_id(program: dict) -> str:
+    # calendar_url is shared by a few catalog entries, name+degree is not
+    return f"{program.get('name')}|{program.get('degree')}"
+
+
+def load_state() -> Dict[str, Dict[str, dict]]:
+    if not STATE_FILE.exists():
+        return {'subjects': {}, 'programs': {}}
+    return read_json(STATE_FILE)
+
+
+def save_state(state: Dict[str, Dict[str, dict]]) -> None:
+    write_json(STATE_FILE, state)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _is_stale(entry: dict, max_age_days: float) -> bool:
+    scraped_at = entry.get('scraped_at')
+    if not scraped_at:
+        return True
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(scraped_at)
+    return age > timedelta(days=max_age_days)
+
+
+def probe_calendar(url: str, previous: dict) -> Dict[str, Any]:
+    """
+    Conditional GET of a calendar page. Returns the new validators plus
+    'status': 'unchanged', 'changed' or 'unknown' (probe failed).
+    """
+    headers = {}
+    if previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+    try:
+        resp = requests.get(url, headers=headers, timeout=PROBE_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Probe failed for {url}: {e}")
+        return {'status': 'unknown'}
+
+    if resp.status_code == 304:
+        return {'status': 'unchanged', 'etag': previous.get('etag'),
+                'last_modified': previous.get('last_modified'), 'page_digest': previous.get('page_digest')}
+    if resp.status_code != 200:
+        return {'status': 'unknown'}
+
+    digest = hashlib.sha256(resp.content).hexdigest()
+    status = 'unchanged' if digest == previous.get('page_digest') else 'changed'
+    return {'status': status, 'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'), 'page_digest': digest}
+
+
+def log_plan(stage: str, noun: str, plan: CrawlPlan) -> None:
+    total = len(plan.fetch) + len(plan.reuse)
+    saved = 100.0 * len(plan.reuse) / total if total else 0.0
+    counts = Counter(plan.reasons.values())
+    logger.info(f"{stage} plan: fetch {len(plan.fetch)} / reuse {len(plan.reuse)} of {total} {noun} "
+                f"({saved:.1f}% of detail scrapes skipped); reasons: {dict(counts)}")
+    for reason_id, reason in plan.reasons.items():
+        if reason != 'unchanged':
+            logger.info(f"  fetch [{reason_id}]: {reason}")
+
+
+def plan_subjects(subjects: List[dict], previous: Dict[str, List[dict]], state: dict,
+                  max_age_days: float = SUBJECT_MAX_AGE_DAYS,
+                  subject_probe: Optional[Callable[[dict], Optional[str]]] = None) -> CrawlPlan:
+    """
+    Decide which subjects need a Stage 2 scrape.
+
+    Args:
+        subjects: Stage 1 catalog entries.
+        previous: Last run's raw subject -> courses mapping.
+        state: Crawl state from `load_state()`.
+        max_age_days: Refetch anything older than this.
+        subject_probe: Cheap probe returning the `course_list_digest` of the
+            course codes a subject lists, or None when it fails. A value other
+            than the stored one forces a fetch. Without a probe only the age
+            limit can catch a changed subject.
+    """
+    known = state.get('subjects', {})
+    if subject_probe is None:
+        logger.warning("Stage 2 plan: no subject probe, so unchanged-looking subjects are only "
+                       "refetched when their age limit expires")
+
+    def decide(subj: dict) -> str:
+        code = subj['code']
+        entry = known.get(code)
+        if entry is None:
+            return 'new subject'
+        if code not in previous or content_hash(previous[code]) != entry.get('content_hash'):
+            return 'no matching previous result'
+        if _is_stale(entry, subject_max_age(code, max_age_days)):
+            return f'past its age limit ({max_age_days} days at most)'
+        if subject_probe is None:
+            return 'unchanged'
+        value = subject_probe(subj)
+        if value is None:
+            return 'probe failed'
+        return 'unchanged' if value == entry.get('probe') else 'course list changed'
+
+    with ThreadPoolExecutor(max_workers=SUBJECT_PROBE_WORKERS) as executor:
+        decisions = list(executor.map(decide, subjects))
+
+    fetch, reuse, reasons = [], [], {}
+    for subj, reason in zip(subjects, decisions):
+        reasons[subj['code']] = reason
+        (reuse if reason == 'unchanged' else fetch).append(subj)
+    plan = CrawlPlan(fetch, reuse, reasons)
+    log_plan('Stage 2', 'subjects', plan)
+    return plan
+
+
+def record_subjects(state: dict, fetched: Dict[str, List[dict]]) -> None:
+    """
+    Store content hashes and course list digests for freshly scraped subjects.
+    The digest comes from the scraped courses themselves, so recording costs
+    no extra probe.
+    """
+    known = state.setdefault('subjects', {})
+    for code, courses in fetched.items():
+        if not courses:
+            # load_courses returns [] on errors; leave it to be retried next run
+            continue
+        known[code] = {'content_hash': content_hash(courses), 'course_count': len(courses),
+                       'probe': course_list_digest([c['code'] for c in courses if c.get('code')]),
+                       'scraped_at': _now()}
+
+
+def plan_programs(programs: List[dict], previous: Dict[str, dict], state: dict,
+                  max_age_days: float = PROGRAM_MAX_AGE_DAYS,
+                  probe: Callable[[str, dict], Dict[str, Any]] = probe_calendar) -> CrawlPlan:
+    """
+    Decide which programs need a Stage 4 scrape, probing calendar pages over
+    plain HTTP. New validators are kept on the plan entries' state for
+    `record_programs`.
+
+    Args:
+        programs: Stage 3 catalog entries.
+        previous: Last run's raw results keyed by `program_id`.
+        state: Crawl state from `load_state()`.
+        max_age_days: Refetch anything older than this.
+        probe: Calendar probe, `probe_calendar` by default.
+    """
+    known = state.setdefault('programs', {})
+
+    def decide(prog: dict) -> str:
+        pid = program_id(prog)
+        entry = known.get(pid)
+        if entry is None:
+            return 'new program'
+        if pid not in previous or content_hash(previous[pid]) != entry.get('content_hash'):
+            return 'no matching previous result'
+        if previous[pid].get('calendar_error'):
+            return 'previous scrape failed'
+        if _is_stale(entry, max_age_days):
+            return f'older than {max_age_days} days'
+        if not prog.get('calendar_url'):
+            return 'unchanged'
+        result = probe(prog['calendar_url'], entry)
+        entry['pending_validators'] = {k: v for k, v in result.items() if k != 'status'}
+        return {'unchanged': 'unchanged', 'changed': 'calendar changed'}.get(result['status'], 'probe failed')
+
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        decisions = list(executor.map(decide, programs))
+
+    fetch, reuse, reasons = [], [], {}
+    for prog, reason in zip(programs, decisions):
+        reasons[program_id(prog)] = reason
+        (reuse if reason == 'unchanged' else fetch).append(prog)
+    plan = CrawlPlan(fetch, reuse, reasons)
+    log_plan('Stage 4', 'programs', plan)
+    return plan
+
+
+def record_programs(state: dict, fetched: List[dict], probe: Callable[[str, dict], Dict[str, Any]] = probe_calendar) -> None:
+    """Store content hashes and page validators for freshly scraped programs."""
+    known = state.setdefault('programs', {})
+    for result in fetched:
+        pid = program_id(result)
+        entry = known.get(pid, {})
+        validators = entry.pop('pending_validators', None)
+        if validators is None and result.get('calendar_url'):
+            # First sighting: take validators now so the next run can probe
+            validators = {k: v for k, v in probe(result['calendar_url'], {}).items() if k != 'status'}
+        known[pid] = {**(validators or {}), 'content_hash': content_hash(result), 'scraped_at': _now()}
+    # Reused programs keep their stored hash but pick up refreshed validators
+    for entry in known.values():
+        pending = entry.pop('pending_validators', None)
+        if pending:
+            entry.update(pending)
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 # driver.py
 
+import argparse
 import asyncio
 import logging as logger
 from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .sharding import ShardSpec
 
 # ... (logging configuration and all run_* functions remain the same) ...
 
@@ -29,32 +33,85 @@ def run_program_catalog() -> list:
     return programs
 
 
-def run_subjects_with_courses() -> dict:
+def run_subjects_with_courses(shard: Optional[ShardSpec] = None, incremental: bool = False) -> dict:
     """
     Stage 2: Extract, parse, and clean subjects with courses. --> not a full clean 
     """
-    logger.info("→ Stage 2: subjects_with_courses")
+    logger.info(f"→ Stage 2: subjects_with_courses{f' (shard {shard})' if shard else ''}")
     from .subjects_with_courses import extract_and_parse_subjects
-    courses = asyncio.run(extract_and_parse_subjects(write_json=True))
+    courses = asyncio.run(extract_and_parse_subjects(write_json=True, shard=shard, incremental=incremental))
     logger.info(f"✓ Stage 2 complete ({len(courses)} subjects)")
     return courses
 
 
-def run_programs_with_sections() -> dict:
+def run_programs_with_sections(shard: Optional[ShardSpec] = None, incremental: bool = False) -> list:
     """
     Stage 4: Extract, parse, and clean programs with sections. --> not a full clean 
     """
-    logger.info("→ Stage 4: programs_with_sections")
+    logger.info(f"→ Stage 4: programs_with_sections{f' (shard {shard})' if shard else ''}")
     from .programs_with_sections import extract_and_parse_programs
-    sections = asyncio.run(extract_and_parse_programs(write_json=True))
+    sections = asyncio.run(extract_and_parse_programs(write_json=True, shard=shard, incremental=incremental))
     logger.info(f"✓ Stage 4 complete ({len(sections)} programs)")
     return sections
 
 
-def main() -> dict:
+def run_sections_only() -> dict:
+    """
+    Sections-only refresh: seats, sections and meetings for already-known
+    courses, stored as a delta against the previous poll.
+    """
+    logger.info("→ Sections-only refresh")
+    from .section_refresh import refresh_sections
+    snapshot = asyncio.run(refresh_sections(write_json=True))
+    logger.info(f"✓ Sections refresh complete ({len(snapshot)} courses)")
+    return snapshot
+
+
+def run_catalogs() -> None:
+    """
+    Phase A only: Stages 1 and 3. Run once before fanning shards out, then ship
+    the two catalog files to every worker so they all partition the same lists.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future1 = executor.submit(run_course_catalog)
+        future3 = executor.submit(run_program_catalog)
+        future1.result()
+        future3.result()
+
+
+def run_shard(shard: ShardSpec) -> dict:
+    """
+    Phase B for one shard: Stages 2 and 4 over this shard's slice of the
+    existing catalogs. Writes shard artifacts only.
+    """
+    logger.info(f"Running detail stages for shard {shard}...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future2 = executor.submit(run_subjects_with_courses, shard)
+        future4 = executor.submit(run_programs_with_sections, shard)
+        return {
+            'subjects_with_courses': future2.result(),
+            'programs_with_sections': future4.result()
+        }
+
+
+def merge_shards(shard_count: int) -> dict:
+    """
+    Merge N shard artifacts into the same outputs (and payload) as `main()`.
+    """
+    from .subjects_with_courses import merge_subjects
+    from .programs_with_sections import merge_programs
+    logger.info(f"Merging {shard_count} shards...")
+    return {
+        'subjects_with_courses': merge_subjects(shard_count),
+        'programs_with_sections': merge_programs(shard_count)
+    }
+
+
+def main(incremental: bool = False) -> dict:
     """
     Orchestrates all four ETL stages in parallel and returns the
-    final data payloads for the connector.
+    final data payloads for the connector. With incremental=True the
+    detail stages only scrape what the crawl planner flags as changed.
     """
     logger.info("Starting all four stages in parallel...")
     with ThreadPoolExecutor(max_workers=4) as executor:
@@ -70,8 +127,8 @@ def main() -> dict:
         future3.result()
 
         logger.info("Catalog stages complete. Starting detail stages...")
-        future2 = executor.submit(run_subjects_with_courses)
-        future4 = executor.submit(run_programs_with_sections)
+        future2 = executor.submit(run_subjects_with_courses, None, incremental)
+        future4 = executor.submit(run_programs_with_sections, None, incremental)
 
         # Get the final results from the detail stages
         subjects_with_courses = future2.result()
@@ -86,4 +143,27 @@ def main() -> dict:
     }
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the UoG extract stages.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--catalogs', action='store_true',
+                       help="Run only the catalog stages (1 and 3)")
+    group.add_argument('--shard', type=ShardSpec.parse, metavar='i/N',
+                       help="Run detail stages (2 and 4) for shard i of N")
+    group.add_argument('--merge', type=int, metavar='N',
+                       help="Merge N shard artifacts into the final outputs")
+    group.add_argument('--sections-only', action='store_true',
+                       help="Refresh sections/seats for known courses and store a delta")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Probe first and only scrape changed subjects/programs")
+    args = parser.parse_args()
+
+    if args.catalogs:
+        run_catalogs()
+    elif args.shard:
+        run_shard(args.shard)
+    elif args.merge:
+        merge_shards(args.merge)
+    elif args.sections_only:
+        run_sections_only()
+    else:
+        main(incremental=args.incremental)
\ No newline at end of file
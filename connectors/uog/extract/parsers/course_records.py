@@ -0,0 +1,131 @@
+"""
+course_records.py
+
+Compact record types for the source-clean course / section / meeting shape
+produced by `subjects_with_courses_parser`.
+
+A cleaned catalog held as dicts pays for a hash table per course, section and
+meeting, and keeps a separate copy of every repeated value (instructors,
+locations, 'TBD', date ranges, department names...). These records use
+`__slots__` and intern their low-cardinality string fields, so each distinct
+value is stored once however many meetings share it.
+
+Records are read-only `Mapping`s over the same keys as the cleaned dicts, so code
+written against `course['code']` / `course.get('sections')` keeps working;
+`as_dict()` returns plain dicts for JSON output.
+"""
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from .subjects_with_courses_parser import iter_raw_subjects, clean_course
+
+_intern = sys.intern
+
+
+class _RecordView(Mapping):
+    """Dict view over a slotted dataclass's fields."""
+    __slots__ = ()
+    _keys: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+@dataclass(slots=True, frozen=True, eq=True)
+class MeetingRecord(_RecordView):
+    day_time: str
+    dates: str
+    location: str
+    instructor: str
+
+    @classmethod
+    def from_dict(cls, m: Dict[str, Any]) -> 'MeetingRecord':
+        return cls(_intern(m['day_time']), _intern(m['dates']),
+                   _intern(m['location']), _intern(m['instructor']))
+
+    def as_dict(self) -> Dict[str, str]:
+        return {'day_time': self.day_time, 'dates': self.dates,
+                'location': self.location, 'instructor': self.instructor}
+
+
+@dataclass(slots=True, frozen=True, eq=True)
+class SectionRecord(_RecordView):
+    section_code: str
+    section_name: str
+    seats: str
+    meetings: Tuple[MeetingRecord, ...]
+
+    @classmethod
+    def from_dict(cls, s: Dict[str, Any]) -> 'SectionRecord':
+        return cls(s['section_code'], _intern(s['section_name']), s['seats'],
+                   tuple(MeetingRecord.from_dict(m) for m in s['meetings']))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'section_code': self.section_code, 'section_name': self.section_name,
+                'seats': self.seats, 'meetings': [m.as_dict() for m in self.meetings]}
+
+
+@dataclass(slots=True, frozen=True, eq=True)
+class CourseRecord(_RecordView):
+    code: str
+    name: str
+    credits: str
+    description: str
+    offerings: str
+    restrictions: str
+    departments: str
+    requisites: str
+    location: str
+    offered: str
+    sections: Tuple[SectionRecord, ...]
+
+    @classmethod
+    def from_dict(cls, c: Dict[str, Any]) -> 'CourseRecord':
+        """Build from a cleaned course dict (see `clean_course`)."""
+        return cls(
+            code=c['code'],
+            name=_intern(c['name']),
+            credits=_intern(c['credits']),
+            description=c['description'],
+            offerings=_intern(c['offerings']),
+            restrictions=_intern(c['restrictions']),
+            departments=_intern(c['departments']),
+            requisites=_intern(c['requisites']),
+            location=_intern(c['location']),
+            offered=_intern(c['offered']),
+            sections=tuple(SectionRecord.from_dict(s) for s in c['sections'])
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = {key: getattr(self, key) for key in self._keys}
+        d['sections'] = [s.as_dict() for s in self.sections]
+        return d
+
+
+for _cls in (MeetingRecord, SectionRecord, CourseRecord):
+    _cls._keys = tuple(f.name for f in fields(_cls))
+
+
+def load_course_records(path: Union[str, Path]) -> Dict[str, List[CourseRecord]]:
+    """Stream a subjects_with_courses file into subject -> CourseRecord lists."""
+    records: Dict[str, List[CourseRecord]] = {}
+    for subj_code, courses in iter_raw_subjects(path):
+        valid = (clean_course(c) for c in courses)
+        records[subj_code] = [CourseRecord.from_dict(course) for course in valid if course is not None]
+    return records
+
+
+def records_as_dict(records: Dict[str, List[CourseRecord]]) -> Dict[str, List[dict]]:
+    """Plain-dict form of `load_course_records`, identical to `load_subjects_with_courses`."""
+    return {subj: [c.as_dict() for c in courses] for subj, courses in records.items()}
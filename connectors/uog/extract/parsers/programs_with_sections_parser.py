@@ -2,15 +2,31 @@
 programs_with_sections_parser.py
 
 Cleans and normalizes the raw programs_with_sections data into nested sections.
+
+Each list-shaped calendar section is consumed in a single pass by a small state
+machine. Every line is normalized once and handed to the handler for the
+current state (looked up in `_HANDLERS`); a handler returns the next state and
+whether it consumed the line, so a line that ends one block is re-dispatched to
+the next without re-scanning. All patterns are compiled at import time.
+
+States, in the order a calendar section is laid out:
+
+    START         optional "<X> Requirements (<type>)" header
+    DESCRIPTION   the line after the header
+    SEEK_SUMMARY  skip to "Credit Summary"
+    TOTAL         "(N Total Credits)"
+    BREAKDOWN     "<label> <credits>" lines up to "Course List"
+    TABLE_HEAD    "Course List" / "Code ..." header rows
+    SEQUENCE      terms, course lines, numeric electives, "Select ..." and notes
 """
 import re
-from typing import List, Dict, Any, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Helpers
 def normalize_text(text: Any) -> str:
     if not isinstance(text, str): return ''
-    clean = text.replace("\u200b", "").strip()
-    return re.sub(r"\s+", " ", clean)
+    # str.split() with no separator splits on the same Unicode whitespace as \s
+    return ' '.join(text.replace("\u200b", "").split())
 
 # Regex to match course lines: CODE*#### Title Credits
 COURSE_LINE_RE = re.compile(
@@ -23,109 +39,186 @@ NUM_ELECTIVE_RE = re.compile(
 
 SECTION_HEADERS_RE = re.compile(r"^(?P<section>.+?) Requirements(?: \((?P<type>.+)\))?$")
 TOTAL_CRED_RE = re.compile(r"^\((?P<total>[0-9]+(?:\.[0-9]+)?) Total Credits\)$")
+CREDIT_VALUE_RE = re.compile(r"^[0-9]+(?:\.[0-9]+)?$")
+
+TERM_PREFIXES = ('Semester', 'Year')
+
+# Parser states
+START, DESCRIPTION, SEEK_SUMMARY, TOTAL, BREAKDOWN, TABLE_HEAD, SEQUENCE = range(7)
+
+
+class _SectionAccumulator:
+    """Mutable parse state for one calendar section."""
+    __slots__ = ('requirements', 'total', 'breakdown', 'seq', 'current', 'notes', 'electives')
+
+    def __init__(self):
+        self.requirements: Optional[Dict[str, str]] = None
+        self.total: Optional[float] = None
+        self.breakdown: Dict[str, float] = {}
+        self.seq: Dict[str, List[Any]] = {}
+        self.current: Optional[str] = None
+        self.notes: List[str] = []
+        self.electives: List[str] = []
+
+    def result(self) -> Dict[str, Any]:
+        sect: Dict[str, Any] = {}
+        if self.requirements is not None:
+            sect['requirements'] = self.requirements
+        if self.total is not None or self.breakdown:
+            sect['credit_summary'] = {'total_credits': self.total, 'breakdown': self.breakdown}
+        if self.seq: sect['program_sequence'] = self.seq
+        if self.electives: sect['elective_options'] = self.electives
+        if self.notes: sect['notes'] = self.notes
+        return sect
+
+
+# Each handler returns (next_state, consumed). An unconsumed line is
+# re-dispatched to the next state's handler.
+Handler = Callable[[_SectionAccumulator, str], Tuple[int, bool]]
+
+
+def _on_start(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    m = SECTION_HEADERS_RE.match(ln)
+    if not m:
+        return SEEK_SUMMARY, False
+    acc.requirements = {
+        'title': normalize_text(m.group('section')),
+        'type': normalize_text(m.group('type') or ''),
+        'description': ''
+    }
+    return DESCRIPTION, True
+
+
+def _on_description(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    acc.requirements['description'] = ln
+    return SEEK_SUMMARY, True
+
+
+def _on_seek_summary(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    return (TOTAL if ln == 'Credit Summary' else SEEK_SUMMARY), True
+
+
+def _on_total(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    m = TOTAL_CRED_RE.match(ln)
+    if not m:
+        return TABLE_HEAD, False
+    acc.total = float(m.group('total'))
+    return BREAKDOWN, True
+
+
+def _on_breakdown(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    if ln == 'Course List':
+        return TABLE_HEAD, False
+    parts = ln.rsplit(' ', 1)
+    if len(parts) == 2 and CREDIT_VALUE_RE.match(parts[1]):
+        acc.breakdown[parts[0]] = float(parts[1])
+    return BREAKDOWN, True
+
+
+def _on_table_head(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    if ln == 'Course List' or ln.startswith('Code'):
+        return TABLE_HEAD, True
+    return SEQUENCE, False
+
+
+def _on_sequence(acc: _SectionAccumulator, ln: str) -> Tuple[int, bool]:
+    if ln.startswith(TERM_PREFIXES):
+        acc.current = ln
+        acc.seq[ln] = []
+        return SEQUENCE, True
+    if acc.current:
+        cm = COURSE_LINE_RE.match(ln)
+        if cm:
+            acc.seq[acc.current].append({
+                'course_code': cm.group('code'),
+                'title': cm.group('title'),
+                'credits': float(cm.group('credits'))
+            })
+            return SEQUENCE, True
+        ne = NUM_ELECTIVE_RE.match(ln)
+        if ne:
+            acc.seq[acc.current].append({
+                'title': ne.group('title'),
+                'credits': float(ne.group('credits'))
+            })
+            return SEQUENCE, True
+    if ln.startswith('Select'):
+        acc.electives.append(ln)
+    else:
+        acc.notes.append(ln)
+    return SEQUENCE, True
+
+
+_HANDLERS: Dict[int, Handler] = {
+    START: _on_start,
+    DESCRIPTION: _on_description,
+    SEEK_SUMMARY: _on_seek_summary,
+    TOTAL: _on_total,
+    BREAKDOWN: _on_breakdown,
+    TABLE_HEAD: _on_table_head,
+    SEQUENCE: _on_sequence,
+}
+
+
+def iter_normalized_lines(lines: Iterable[Any]) -> Iterator[str]:
+    """Normalize each raw line once, dropping empties."""
+    for raw in lines:
+        ln = normalize_text(raw)
+        if ln:
+            yield ln
+
+
+def parse_section_lines(lines: Iterable[Any]) -> Dict[str, Any]:
+    """Parse one list-shaped calendar section (Major, Minor, Co-op, ...)."""
+    acc = _SectionAccumulator()
+    state = START
+    for ln in iter_normalized_lines(lines):
+        consumed = False
+        while not consumed:
+            state, consumed = _HANDLERS[state](acc, ln)
+    return acc.result()
+
+
+def parse_overview(content: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Clean the Overview tab's paragraphs and collapsible groups."""
+    paras = list(iter_normalized_lines(content.get('paragraphs', [])))
+    coll = []
+    for grp in content.get('collapsibles', []):
+        hdr = normalize_text(grp.get('header'))
+        txt = '\n'.join(iter_normalized_lines(grp.get('content', '').splitlines()))
+        if hdr and txt: coll.append({'header': hdr, 'content': txt})
+    if paras or coll:
+        return {'paragraphs': paras, 'collapsibles': coll}
+    return None
+
+
+def parse_program(prog: Dict[str, Any]) -> Dict[str, Any]:
+    """Clean a single raw program and its calendar sections."""
+    sections: Dict[str, Any] = {}
+    for sec_name, content in (prog.get('sections', {}) or {}).items():
+        if content is None: continue
+        if sec_name == 'Overview' and isinstance(content, dict):
+            overview = parse_overview(content)
+            if overview:
+                sections['Overview'] = overview
+        elif isinstance(content, list):
+            sect = parse_section_lines(content)
+            if sect:
+                sections[sec_name] = sect
+
+    return {
+        'name': normalize_text(prog.get('name')),
+        'degree': normalize_text(prog.get('degree')),
+        'calendar_url': normalize_text(prog.get('calendar_url')),
+        'sections': sections
+    }
+
+
+def iter_programs_with_sections(raw: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Generator form of `parse_programs_with_sections`: yields one cleaned program at a time."""
+    for prog in raw:
+        yield parse_program(prog)
 
 
 def parse_programs_with_sections(raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    cleaned: List[Dict[str, Any]] = []
-
-    for prog in raw:
-        name = normalize_text(prog.get('name'))
-        degree = normalize_text(prog.get('degree'))
-        url = normalize_text(prog.get('calendar_url'))
-        sections_raw = prog.get('sections', {}) or {}
-
-        sections: Dict[str, Any] = {}
-        for sec_name, content in sections_raw.items():
-            if content is None: continue
-            # Overview unchanged
-            if sec_name == 'Overview' and isinstance(content, dict):
-                paras = [normalize_text(p) for p in content.get('paragraphs', []) if normalize_text(p)]
-                coll = []
-                for grp in content.get('collapsibles', []):
-                    hdr = normalize_text(grp.get('header'))
-                    txt = '\n'.join(
-                        normalize_text(ln) for ln in grp.get('content','').splitlines() if normalize_text(ln)
-                    )
-                    if hdr and txt: coll.append({'header': hdr, 'content': txt})
-                if paras or coll:
-                    sections['Overview'] = {'paragraphs': paras, 'collapsibles': coll}
-                continue
-
-            if isinstance(content, list):
-                lines = [normalize_text(ln) for ln in content if normalize_text(ln)]
-                idx, n = 0, len(lines)
-                sect: Dict[str, Any] = {}
-
-                # Requirements block
-                m = SECTION_HEADERS_RE.match(lines[idx])
-                if m:
-                    sect['requirements'] = {
-                        'title': normalize_text(m.group('section')),
-                        'type': normalize_text(m.group('type') or ''),
-                        'description': normalize_text(lines[idx+1]) if idx+1<n else ''
-                    }
-                    idx += 2
-
-                # Credit summary
-                while idx<n and lines[idx] != 'Credit Summary': idx+=1
-                if idx<n and lines[idx]=='Credit Summary': idx+=1
-                total, breakdown = None, {}
-                if idx<n:
-                    m2 = TOTAL_CRED_RE.match(lines[idx])
-                    if m2:
-                        total = float(m2.group('total'))
-                        idx+=1
-                        while idx<n and lines[idx] != 'Course List':
-                            parts = lines[idx].rsplit(' ',1)
-                            if len(parts)==2 and re.match(r'^[0-9]+(?:\.[0-9]+)?$', parts[1]):
-                                breakdown[parts[0]] = float(parts[1])
-                            idx+=1
-                if total is not None or breakdown:
-                    sect['credit_summary'] = {'total_credits': total, 'breakdown': breakdown}
-
-                # Skip to courses
-                while idx<n and (lines[idx]=='Course List' or lines[idx].startswith('Code')): idx+=1
-
-                # Sequence parsing
-                seq: Dict[str, List[Any]] = {}
-                current = None
-                notes: List[str] = []
-                electives: List[str] = []
-                while idx<n:
-                    ln = lines[idx]
-                    if ln.startswith('Semester') or ln.startswith('Year'):
-                        current = ln
-                        seq[current] = []
-                    else:
-                        cm = COURSE_LINE_RE.match(ln)
-                        if cm and current:
-                            entry = {
-                                'course_code': cm.group('code'),
-                                'title': cm.group('title'),
-                                'credits': float(cm.group('credits'))
-                            }
-                            seq[current].append(entry)
-                        else:
-                            ne = NUM_ELECTIVE_RE.match(ln)
-                            if ne and current:
-                                entry = {
-                                    'title': ne.group('title'),
-                                    'credits': float(ne.group('credits'))
-                                }
-                                seq[current].append(entry)
-                            elif ln.startswith('Select'):
-                                electives.append(ln)
-                            else:
-                                notes.append(ln)
-                    idx+=1
-
-                if seq: sect['program_sequence'] = seq
-                if electives: sect['elective_options'] = electives
-                if notes: sect['notes'] = notes
-
-                if sect:
-                    sections[sec_name] = sect
-
-        cleaned.append({'name': name, 'degree': degree, 'calendar_url': url, 'sections': sections})
-
-    return cleaned
+    return list(iter_programs_with_sections(raw))
@@ -2,8 +2,115 @@
 subjects_with_courses_parser.py
 
 Cleans and normalizes the raw subjects_with_courses data.
+
+The artifact is a single JSON object mapping subject code -> list of courses.
+Besides the in-memory `parse_subjects_with_courses`, the file can be streamed:
+`iter_raw_subjects` decodes it incrementally, one course object at a time (via
+`core.artifacts.iter_object_arrays`), so memory stays flat regardless of
+catalog size, and `load_subjects_with_courses` builds the cleaned dict from
+that stream only when a caller actually needs the whole mapping.
 """
-from typing import Dict, List, Any
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
+
+from core.artifacts import iter_object_arrays
+
+
+def iter_raw_subjects(path: Union[str, Path]) -> Iterator[Tuple[str, Iterator[dict]]]:
+    """
+    Stream a subjects_with_courses file as (subject code, course iterator)
+    pairs, in file order. Each course iterator must be consumed (or is skipped)
+    before the next subject is read; subjects with no courses are still yielded.
+    """
+    return iter_object_arrays(path)
+
+
+def iter_raw_courses(path: Union[str, Path]) -> Iterator[Tuple[str, dict]]:
+    """Flat stream of (subject code, raw course) records."""
+    for subj_code, courses in iter_raw_subjects(path):
+        for c in courses:
+            yield subj_code, c
+
+
+def clean_sections(raw_secs: Optional[List[dict]]) -> List[dict]:
+    """
+    Strip whitespace from a course's raw sections and drop meetings that have
+    no day/time. Shared by the full clean and the sections-only refresh.
+    """
+    sections: List[dict] = []
+    for sec in raw_secs or []:
+        sec_code = (sec.get('section_code') or '').strip()
+        sec_name = (sec.get('section_name') or '').strip()
+        seats    = (sec.get('seats') or '').strip()
+        # Build cleaned meetings list
+        meetings: List[dict] = []
+        for m in sec.get('meetings') or []:
+            day_time = (m.get('day_time') or '').strip()
+            dates    = (m.get('dates') or '').strip()
+            location = (m.get('location') or '').strip()
+            instr    = (m.get('instructor') or '').strip()
+            # Only include if there's at least a day/time
+            if day_time:
+                meetings.append({
+                    'day_time': day_time,
+                    'dates': dates,
+                    'location': location,
+                    'instructor': instr
+                })
+        sections.append({
+            'section_code': sec_code,
+            'section_name': sec_name,
+            'seats': seats,
+            'meetings': meetings
+        })
+    return sections
+
+
+def clean_course(c: dict) -> Optional[dict]:
+    """
+    Clean one raw course entry, or return None if it is missing its code or name.
+    """
+    # Required fields
+    code = c.get('code', '') or ''
+    name = c.get('name', '') or ''
+    if not code.strip() or not name.strip():
+        return None
+
+    # Base course shape
+    course = {
+        'code': code.strip(),
+        'name': name.strip(),
+        'credits': (c.get('credits') or '').strip(),
+        'description': (c.get('description') or '').strip(),
+        'offerings': (c.get('offerings') or '').strip(),
+        'restrictions': (c.get('restrictions') or '').strip(),
+        'departments': (c.get('departments') or '').strip(),
+        'requisites': (c.get('requisites') or '').strip(),
+        'location': (c.get('location') or '').strip(),
+        'offered': (c.get('offered') or '').strip(),
+        'sections': []
+    }
+
+    # Clean sections
+    course['sections'] = clean_sections(c.get('sections'))
+    return course
+
+
+def iter_subject_courses(path: Union[str, Path]) -> Iterator[Tuple[str, dict]]:
+    """Stream cleaned (subject code, course) records from a subjects_with_courses file."""
+    for subj_code, c in iter_raw_courses(path):
+        course = clean_course(c)
+        if course is not None:
+            yield subj_code, course
+
+
+def load_subjects_with_courses(path: Union[str, Path]) -> Dict[str, List[dict]]:
+    """Build the cleaned subject -> courses mapping from a file, reading it as a stream."""
+    cleaned: Dict[str, List[dict]] = {}
+    for subj_code, courses in iter_raw_subjects(path):
+        valid = (clean_course(c) for c in courses)
+        cleaned[subj_code] = [course for course in valid if course is not None]
+    return cleaned
 
 
 def parse_subjects_with_courses(raw: Dict[str, List[dict]]) -> Dict[str, List[dict]]:
@@ -19,59 +126,7 @@ def parse_subjects_with_courses(raw: Dict[str, List[dict]]) -> Dict[str, List[di
     cleaned: Dict[str, List[dict]] = {}
 
     for subj_code, courses in raw.items():
-        valid_courses: List[dict] = []
-        for c in courses:
-            # Required fields
-            code = c.get('code', '') or ''
-            name = c.get('name', '') or ''
-            if not code.strip() or not name.strip():
-                continue
-
-            # Base course shape
-            course = {
-                'code': code.strip(),
-                'name': name.strip(),
-                'credits': (c.get('credits') or '').strip(),
-                'description': (c.get('description') or '').strip(),
-                'offerings': (c.get('offerings') or '').strip(),
-                'restrictions': (c.get('restrictions') or '').strip(),
-                'departments': (c.get('departments') or '').strip(),
-                'requisites': (c.get('requisites') or '').strip(),
-                'location': (c.get('location') or '').strip(),
-                'offered': (c.get('offered') or '').strip(),
-                'sections': []
-            }
-
-            # Clean sections
-            raw_secs = c.get('sections') or []
-            for sec in raw_secs:
-                sec_code = (sec.get('section_code') or '').strip()
-                sec_name = (sec.get('section_name') or '').strip()
-                seats    = (sec.get('seats') or '').strip()
-                # Build cleaned meetings list
-                meetings: List[dict] = []
-                for m in sec.get('meetings') or []:
-                    day_time = (m.get('day_time') or '').strip()
-                    dates    = (m.get('dates') or '').strip()
-                    location = (m.get('location') or '').strip()
-                    instr    = (m.get('instructor') or '').strip()
-                    # Only include if there's at least a day/time
-                    if day_time:
-                        meetings.append({
-                            'day_time': day_time,
-                            'dates': dates,
-                            'location': location,
-                            'instructor': instr
-                        })
-                course['sections'].append({
-                    'section_code': sec_code,
-                    'section_name': sec_name,
-                    'seats': seats,
-                    'meetings': meetings
-                })
-
-            valid_courses.append(course)
-
-        cleaned[subj_code] = valid_courses
+        valid = (clean_course(c) for c in courses)
+        cleaned[subj_code] = [course for course in valid if course is not None]
 
     return cleaned
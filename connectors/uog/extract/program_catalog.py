@@ -2,10 +2,10 @@
 # program_catalog.py
 
 import asyncio
-import json
 import logging
 from pathlib import Path
 
+from core.artifacts import write_artifact
 from .scrapper_modules.scrape_program_list import scrape_program_list
 
 # Configure logging to match other project files
@@ -35,12 +35,10 @@ async def extract_and_parse_program_catalog(write_json: bool = True) -> list:
     if write_json:
         base_dir = Path(__file__).resolve().parent
         output_dir = base_dir / "data" / "programs"
-        output_dir.mkdir(parents=True, exist_ok=True)
         output_file = output_dir / "program_catalog.json"
 
         logger.info(f"Stage 3: Writing {len(programs)} programs to {output_file}")
-        with output_file.open("w", encoding="utf-8") as f:
-            json.dump(programs, f, ensure_ascii=False, indent=2)
+        write_artifact(output_file, programs)
 
     return programs
 
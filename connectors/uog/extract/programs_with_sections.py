@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
-# subjects_with_courses.py
+# programs_with_sections.py
 
 import asyncio
-import json
 import logging
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-from .scrapper_modules.scrape_subjects_list import load_courses
-from .parsers.subjects_with_courses_parser import parse_subjects_with_courses
+from playwright.async_api import async_playwright
 
-# Max concurrent threads for scraping courses
-MAX_WORKERS = 5
+from core.artifacts import read_artifact, write_artifact
+from .scrapper_modules.browser_pool import RecyclingBrowser, MAX_PAGES_PER_BROWSER, MAX_BROWSER_RSS_MB
+from .scrapper_modules.scrape_program_calendar import scrape_program
+from .parsers.programs_with_sections_parser import parse_programs_with_sections
+from .sharding import ShardSpec, catalog_digest, merge_program_shards, program_key, select_shard, write_shard
+from .crawl_planner import load_state, plan_programs, program_id, record_programs, save_state
+
+# Max concurrent program pages
+MAX_CONCURRENT = 5
 
 # Configure logging
 logging.basicConfig(
@@ -21,72 +26,120 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def extract_and_parse_programs(write_json: bool = True) -> dict:
-    """
-    Stage 2: Scrape subjects and courses, dump raw + cleaned JSON, and return cleaned data.
+BASE_DIR = Path(__file__).resolve().parent
+CATALOG_FILE = BASE_DIR / 'data' / 'programs' / 'program_catalog.json'
+RAW_FILE = BASE_DIR / 'data' / 'programs' / 'programs_with_sections_raw.json'
 
-    Args:
-        write_json (bool): Whether to write raw and cleaned JSON outputs to disk.
-    Returns:
-        dict: Mapping subject codes to course lists (cleaned schema).
-    """
-    # 1) Load the subject catalog
-    base_dir = Path(__file__).resolve().parent
-    catalog_file = base_dir / 'data' / 'course_catalog' / 'course_catalog.json'
-    if not catalog_file.exists():
-        logger.error(f"Subject catalog not found at {catalog_file}")
-        raise FileNotFoundError(f"Missing catalog: {catalog_file}")
-
-    logger.info(f"Stage 2: Loading subject catalog from {catalog_file}")
-    subjects = json.loads(catalog_file.read_text(encoding='utf-8'))
-
-    # 2) Scrape courses concurrently
-    logger.info(f"Stage 2: Scraping {len(subjects)} subjects with {MAX_WORKERS} workers…")
-    loop = asyncio.get_running_loop()
-    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-
-    async def fetch_subj(code: str, text: str):
-        try:
-            courses = await loop.run_in_executor(executor, load_courses, text)
-            logger.info(f"  [{code}] Retrieved {len(courses)} courses")
-        except Exception as e:
-            logger.error(f"  [{code}] Error: {e}")
-            courses = []
-        return code, courses
-
-    tasks = [fetch_subj(s['code'], s['text']) for s in subjects]
-    pairs = await asyncio.gather(*tasks)
-    executor.shutdown(wait=False)
-    results = {code: courses for code, courses in pairs}
 
+def load_program_catalog() -> List[dict]:
+    """Load the Stage 3 program catalog."""
+    if not CATALOG_FILE.exists():
+        logger.error(f"Program catalog not found at {CATALOG_FILE}")
+        raise FileNotFoundError(f"Missing catalog: {CATALOG_FILE}")
+    logger.info(f"Stage 4: Loading program catalog from {CATALOG_FILE}")
+    return read_artifact(CATALOG_FILE)
+
+
+async def scrape_programs(programs: List[dict],
+                          max_pages_per_browser: int = MAX_PAGES_PER_BROWSER,
+                          max_browser_rss_mb: float = MAX_BROWSER_RSS_MB) -> List[dict]:
+    """Scrape program calendars concurrently on a recycling browser, in input order."""
+    logger.info(f"Stage 4: Scraping {len(programs)} programs with {MAX_CONCURRENT} concurrent pages…")
+    async with async_playwright() as pw:
+        async with RecyclingBrowser(pw, max_pages=max_pages_per_browser,
+                                    max_rss_mb=max_browser_rss_mb, headless=True) as browser:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+            tasks = [scrape_program(p, browser, semaphore) for p in programs]
+            return list(await asyncio.gather(*tasks))
+
+
+def save_program_outputs(results: List[dict], write_json: bool = True) -> list:
+    """Write the raw intermediate, clean it, write the cleaned output and return it."""
     # 3) Write raw intermediate output
     if write_json:
-        raw_dir = base_dir / 'data' / 'course_catalog'
-        raw_dir.mkdir(parents=True, exist_ok=True)
-        raw_file = raw_dir / 'subjects_with_courses_raw.json'
-        raw_file.write_text(
-            json.dumps(results, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
-        logger.info(f"Stage 2: Saved raw courses to {raw_file}")
+        write_artifact(RAW_FILE, results)
+        logger.info(f"Stage 4: Saved raw programs to {RAW_FILE}")
 
     # 4) Clean & normalize
-    logger.info("Stage 2: Cleaning and normalizing course data…")
-    cleaned = parse_subjects_with_courses(results)
+    logger.info("Stage 4: Cleaning and normalizing program sections…")
+    cleaned = parse_programs_with_sections(results)
 
     # 5) Write cleaned output to connectors/uog/raw
     if write_json:
-        cleaned_dir = base_dir.parent / 'raw'
-        cleaned_dir.mkdir(parents=True, exist_ok=True)
-        clean_file = cleaned_dir / 'subjects_with_courses.json'
-        clean_file.write_text(
-            json.dumps(cleaned, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
-        logger.info(f"Stage 2: Saved cleaned courses to {clean_file}")
+        clean_file = BASE_DIR.parent / 'raw' / 'programs_with_sections.json'
+        write_artifact(clean_file, cleaned)
+        logger.info(f"Stage 4: Saved cleaned programs to {clean_file}")
 
     return cleaned
 
+
+async def extract_and_parse_programs(write_json: bool = True,
+                                     shard: Optional[ShardSpec] = None,
+                                     incremental: bool = False,
+                                     max_pages_per_browser: int = MAX_PAGES_PER_BROWSER,
+                                     max_browser_rss_mb: float = MAX_BROWSER_RSS_MB) -> list:
+    """
+    Stage 4: Scrape calendar sections for every program, dump raw + cleaned JSON,
+    and return cleaned data.
+
+    Args:
+        write_json (bool): Whether to write raw and cleaned JSON outputs to disk.
+        shard (ShardSpec): Only scrape this shard's programs and write its shard
+            artifact; run `merge_programs` once every shard has finished.
+        incremental (bool): Probe calendars first and only scrape programs the
+            crawl planner flags as changed; reuse previous raw results for the rest.
+        max_pages_per_browser (int): Recycle Chromium after this many pages.
+        max_browser_rss_mb (float): Recycle Chromium above this resident size.
+    Returns:
+        list: Cleaned programs with nested sections.
+    """
+    if shard is not None and incremental:
+        raise ValueError("Incremental planning is not supported for sharded runs")
+
+    # 1) Load the program catalog
+    programs = load_program_catalog()
+
+    if incremental:
+        previous_list = read_artifact(RAW_FILE) if RAW_FILE.exists() else []
+        previous = {program_id(p): p for p in previous_list}
+        state = load_state()
+        plan = plan_programs(programs, previous, state)
+        fetched = await scrape_programs(plan.fetch, max_pages_per_browser, max_browser_rss_mb) if plan.fetch else []
+        by_id = {program_id(p): p for p in fetched}
+        results = []
+        for prog in programs:
+            pid = program_id(prog)
+            result = by_id.get(pid)
+            # A failed re-scrape keeps the previous good result
+            if result is None or (result.get('calendar_error') and pid in previous):
+                result = previous[pid]
+            results.append(result)
+        if write_json:
+            record_programs(state, fetched)
+            save_state(state)
+        return save_program_outputs(results, write_json)
+
+    # 2) Scrape program calendars
+    if shard is not None:
+        owned = select_shard(programs, shard, program_key)
+        logger.info(f"Stage 4: shard {shard} owns {len(owned)} of {len(programs)} programs")
+        results = await scrape_programs(owned, max_pages_per_browser, max_browser_rss_mb)
+        if write_json:
+            write_shard('programs', 'programs_with_sections_raw', shard,
+                        catalog_digest(programs, program_key), results)
+        return parse_programs_with_sections(results)
+
+    results = await scrape_programs(programs, max_pages_per_browser, max_browser_rss_mb)
+    return save_program_outputs(results, write_json)
+
+
+def merge_programs(shard_count: int, write_json: bool = True) -> list:
+    """Merge Stage 4 shard artifacts into the same outputs a single-process run writes."""
+    programs = load_program_catalog()
+    results = merge_program_shards(programs, shard_count)
+    return save_program_outputs(results, write_json)
+
+
 if __name__ == '__main__':
     # Run with JSON output
     asyncio.run(extract_and_parse_programs(write_json=True))
@@ -0,0 +1,214 @@
+"""
+browser_pool.py
+
+Recycling wrapper around a shared Playwright Chromium browser for long crawls.
+
+`scrape_program` and `fetch_calendar` open a fresh context per item on one
+shared Browser, so Chromium's resident memory grows for the whole crawl.
+`RecyclingBrowser` exposes the same `new_context()` / `close()` surface as a
+Browser, counts the pages opened through it and swaps in a fresh Chromium once
+a page or memory ceiling is crossed. The memory ceiling counts only the
+process tree of the pool's own current browser, so other Chromium instances
+in the same interpreter do not trigger a recycle. The retired browser is drained rather than
+killed: contexts already open on it finish normally and it is closed when the
+last one closes, so no queued or in-flight work is lost.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+try:
+    import psutil
+except ImportError:  # memory ceiling is disabled without psutil
+    psutil = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    datefmt="%H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+# Recycle a browser after this many pages have been opened on it
+MAX_PAGES_PER_BROWSER = 150
+# Recycle when the Chromium process tree exceeds this resident size (MB)
+MAX_BROWSER_RSS_MB = 1024
+
+
+def _child_pids() -> Set[int]:
+    """PIDs of every descendant of this interpreter (empty without psutil)."""
+    if psutil is None:
+        return set()
+    return {child.pid for child in psutil.Process().children(recursive=True)}
+
+
+def chromium_rss_mb(root_pids: Optional[Iterable[int]] = None) -> Optional[float]:
+    """
+    Resident memory (MB) of `root_pids` and all their descendants, e.g. the
+    processes one Chromium launch added. Without `root_pids`, every child
+    process of this interpreter, which is where Playwright's driver and all
+    Chromium processes live. Returns None when psutil is not installed.
+    """
+    if psutil is None:
+        return None
+    if root_pids is None:
+        processes = psutil.Process().children(recursive=True)
+    else:
+        processes = {}
+        for pid in root_pids:
+            try:
+                root = psutil.Process(pid)
+                for proc in [root] + root.children(recursive=True):
+                    processes[proc.pid] = proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        processes = processes.values()
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / (1024 * 1024)
+
+
+class _BrowserSlot:
+    """Bookkeeping for one launched Chromium instance."""
+
+    def __init__(self, browser, generation: int, pids: Set[int]):
+        self.browser = browser
+        self.generation = generation
+        # Processes this launch added; renderers it spawns later are their descendants
+        self.pids = pids
+        self.pages = 0
+        self.open_contexts = 0
+        self.retired = False
+
+
+class RecyclingBrowser:
+    """
+    Drop-in replacement for a shared `playwright.async_api.Browser`.
+
+    Args:
+        pw: The running async Playwright instance.
+        max_pages: Pages per browser before it is recycled (0 disables).
+        max_rss_mb: Resident memory ceiling in MB (0 disables).
+        **launch_kwargs: Passed through to `pw.chromium.launch`.
+    """
+
+    def __init__(self, pw, max_pages: int = MAX_PAGES_PER_BROWSER,
+                 max_rss_mb: float = MAX_BROWSER_RSS_MB, **launch_kwargs):
+        self._pw = pw
+        self._launch_kwargs = launch_kwargs
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._current: Optional[_BrowserSlot] = None
+        self._draining: List[_BrowserSlot] = []
+        self._lock = asyncio.Lock()
+        self._close_tasks: List[asyncio.Task] = []
+        self.launched = 0
+        self.recycled = 0
+        self.total_pages = 0
+
+        if max_rss_mb and psutil is None:
+            logger.warning("psutil not installed; browser memory ceiling disabled (page ceiling still applies)")
+
+    async def start(self) -> "RecyclingBrowser":
+        async with self._lock:
+            if self._current is None:
+                await self._launch()
+        return self
+
+    async def __aenter__(self) -> "RecyclingBrowser":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _launch(self) -> None:
+        before = _child_pids()
+        browser = await self._pw.chromium.launch(**self._launch_kwargs)
+        self.launched += 1
+        self._current = _BrowserSlot(browser, self.launched, _child_pids() - before)
+
+    def _recycle_reason(self, slot: _BrowserSlot) -> Optional[str]:
+        if self.max_pages and slot.pages >= self.max_pages:
+            return f"{slot.pages} pages opened"
+        # Only this browser's own process tree counts: other pools' browsers and
+        # retired ones still draining would otherwise recycle it on every context.
+        if self.max_rss_mb and slot.pids:
+            rss = chromium_rss_mb(slot.pids)
+            if rss is not None and rss >= self.max_rss_mb:
+                return f"resident memory {rss:.0f} MB"
+        return None
+
+    async def _retire(self, slot: _BrowserSlot, reason: str) -> None:
+        slot.retired = True
+        self.recycled += 1
+        logger.info(f"Recycling browser #{slot.generation} ({reason}); "
+                    f"{slot.open_contexts} context(s) still draining")
+        if slot.open_contexts == 0:
+            await slot.browser.close()
+        else:
+            self._draining.append(slot)
+        await self._launch()
+
+    def _on_page(self, slot: _BrowserSlot) -> None:
+        slot.pages += 1
+        self.total_pages += 1
+
+    def _on_context_close(self, slot: _BrowserSlot) -> None:
+        slot.open_contexts -= 1
+        if slot.retired and slot.open_contexts == 0 and slot in self._draining:
+            self._draining.remove(slot)
+            logger.info(f"Browser #{slot.generation} drained; closing it")
+            self._close_tasks.append(asyncio.ensure_future(slot.browser.close()))
+
+    async def new_context(self, **kwargs):
+        """
+        Open a context on the current browser, recycling it first if it has
+        crossed a ceiling. Returns a regular Playwright BrowserContext.
+        """
+        async with self._lock:
+            if self._current is None:
+                await self._launch()
+            reason = self._recycle_reason(self._current)
+            if reason:
+                await self._retire(self._current, reason)
+            slot = self._current
+            slot.open_contexts += 1
+
+        try:
+            context = await slot.browser.new_context(**kwargs)
+        except Exception:
+            slot.open_contexts -= 1
+            raise
+        context.on("page", lambda _page: self._on_page(slot))
+        context.on("close", lambda _ctx: self._on_context_close(slot))
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'browsers_launched': self.launched,
+            'browsers_recycled': self.recycled,
+            'pages_total': self.total_pages,
+            'pages_current': self._current.pages if self._current else 0,
+            'rss_mb': chromium_rss_mb(self._current.pids) if self._current else None,
+        }
+
+    async def close(self) -> None:
+        """Close the current browser, any still draining, and pending closes."""
+        async with self._lock:
+            slots = ([self._current] if self._current else []) + self._draining
+            self._current = None
+            self._draining = []
+        for slot in slots:
+            try:
+                await slot.browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser #{slot.generation}: {e}")
+        if self._close_tasks:
+            await asyncio.gather(*self._close_tasks, return_exceptions=True)
+            self._close_tasks = []
+        logger.info(f"Browser pool closed: {self.stats()}")
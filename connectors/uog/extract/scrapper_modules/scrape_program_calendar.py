@@ -26,7 +26,7 @@ async def scrape_program(program: dict, browser, semaphore) -> dict:
 
     Args:
         program: Dict containing at least 'name' and 'calendar_url'.
-        browser: A playwright.async_api.Browser instance.
+        browser: A playwright.async_api.Browser or a RecyclingBrowser.
         semaphore: asyncio.Semaphore for concurrency control.
 
     Returns:
@@ -125,5 +125,5 @@ async def scrape_program(program: dict, browser, semaphore) -> dict:
 
     return result
 
-# Note: the driver script programs_with_sections.py will import this function,
-# create the playwright context and Browser instance, and manage concurrency.
+# Note: the driver script programs_with_sections.py imports this function,
+# creates the playwright context and RecyclingBrowser, and manages concurrency.
@@ -4,6 +4,8 @@ import logging
 from urllib.parse import urljoin
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
+from .browser_pool import RecyclingBrowser
+
 # Configure logging
 token = "%(asctime)s %(levelname)-8s %(message)s"
 logging.basicConfig(level=logging.INFO, format=token, datefmt="%H:%M:%S")
@@ -49,7 +51,8 @@ async def scrape_program_list():
     Returns a list of dicts with 'name', 'degree', 'types', 'page_url', and 'calendar_url'.
     """
     async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=True)
+        # One context per tile; recycle Chromium so memory stays bounded
+        browser = await RecyclingBrowser(pw, headless=True).start()
 
         # 1) Load tiles and collect metadata
         ctx0 = await browser.new_context()
@@ -116,6 +116,109 @@ def parse_subjects(raw: list[dict]) -> list[dict]:
     return parsed
 
 
+def scrape_sections(li) -> list[dict]:
+    """
+    Expand a course result's section accordion and scrape every section's
+    code, title, seat counts and meeting rows.
+    """
+    sections = []
+    toggle = li.query_selector("button.esg-collapsible-group__toggle")
+    if toggle:
+        toggle.click()
+        li.wait_for_selector("li.search-nestedaccordionitem", timeout=10000)
+        secs = li.query_selector_all(
+            "li.search-nestedaccordionitem"
+        )
+        for sec in secs:
+            try:
+                # Section code
+                code_elem: ElementHandle | None = sec.query_selector(
+                    "a.search-sectiondetailslink"
+                )
+                if code_elem is None:
+                    # nothing to pull here—skip or set a default
+                    continue
+                sec_code = code_elem.inner_text().strip()
+                # Section name
+                name_elem: ElementHandle | None = sec.query_selector(
+                    "span[id^='section-title']"
+                )
+                if name_elem is None:
+                    sec_name = ""
+                else:
+                    sec_name = name_elem.inner_text().strip()
+                # Seats available
+                seats_elem: ElementHandle | None = sec.query_selector(
+                    "span.search-seatsavailabletext"
+                )
+                if seats_elem is None:
+                    seats = ""
+                else:
+                    seats = seats_elem.inner_text().strip()
+
+                times = []
+                for row in sec.query_selector_all(
+                    "tr.search-sectionrow"
+                ):
+                    dt_el = row.query_selector(
+                        "td.search-sectiondaystime"
+                    )
+                    day_time = dt_el.inner_text().strip() if dt_el else 'TBD'
+                    md_el = row.query_selector(
+                        "span[id*='meeting-dates']"
+                    )
+                    dates = md_el.inner_text().strip() if md_el else 'N/A'
+                    loc_el = row.query_selector(
+                        "td.search-sectionlocations"
+                    )
+                    loc    = loc_el.inner_text().strip() if loc_el else 'N/A'
+                    inst_el = row.query_selector(
+                        "td.search-sectioninstructormethods"
+                    )
+                    instr   = inst_el.inner_text().strip() if inst_el else 'N/A'
+                    times.append({
+                        'day_time': day_time,
+                        'dates':    dates,
+                        'location': loc,
+                        'instructor': instr
+                    })
+                sections.append({
+                    'section_code': sec_code,
+                    'section_name': sec_name,
+                    'seats':        seats,
+                    'meetings':     times
+                })
+            except Exception:
+                continue
+    return sections
+
+
+def open_subject_results(page, subject_text: str) -> list:
+    """
+    Navigate to the Courses page, click the subject link by exact text and
+    return the course result <li> handles (empty if the subject is missing).
+    """
+    base = "https://colleague-ss.uoguelph.ca/Student/Courses"
+    # logger.info(f"Navigating to courses page: {base}")
+    page.goto(base, timeout=60000)
+    page.wait_for_selector("a.esg-list-group__item", timeout=30000)
+    time.sleep(random.uniform(1.0, 2.5))
+
+    # click the subject link by exact text
+    locator = page.locator("a.esg-list-group__item").filter(
+        has_text=re.compile(f"^{re.escape(subject_text)}$")
+    )
+    if locator.count() == 0:
+        logger.error(f"No link found for subject: {subject_text}")
+        return []
+    locator.first.click()
+
+    page.wait_for_selector("#course-resultul > li", timeout=60000)
+    time.sleep(random.uniform(1.0, 2.5))
+
+    return page.query_selector_all("#course-resultul > li")
+
+
 def load_courses(subject_text: str) -> list[dict]:
     """
     Given the exact subject display text, navigate and scrape its courses.
@@ -124,25 +227,7 @@ def load_courses(subject_text: str) -> list[dict]:
     pw, browser, page = launch_browser(headless=True)
     courses = []
     try:
-        base = "https://colleague-ss.uoguelph.ca/Student/Courses"
-        # logger.info(f"Navigating to courses page: {base}")
-        page.goto(base, timeout=60000)
-        page.wait_for_selector("a.esg-list-group__item", timeout=30000)
-        time.sleep(random.uniform(1.0, 2.5))
-
-        # click the subject link by exact text
-        locator = page.locator("a.esg-list-group__item").filter(
-            has_text=re.compile(f"^{re.escape(subject_text)}$")
-        )
-        if locator.count() == 0:
-            logger.error(f"No link found for subject: {subject_text}")
-            return []
-        locator.first.click()
-
-        page.wait_for_selector("#course-resultul > li", timeout=60000)
-        time.sleep(random.uniform(1.0, 2.5))
-
-        items = page.query_selector_all("#course-resultul > li")
+        items = open_subject_results(page, subject_text)
         for li in items:
             try:
                 title_el = li.query_selector("h3 span")
@@ -188,74 +273,7 @@ def load_courses(subject_text: str) -> list[dict]:
                 }
 
                 # expand sections
-                toggle = li.query_selector("button.esg-collapsible-group__toggle")
-                if toggle:
-                    toggle.click()
-                    li.wait_for_selector("li.search-nestedaccordionitem", timeout=10000)
-                    secs = li.query_selector_all(
-                        "li.search-nestedaccordionitem"
-                    )
-                    for sec in secs:
-                        try:
-                            # Section code
-                            code_elem: ElementHandle | None = sec.query_selector(
-                                "a.search-sectiondetailslink"
-                            )
-                            if code_elem is None:
-                                # nothing to pull here—skip or set a default
-                                continue
-                            sec_code = code_elem.inner_text().strip()
-                            # Section name
-                            name_elem: ElementHandle | None = sec.query_selector(
-                                "span[id^='section-title']"
-                            )
-                            if name_elem is None:
-                                sec_name = ""
-                            else:
-                                sec_name = name_elem.inner_text().strip()
-                            # Seats available
-                            seats_elem: ElementHandle | None = sec.query_selector(
-                                "span.search-seatsavailabletext"
-                            )
-                            if seats_elem is None:
-                                seats = ""
-                            else:
-                                seats = seats_elem.inner_text().strip()
-
-                            times = []
-                            for row in sec.query_selector_all(
-                                "tr.search-sectionrow"
-                            ):
-                                dt_el = row.query_selector(
-                                    "td.search-sectiondaystime"
-                                )
-                                day_time = dt_el.inner_text().strip() if dt_el else 'TBD'
-                                md_el = row.query_selector(
-                                    "span[id*='meeting-dates']"
-                                )
-                                dates = md_el.inner_text().strip() if md_el else 'N/A'
-                                loc_el = row.query_selector(
-                                    "td.search-sectionlocations"
-                                )
-                                loc    = loc_el.inner_text().strip() if loc_el else 'N/A'
-                                inst_el = row.query_selector(
-                                    "td.search-sectioninstructormethods"
-                                )
-                                instr   = inst_el.inner_text().strip() if inst_el else 'N/A'
-                                times.append({
-                                    'day_time': day_time,
-                                    'dates':    dates,
-                                    'location': loc,
-                                    'instructor': instr
-                                })
-                            course['sections'].append({
-                                'section_code': sec_code,
-                                'section_name': sec_name,
-                                'seats':        seats,
-                                'meetings':     times
-                            })
-                        except Exception:
-                            continue
+                course['sections'] = scrape_sections(li)
 
                 courses.append(course)
             except Exception as e:
@@ -276,6 +294,156 @@ def load_courses(subject_text: str) -> list[dict]:
         pw.stop()
 
 
+# Results page of one subject; Stage 1 subject links point here with the code
+SUBJECT_SEARCH_URL = "https://colleague-ss.uoguelph.ca/Student/Courses/Search?subjects={code}"
+# How long the expanded accordions of one subject may take to load (ms)
+SECTIONS_LOAD_TIMEOUT = 15000
+
+# Codes of every listed course, as load_courses reads them from the title.
+_CODES_JS = """
+() => Array.from(document.querySelectorAll('#course-resultul > li h3 span'),
+                 el => el.innerText.trim().split(/\\s+/)[0]).filter(code => code)
+"""
+
+# Clicks the section toggle of every known course that has one; returns the count.
+_EXPAND_JS = """
+(known) => {
+    let clicked = 0;
+    for (const li of document.querySelectorAll('#course-resultul > li')) {
+        const title = li.querySelector('h3 span');
+        const code = title ? title.innerText.trim().split(/\\s+/)[0] : '';
+        const toggle = li.querySelector('button.esg-collapsible-group__toggle');
+        if (known.includes(code) && toggle) {
+            toggle.click();
+            clicked++;
+        }
+    }
+    return clicked;
+}
+"""
+
+# True once every expanded course result shows its section rows.
+_LOADED_JS = """
+(known) => Array.from(document.querySelectorAll('#course-resultul > li')).every(li => {
+    const title = li.querySelector('h3 span');
+    const code = title ? title.innerText.trim().split(/\\s+/)[0] : '';
+    return !known.includes(code) || !li.querySelector('button.esg-collapsible-group__toggle')
+        || li.querySelector('li.search-nestedaccordionitem') !== null;
+})
+"""
+
+# The fields scrape_sections reads, for every known course, in one round trip.
+# A course whose accordion never loaded is left out, as load_courses would.
+_SECTIONS_JS = """
+(known) => {
+    const text = (root, selector, fallback) => {
+        const el = root.querySelector(selector);
+        return el ? el.innerText.trim() : fallback;
+    };
+    const courses = [];
+    for (const li of document.querySelectorAll('#course-resultul > li')) {
+        const code = text(li, 'h3 span', '').split(/\\s+/)[0];
+        if (!known.includes(code)) continue;
+        const items = li.querySelectorAll('li.search-nestedaccordionitem');
+        if (li.querySelector('button.esg-collapsible-group__toggle') && items.length === 0) continue;
+        const sections = [];
+        for (const sec of items) {
+            const link = sec.querySelector('a.search-sectiondetailslink');
+            if (!link) continue;
+            sections.push({
+                section_code: link.innerText.trim(),
+                section_name: text(sec, "span[id^='section-title']", ''),
+                seats: text(sec, 'span.search-seatsavailabletext', ''),
+                meetings: Array.from(sec.querySelectorAll('tr.search-sectionrow'), row => ({
+                    day_time: text(row, 'td.search-sectiondaystime', 'TBD'),
+                    dates: text(row, "span[id*='meeting-dates']", 'N/A'),
+                    location: text(row, 'td.search-sectionlocations', 'N/A'),
+                    instructor: text(row, 'td.search-sectioninstructormethods', 'N/A'),
+                })),
+            });
+        }
+        courses.push({code, sections});
+    }
+    return courses;
+}
+"""
+
+
+class SubjectPage:
+    """
+    One browser page reused across many subjects. Each subject is opened
+    straight from its results URL, so there is no browser launch, Courses page
+    load or subject click per subject, as there is in load_courses.
+    """
+
+    def __init__(self, headless: bool = True):
+        self.pw, self.browser, self.page = launch_browser(headless=headless)
+        self.subjects_opened = 0
+
+    def __enter__(self) -> "SubjectPage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def open(self, subject_code: str) -> int:
+        """Load a subject's course results; returns how many are listed (0 if none)."""
+        self.page.goto(SUBJECT_SEARCH_URL.format(code=subject_code), timeout=60000)
+        self.subjects_opened += 1
+        try:
+            self.page.wait_for_selector("#course-resultul > li", timeout=60000)
+        except PlaywrightTimeoutError:
+            logger.error(f"No course results for subject: {subject_code}")
+            return 0
+        time.sleep(random.uniform(1.0, 2.5))
+        return len(self.page.query_selector_all("#course-resultul > li"))
+
+    def list_course_codes(self, subject_code: str) -> list[str]:
+        """Codes of the courses a subject lists, without expanding any; [] on error."""
+        try:
+            if not self.open(subject_code):
+                return []
+            return self.page.evaluate(_CODES_JS)
+        except Exception as e:
+            logger.error(f"Error listing courses for {subject_code}: {e}")
+            return []
+
+    def load_sections(self, subject_code: str, known_codes: set[str]) -> list[dict]:
+        """
+        Sections-only scrape of one subject: expand every known course's section
+        accordion at once, wait for them together, then read all section, seat and
+        meeting rows in a single evaluate. Titles, descriptions and detail fields
+        are never read, and unknown courses are not expanded.
+        Returns [{'code', 'sections'}], or [] when the subject fails to load.
+        """
+        try:
+            if not self.open(subject_code):
+                return []
+            known = sorted(known_codes)
+            if self.page.evaluate(_EXPAND_JS, known):
+                try:
+                    self.page.wait_for_function(_LOADED_JS, arg=known, timeout=SECTIONS_LOAD_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    logger.warning(f"Sections for some {subject_code} courses did not load; skipping them")
+            return self.page.evaluate(_SECTIONS_JS, known)
+        except PlaywrightTimeoutError as e:
+            logger.error(f"Timeout loading sections for {subject_code}: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Error scraping sections for {subject_code}: {e}")
+            return []
+
+    def close(self) -> None:
+        self.browser.close()
+        self.pw.stop()
+
+
+def load_sections(subject_code: str, known_codes: set[str]) -> list[dict]:
+    """Sections-only scrape of a single subject in its own browser (see SubjectPage.load_sections)."""
+    with SubjectPage() as page:
+        return page.load_sections(subject_code, known_codes)
+
+
 # Optional quick CLI
 if __name__ == '__main__':
     raw = load_subjects()
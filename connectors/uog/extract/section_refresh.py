@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# section_refresh.py
+
+"""
+Sections-only refresh: re-scrape section, seat and meeting rows for courses we
+already know about, and store each poll as a delta against the previous one.
+
+Storage layout under data/sections/:
+    base.json           {'seq', 'taken_at', 'sections': {course: {section_code: section}}}
+    deltas/000042.json  {'seq', 'taken_at', 'changes': {course: {section_code: section | null} | null}}
+
+A delta only lists courses whose sections changed. Within a course, a section
+value replaces the stored one and null removes it; a null course removes the
+course entirely. The current state is base.json with every later delta applied
+in sequence order; `compact()` folds deltas back into a new base.
+"""
+import asyncio
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.artifacts import read_json, write_artifact
+from .scrapper_modules.scrape_subjects_list import SubjectPage
+from .parsers.subjects_with_courses_parser import clean_sections, iter_raw_subjects
+from .subjects_with_courses import last_scrape_cost, record_scrape_cost
+
+# Concurrent browser pages, each reused across the subjects it takes
+MAX_WORKERS = 5
+# Fold deltas into a fresh base after this many polls
+COMPACT_EVERY = 96
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    datefmt="%H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+SECTIONS_DIR = BASE_DIR / 'data' / 'sections'
+SUBJECT_CATALOG_FILE = BASE_DIR / 'data' / 'course_catalog' / 'course_catalog.json'
+KNOWN_COURSES_FILE = BASE_DIR.parent / 'raw' / 'subjects_with_courses.json'
+
+Snapshot = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+def known_courses() -> Dict[str, Tuple[str, List[str]]]:
+    """
+    Map subject code -> (subject display text, known course codes), from the
+    last full Stage 2 run and the Stage 1 catalog.
+    """
+    catalog = read_json(SUBJECT_CATALOG_FILE)
+    texts = {s['code']: s['text'] for s in catalog}
+    known = {}
+    for subj, courses in iter_raw_subjects(KNOWN_COURSES_FILE):
+        codes = [c['code'] for c in courses if c.get('code')]
+        if codes and subj in texts:
+            known[subj] = (texts[subj], codes)
+    return known
+
+
+def build_snapshot(courses: List[dict]) -> Snapshot:
+    """Key cleaned sections by course code, then by section code."""
+    snapshot: Snapshot = {}
+    for course in courses:
+        sections = {}
+        for sec in clean_sections(course.get('sections')):
+            code = sec.pop('section_code')
+            sections[code] = sec
+        snapshot[course['code']] = sections
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Changes that turn `old` into `new` (see module docstring for the format)."""
+    changes: Dict[str, Optional[Dict[str, Any]]] = {}
+    for course in old.keys() - new.keys():
+        changes[course] = None
+    for course, sections in new.items():
+        before = old.get(course, {})
+        patch = {code: sec for code, sec in sections.items() if before.get(code) != sec}
+        patch.update({code: None for code in before.keys() - sections.keys()})
+        if patch or course not in old:
+            changes[course] = patch
+    return changes
+
+
+def apply_delta(snapshot: Snapshot, changes: Dict[str, Optional[Dict[str, Any]]]) -> Snapshot:
+    """Apply a delta's changes to a snapshot in place and return it."""
+    for course, patch in changes.items():
+        if patch is None:
+            snapshot.pop(course, None)
+            continue
+        sections = snapshot.setdefault(course, {})
+        for code, sec in patch.items():
+            if sec is None:
+                sections.pop(code, None)
+            else:
+                sections[code] = sec
+    return snapshot
+
+
+def _delta_files() -> List[Path]:
+    return sorted((SECTIONS_DIR / 'deltas').glob('*.json'))
+
+
+def load_latest_snapshot() -> Tuple[Snapshot, int]:
+    """Rebuild the current state from base.json plus deltas. Returns (snapshot, seq)."""
+    base_file = SECTIONS_DIR / 'base.json'
+    if not base_file.exists():
+        return {}, 0
+    base = read_json(base_file)
+    snapshot, seq = base['sections'], base['seq']
+    for path in _delta_files():
+        delta = read_json(path)
+        if delta['seq'] > seq:
+            apply_delta(snapshot, delta['changes'])
+            seq = delta['seq']
+    return snapshot, seq
+
+
+def save_poll(snapshot: Snapshot, unpolled: Iterable[str] = ()) -> Optional[Path]:
+    """
+    Store a new poll: the first one becomes base.json, later ones are written
+    as deltas (or skipped when nothing changed). Courses listed in `unpolled`
+    (their subject failed to load) keep their previous sections instead of
+    being recorded as removed. Compacts every COMPACT_EVERY deltas.
+    """
+    taken_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    previous, seq = load_latest_snapshot()
+    for course in unpolled:
+        if course in previous and course not in snapshot:
+            snapshot[course] = previous[course]
+    if seq == 0:
+        path = SECTIONS_DIR / 'base.json'
+        write_artifact(path, {'seq': 1, 'taken_at': taken_at, 'sections': snapshot})
+        logger.info(f"Sections: wrote base snapshot ({len(snapshot)} courses) to {path}")
+        return path
+
+    changes = diff_snapshots(previous, snapshot)
+    if not changes:
+        logger.info("Sections: no changes since last poll; nothing written")
+        return None
+
+    seq += 1
+    path = SECTIONS_DIR / 'deltas' / f"{seq:06d}.json"
+    write_artifact(path, {'seq': seq, 'taken_at': taken_at, 'changes': changes})
+    changed_sections = sum(len(p) for p in changes.values() if p)
+    logger.info(f"Sections: delta #{seq} touches {len(changes)} courses / {changed_sections} sections")
+
+    if len(_delta_files()) >= COMPACT_EVERY:
+        compact()
+    return path
+
+
+def compact() -> None:
+    """Fold every delta into a new base.json and delete the folded deltas."""
+    snapshot, seq = load_latest_snapshot()
+    if seq == 0:
+        return
+    taken_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    write_artifact(SECTIONS_DIR / 'base.json', {'seq': seq, 'taken_at': taken_at, 'sections': snapshot})
+    for path in _delta_files():
+        path.unlink()
+    logger.info(f"Sections: compacted deltas into base at seq {seq}")
+
+
+def _scrape_worker(todo: "queue.SimpleQueue[str]", known: Dict[str, Tuple[str, List[str]]],
+                   results: Dict[str, List[dict]]) -> None:
+    """Take subjects off `todo` until it is empty, all on one browser page."""
+    with SubjectPage() as page:
+        while True:
+            try:
+                code = todo.get_nowait()
+            except queue.Empty:
+                return
+            results[code] = page.load_sections(code, set(known[code][1]))
+            logger.info(f"  [{code}] Refreshed sections for {len(results[code])} courses")
+
+
+async def refresh_sections(write_json: bool = True) -> Snapshot:
+    """
+    Sections-only extract: scrape section/seat/meeting rows for every known
+    course and store the poll as a delta. Returns the new snapshot.
+    """
+    known = known_courses()
+    total = sum(len(codes) for _, codes in known.values())
+    logger.info(f"Sections: refreshing {total} known courses in {len(known)} subjects with {MAX_WORKERS} workers…")
+
+    todo: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+    for code in known:
+        todo.put(code)
+    results: Dict[str, List[dict]] = {}
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        workers = [loop.run_in_executor(executor, _scrape_worker, todo, known, results)
+                   for _ in range(min(MAX_WORKERS, len(known)))]
+        for outcome in await asyncio.gather(*workers, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.error(f"Sections: a browser worker failed: {outcome}")
+    log_refresh_cost(time.perf_counter() - start, len(known), write_json)
+
+    # load_sections returns [] on page errors too, so an empty subject counts as unpolled
+    unpolled = [c for subj, (_, codes) in known.items() if not results.get(subj) for c in codes]
+    snapshot = build_snapshot([c for courses in results.values() for c in courses])
+    if write_json:
+        save_poll(snapshot, unpolled)
+    return snapshot
+
+
+def log_refresh_cost(seconds: float, subjects: int, write_json: bool = True) -> None:
+    """Log this refresh's wall time against the last full Stage 2 scrape, and record it unless write_json=False."""
+    if not subjects:
+        return
+    cost = record_scrape_cost('sections-only', seconds, subjects, write_json)
+    message = (f"Sections: {subjects} subjects in {cost['seconds']} s "
+               f"({cost['seconds_per_subject']} s per subject)")
+    full = last_scrape_cost('full')
+    if full and full['seconds_per_subject']:
+        share = cost['seconds_per_subject'] / full['seconds_per_subject']
+        message += f"; last full Stage 2 run took {full['seconds_per_subject']} s per subject ({share:.0%})"
+    logger.info(message)
+
+
+if __name__ == '__main__':
+    asyncio.run(refresh_sections(write_json=True))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# sharding.py
+
+"""
+Deterministic sharding of the detail stages (2 and 4) across processes or hosts.
+
+A shard spec `i/N` (1-based, like Playwright's `--shard`) selects every catalog
+entry whose stable hash lands in bucket `i`. Each shard writes its own artifact
+under `data/<stage>/shards/`, stamped with a digest of the catalog it was cut
+from, and `merge_*_shards` stitches N artifacts back together in catalog order
+so the merged outputs are identical to a single-process run.
+"""
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from core.artifacts import read_json, write_json
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    datefmt="%H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+class ShardSpec(NamedTuple):
+    index: int  # 1-based
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "ShardSpec":
+        """Parse an `i/N` string, e.g. '2/4'."""
+        try:
+            index, count = (int(part) for part in spec.split('/'))
+        except ValueError:
+            raise ValueError(f"Invalid shard spec '{spec}', expected i/N (e.g. 2/4)")
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard spec '{spec}': need 1 <= i <= N")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def tag(self) -> str:
+        return f"shard-{self.index}-of-{self.count}"
+
+
+def subject_key(subject: dict) -> str:
+    return subject.get('code') or subject.get('text') or ''
+
+
+def program_key(program: dict) -> str:
+    return program.get('calendar_url') or program.get('name') or ''
+
+
+def shard_of(key: str, count: int) -> int:
+    """Stable 1-based bucket for a key (independent of PYTHONHASHSEED)."""
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(items: List[dict], spec: ShardSpec, key: Callable[[dict], str]) -> List[dict]:
+    """Return the catalog entries owned by this shard, in catalog order."""
+    return [item for item in items if shard_of(key(item), spec.count) == spec.index]
+
+
+def catalog_digest(items: List[dict], key: Callable[[dict], str]) -> str:
+    """Digest of the catalog keys, so shards cut from different catalogs can't be merged."""
+    h = hashlib.sha1()
+    for item in items:
+        h.update(key(item).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def shard_dir(stage_dir: str) -> Path:
+    return BASE_DIR / 'data' / stage_dir / 'shards'
+
+
+def write_shard(stage_dir: str, name: str, spec: ShardSpec, digest: str, results: Any) -> Path:
+    out_file = shard_dir(stage_dir) / f"{name}.{spec.tag}.json"
+    payload = {
+        'shard': {'index': spec.index, 'count': spec.count},
+        'catalog_digest': digest,
+        'results': results,
+    }
+    write_json(out_file, payload)
+    logger.info(f"Shard {spec}: wrote {out_file}")
+    return out_file
+
+
+def _load_shards(stage_dir: str, name: str, count: int, digest: str) -> Dict[int, Any]:
+    shards: Dict[int, Any] = {}
+    for index in range(1, count + 1):
+        spec = ShardSpec(index, count)
+        path = shard_dir(stage_dir) / f"{name}.{spec.tag}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Missing shard artifact {path}")
+        payload = read_json(path)
+        if payload.get('catalog_digest') != digest:
+            raise ValueError(f"Shard {spec} was cut from a different catalog ({path})")
+        shards[index] = payload['results']
+    return shards
+
+
+def _interleave(items: List[dict], key: Callable[[dict], str], count: int,
+                shard_results: Dict[int, Iterator]) -> Iterator[Tuple[dict, Any]]:
+    """Walk the catalog and pull each entry's result from the shard that owns it."""
+    for item in items:
+        index = shard_of(key(item), count)
+        try:
+            yield item, next(shard_results[index])
+        except StopIteration:
+            raise ValueError(f"Shard {index}/{count} has fewer results than its catalog slice")
+    for index, rest in shard_results.items():
+        if next(rest, None) is not None:
+            raise ValueError(f"Shard {index}/{count} has more results than its catalog slice")
+
+
+def merge_subject_shards(subjects: List[dict], count: int) -> Dict[str, List[dict]]:
+    """Combine stage 2 shard artifacts into the single-run raw mapping."""
+    digest = catalog_digest(subjects, subject_key)
+    shards = _load_shards('course_catalog', 'subjects_with_courses_raw', count, digest)
+    # Shards store (code, courses) pairs so duplicate catalog codes survive
+    iters = {i: iter(res) for i, res in shards.items()}
+    merged: Dict[str, List[dict]] = {}
+    for _, (code, courses) in _interleave(subjects, subject_key, count, iters):
+        merged[code] = courses
+    logger.info(f"Merged {count} subject shards into {len(merged)} subjects")
+    return merged
+
+
+def merge_program_shards(programs: List[dict], count: int) -> List[dict]:
+    """Combine stage 4 shard artifacts into the single-run raw program list."""
+    digest = catalog_digest(programs, program_key)
+    shards = _load_shards('programs', 'programs_with_sections_raw', count, digest)
+    iters = {i: iter(res) for i, res in shards.items()}
+    merged = [result for _, result in _interleave(programs, program_key, count, iters)]
+    logger.info(f"Merged {count} program shards into {len(merged)} programs")
+    return merged
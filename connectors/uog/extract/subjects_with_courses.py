@@ -2,13 +2,20 @@
 # subjects_with_courses.py
 
 import asyncio
-import json
 import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from .scrapper_modules.scrape_subjects_list import load_courses
+from core.artifacts import read_artifact, read_json, write_artifact
+from .scrapper_modules.scrape_subjects_list import SubjectPage, load_courses
 from .parsers.subjects_with_courses_parser import parse_subjects_with_courses
+from .sharding import ShardSpec, catalog_digest, merge_subject_shards, select_shard, subject_key, write_shard
+from .crawl_planner import SUBJECT_PROBE_WORKERS, course_list_digest, load_state, plan_subjects, record_subjects, save_state
 
 # Max concurrent threads for scraping courses
 MAX_WORKERS = 5
@@ -21,23 +28,110 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BASE_DIR = Path(__file__).resolve().parent
+CATALOG_FILE = BASE_DIR / 'data' / 'course_catalog' / 'course_catalog.json'
+RAW_FILE = BASE_DIR / 'data' / 'course_catalog' / 'subjects_with_courses_raw.json'
+# Wall time of the last run of each subject scrape mode, for comparing them
+SCRAPE_COST_FILE = BASE_DIR / 'data' / 'scrape_costs.json'
 
-async def extract_and_parse_subjects(write_json: bool = True) -> dict:
+
+def record_scrape_cost(mode: str, seconds: float, subjects: int, write_json: bool = True) -> Dict[str, float]:
     """
-    Scrape subjects with courses, dump raw & cleaned JSON (if write_json=True),
-    and return the cleaned data as a dict.
+    The wall time of a subject scrape (`mode` e.g. 'full', 'sections-only'),
+    stored in SCRAPE_COST_FILE unless write_json=False.
     """
-    # 1) Load the subject catalog
-    base_dir = Path(__file__).resolve().parent
-    catalog_file = base_dir / 'data' / 'course_catalog' / 'course_catalog.json'
-    if not catalog_file.exists():
-        logger.error(f"Subject catalog not found at {catalog_file}")
-        return {}
+    cost = {'seconds': round(seconds, 1), 'subjects': subjects,
+            'seconds_per_subject': round(seconds / subjects, 2) if subjects else 0.0,
+            'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+    if write_json:
+        costs = read_json(SCRAPE_COST_FILE) if SCRAPE_COST_FILE.exists() else {}
+        costs[mode] = cost
+        write_artifact(SCRAPE_COST_FILE, costs)
+    return cost
 
-    logger.info(f"Stage 2: Loading subject catalog from {catalog_file}")
-    subjects = json.loads(catalog_file.read_text(encoding='utf-8'))
 
-    # 2) Scrape courses concurrently
+def last_scrape_cost(mode: str) -> Optional[Dict[str, float]]:
+    """The last recorded scrape cost for `mode`, or None."""
+    if not SCRAPE_COST_FILE.exists():
+        return None
+    return read_json(SCRAPE_COST_FILE).get(mode)
+
+
+class CourseListProbe:
+    """
+    Default Stage 2 subject probe: the `course_list_digest` of the course codes
+    a subject's results page lists. Each probe is one page load with no course
+    expanded.
+
+    Sync Playwright objects must stay on the thread that created them, so the
+    probe runs its own worker threads. Calls from any thread are queued to one
+    of them, and each worker opens its browser page on its first probe and
+    closes it itself when `close()` stops the workers.
+    """
+
+    def __init__(self, workers: int = SUBJECT_PROBE_WORKERS):
+        self._todo: "queue.SimpleQueue[Optional[Tuple[dict, Future]]]" = queue.SimpleQueue()
+        self._threads = [threading.Thread(target=self._worker, name=f'subject-probe-{n}', daemon=True)
+                         for n in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> "CourseListProbe":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _worker(self) -> None:
+        """Answer queued probes on one page, launched on first use, until told to stop."""
+        page: Optional[SubjectPage] = None
+        try:
+            while True:
+                item = self._todo.get()
+                if item is None:
+                    return
+                subject, future = item
+                if page is None:
+                    try:
+                        page = SubjectPage()
+                    except Exception as e:
+                        logger.error(f"Stage 2 probe: could not launch a browser: {e}")
+                        future.set_result(None)
+                        continue
+                codes = page.list_course_codes(subject['code'])
+                future.set_result(course_list_digest(codes) if codes else None)
+        finally:
+            if page is not None:
+                page.close()
+
+    def __call__(self, subject: dict) -> Optional[str]:
+        future: Future = Future()
+        self._todo.put((subject, future))
+        return future.result()
+
+    def close(self) -> None:
+        """Stop the workers; each closes its own page before exiting."""
+        for _ in self._threads:
+            self._todo.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+def load_subject_catalog() -> List[dict]:
+    """Load the Stage 1 subject catalog, or [] if it has not been produced yet."""
+    if not CATALOG_FILE.exists():
+        logger.error(f"Subject catalog not found at {CATALOG_FILE}")
+        return []
+    logger.info(f"Stage 2: Loading subject catalog from {CATALOG_FILE}")
+    return read_artifact(CATALOG_FILE)
+
+
+async def scrape_subjects(subjects: List[dict], write_json: bool = True) -> List[Tuple[str, List[dict]]]:
+    """
+    Scrape courses for each subject concurrently; returns (code, courses) pairs
+    in input order. The run's wall time is logged, and recorded unless write_json=False.
+    """
     logger.info(f"Stage 2: Scraping {len(subjects)} subjects with {MAX_WORKERS} workers…")
     loop = asyncio.get_running_loop()
     executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
@@ -51,21 +145,23 @@ async def extract_and_parse_subjects(write_json: bool = True) -> dict:
             courses = []
         return code, courses
 
+    start = time.perf_counter()
     tasks = [fetch_subj(s['code'], s['text']) for s in subjects]
     pairs = await asyncio.gather(*tasks)
     executor.shutdown(wait=False)
-    results = {code: courses for code, courses in pairs}
+    if subjects:
+        cost = record_scrape_cost('full', time.perf_counter() - start, len(subjects), write_json)
+        logger.info(f"Stage 2: scraped {len(subjects)} subjects in {cost['seconds']} s "
+                    f"({cost['seconds_per_subject']} s per subject)")
+    return list(pairs)
+
 
+def save_subject_outputs(results: Dict[str, List[dict]], write_json: bool = True) -> dict:
+    """Write the raw intermediate, clean it, write the cleaned output and return it."""
     # 3) Write raw intermediate output
     if write_json:
-        raw_dir = base_dir / 'data' / 'course_catalog'
-        raw_dir.mkdir(parents=True, exist_ok=True)
-        raw_file = raw_dir / 'subjects_with_courses_raw.json'
-        raw_file.write_text(
-            json.dumps(results, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
-        logger.info(f"Stage 2: Saved raw courses to {raw_file}")
+        write_artifact(RAW_FILE, results)
+        logger.info(f"Stage 2: Saved raw courses to {RAW_FILE}")
 
     # 4) Clean & normalize
     logger.info("Stage 2: Cleaning and normalizing course data…")
@@ -73,17 +169,66 @@ async def extract_and_parse_subjects(write_json: bool = True) -> dict:
 
     # 5) Write cleaned output only to connectors/uog/raw
     if write_json:
-        cleaned_dir = base_dir.parent / 'raw'
-        cleaned_dir.mkdir(parents=True, exist_ok=True)
-        clean_file = cleaned_dir / 'subjects_with_courses.json'
-        clean_file.write_text(
-            json.dumps(cleaned, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
+        clean_file = BASE_DIR.parent / 'raw' / 'subjects_with_courses.json'
+        write_artifact(clean_file, cleaned)
         logger.info(f"Stage 2: Saved cleaned courses to {clean_file}")
 
     return cleaned
 
 
+async def extract_and_parse_subjects(write_json: bool = True, shard: Optional[ShardSpec] = None,
+                                     incremental: bool = False) -> dict:
+    """
+    Scrape subjects with courses, dump raw & cleaned JSON (if write_json=True),
+    and return the cleaned data as a dict.
+
+    With a shard spec only that shard's subjects are scraped and only the shard
+    artifact is written; run `merge_subjects` once every shard has finished.
+    With incremental=True the crawl planner decides which subjects to scrape and
+    the rest are carried over from the previous raw output.
+    """
+    if shard is not None and incremental:
+        raise ValueError("Incremental planning is not supported for sharded runs")
+
+    # 1) Load the subject catalog
+    subjects = load_subject_catalog()
+    if not subjects:
+        return {}
+
+    if incremental:
+        previous = read_artifact(RAW_FILE) if RAW_FILE.exists() else {}
+        state = load_state()
+        with CourseListProbe() as probe:
+            plan = plan_subjects(subjects, previous, state, subject_probe=probe)
+        fetched = {code: courses for code, courses in await scrape_subjects(plan.fetch, write_json)}
+        # A subject that came back empty (scrape error) keeps its previous courses
+        results = {s['code']: fetched.get(s['code']) or previous.get(s['code'], []) for s in subjects}
+        if write_json:
+            record_subjects(state, fetched)
+            save_state(state)
+        return save_subject_outputs(results, write_json)
+
+    # 2) Scrape courses concurrently
+    if shard is not None:
+        owned = select_shard(subjects, shard, subject_key)
+        logger.info(f"Stage 2: shard {shard} owns {len(owned)} of {len(subjects)} subjects")
+        pairs = await scrape_subjects(owned, write_json)
+        if write_json:
+            write_shard('course_catalog', 'subjects_with_courses_raw', shard,
+                        catalog_digest(subjects, subject_key), pairs)
+        return parse_subjects_with_courses({code: courses for code, courses in pairs})
+
+    pairs = await scrape_subjects(subjects, write_json)
+    results = {code: courses for code, courses in pairs}
+    return save_subject_outputs(results, write_json)
+
+
+def merge_subjects(shard_count: int, write_json: bool = True) -> dict:
+    """Merge Stage 2 shard artifacts into the same outputs a single-process run writes."""
+    subjects = load_subject_catalog()
+    results = merge_subject_shards(subjects, shard_count)
+    return save_subject_outputs(results, write_json)
+
+
 if __name__ == '__main__':
     asyncio.run(extract_and_parse_subjects(write_json=True))
@@ -0,0 +1,110 @@
+# transformer/course_transformer/course_columns.py
+
+"""
+Columnar pass for the deterministic course fields.
+
+`department`, `level`, `credits` and `termsOffered` depend only on the source
+record, so they are computed for the whole catalog at once with vectorized
+pandas string operations and map lookups, before any network-bound work:
+
+    fields = local_course_fields(courses)   # one dict per course, same order
+    process_single_course(courses[i], fields[i])
+
+Each row matches what `_assemble_course` computes per record
+(`_parse_credits_from_string`, `_parse_level_from_code`, `parse_department`,
+`parse_terms_offered`); `benchmarks/bench_course_columns.py` checks this over
+the whole catalog.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .course_helper_parsers.department_parser import DEPT_NAME_TO_CODE_MAP, DEPT_NAME_TO_PARENT_NAME_MAP
+from .course_helper_parsers.terms_offered_parser import parse_terms_offered
+
+LOCAL_FIELDS = ("department", "level", "credits", "termsOffered")
+
+
+def _none_for_missing(series: pd.Series) -> List[Any]:
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _factorize_strings(raw: pd.Series) -> Tuple[List[int], pd.Series]:
+    """
+    (row -> unique index codes, unique values) for the string cells of `raw`.
+    Catalog columns repeat a handful of values, so the string work runs on the
+    uniques and is spread back out by index; non-strings get code -1.
+    """
+    codes, uniques = pd.factorize(raw.where(raw.str.len().notna()), use_na_sentinel=True)
+    # Plain ints: indexing Python lists with numpy scalars is several times slower
+    return codes.tolist(), pd.Series(uniques, dtype=object)
+
+
+def _dept_ids(names: pd.Series) -> pd.Series:
+    """Vectorized `department_parser._generate_dept_id` (names are already stripped)."""
+    return "dept_" + names.str.lower().str.replace(" ", "_", regex=False).str.replace("&", "and", regex=False)
+
+
+def _departments(raw: pd.Series) -> List[Optional[Dict[str, Any]]]:
+    codes, uniques = _factorize_strings(raw)
+    names = uniques.str.strip()
+    parents = names.map(DEPT_NAME_TO_PARENT_NAME_MAP)
+    has_parent = parents.notna() & (parents != "")
+    parent_ids = _dept_ids(parents.where(has_parent, "")).where(has_parent, None)
+
+    objects = [
+        {"deptId": dept_id, "name": name, "code": code, "parentId": parent_id} if name else None
+        for name, dept_id, code, parent_id in zip(
+            names.tolist(), _dept_ids(names).tolist(),
+            _none_for_missing(names.map(DEPT_NAME_TO_CODE_MAP)), _none_for_missing(parent_ids))
+    ]
+    # Fresh objects per course, so no two course records share a mutable dict
+    return [dict(objects[code]) if code >= 0 and objects[code] else None for code in codes]
+
+
+def _terms_offered(raw: pd.Series) -> List[List[Dict[str, Any]]]:
+    codes, uniques = _factorize_strings(raw)
+    parsed = [parse_terms_offered(value) for value in uniques]
+    return [[dict(pattern, terms=list(pattern["terms"]), years=list(pattern["years"]))
+             for pattern in parsed[code]] if code >= 0 else [] for code in codes]
+
+
+def _credits(raw: pd.Series) -> List[Optional[float]]:
+    codes, uniques = _factorize_strings(raw)
+    numbers = _none_for_missing(pd.to_numeric(uniques.str.extract(r"(\d+\.?\d*)", expand=False),
+                                              errors="coerce").astype(float))
+    return [numbers[code] if code >= 0 else None for code in codes]
+
+
+def _levels(codes: pd.Series) -> List[Optional[int]]:
+    # The hundreds digit after '*' (e.g. ECON*2310 -> 2000)
+    digits = pd.to_numeric(codes.str.extract(r"\*(\d)", expand=False), errors="coerce")
+    return [int(digit) * 1000 if digit is not None else None for digit in _none_for_missing(digits)]
+
+
+def local_course_fields(courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Computes LOCAL_FIELDS for every course in one columnar pass.
+
+    Args:
+        courses: Source-clean course dicts.
+
+    Returns:
+        One {field: value} dict per course, in input order.
+    """
+    if not courses:
+        return []
+
+    # object dtype keeps non-string values as-is; `.str` turns them into NaN,
+    # which the per-record parsers also treat as missing
+    frame = pd.DataFrame({
+        column: pd.Series([course.get(column) for course in courses], dtype=object)
+        for column in ("code", "credits", "departments", "offered")
+    })
+    return [
+        {"department": department, "level": level, "credits": credit, "termsOffered": terms}
+        for department, level, credit, terms in zip(
+            _departments(frame["departments"]), _levels(frame["code"]),
+            _credits(frame["credits"]), _terms_offered(frame["offered"]))
+    ]
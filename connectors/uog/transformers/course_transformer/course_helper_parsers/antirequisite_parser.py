@@ -1,23 +1,12 @@
 # transformer/course_transformer/course_helper_parsers/antirequisite_parser.py
 
-import re
 import logging
 from typing import List, Optional
 
-logger = logging.getLogger(__name__)
-
-# A constant for the course code pattern for reusability.
-COURSE_CODE_REGEX = r'[A-Z]{2,5}\*\d{4}'
+# Shared with the other rule-based parsers; re-exported for existing imports
+from .text_scanner import ANTIREQUISITE_TRIGGERS, COURSE_CODE_REGEX, scan_text
 
-# A list of phrases that reliably indicate an antirequisite relationship,
-# based on our analysis of the grouped_by_restrictions.json file.
-ANTIREQUISITE_TRIGGERS = [
-    "credit may be obtained for only one of",
-    "credit will not be given for",
-    "may not be taken for credit",
-    "not available to students with credit in",
-    "excluding"
-]
+logger = logging.getLogger(__name__)
 
 def parse_antirequisites(restrictions_string: Optional[str], current_course_code: Optional[str]) -> List[str]:
     """
@@ -36,31 +25,20 @@ def parse_antirequisites(restrictions_string: Optional[str], current_course_code
     if not restrictions_string or not current_course_code:
         return []
 
-    lower_restrictions = restrictions_string.lower()
-    trigger_found = False
+    scanned = scan_text(restrictions_string)
 
-    # 1. Check if any of our keyword trigger phrases are in the string.
-    for trigger in ANTIREQUISITE_TRIGGERS:
-        if trigger in lower_restrictions:
-            trigger_found = True
-            break
-    
-    # 2. If no keyword was found, check if the string STARTS with a course code.
-    if not trigger_found:
-        # re.match() only checks for a match at the beginning of the string.
-        if re.match(COURSE_CODE_REGEX, restrictions_string):
-            trigger_found = True
-            
-    # 3. If a trigger was found, extract all codes and filter them.
+    # 1. A keyword trigger phrase anywhere in the string, or
+    # 2. a string that STARTS with a course code.
+    trigger_found = bool(scanned.triggers) or scanned.starts_with_code
+
+    # 3. If a trigger was found, take all codes and filter them.
     if trigger_found:
-        all_codes_found = re.findall(COURSE_CODE_REGEX, restrictions_string)
-        
         # An antirequisite is any found course code that is not the current course.
-        antireq_codes = [code for code in all_codes_found if code != current_course_code]
-        
+        antireq_codes = [token.value for token in scanned.codes if token.value != current_course_code]
+
         if antireq_codes:
             logger.info(f"For {current_course_code}, found antirequisites: {antireq_codes}")
         return antireq_codes
-    
+
     # 4. If no triggers were found, return an empty list, ignoring any other text.
-    return []
\ No newline at end of file
+    return []
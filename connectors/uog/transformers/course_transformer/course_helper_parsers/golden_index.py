@@ -0,0 +1,102 @@
+# transformer/course_transformer/course_helper_parsers/golden_index.py
+
+import copy
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from core.artifacts import iter_ndjson
+from .parse_cache import normalize_requisite_string
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Validated prerequisite parses (course_code, raw_requisite, prerequisites); override with GOLDEN_DATASET_PATH.
+DEFAULT_GOLDEN_PATH = Path(__file__).resolve().parents[5] / "OLLAMA" / "Golden_DataSet_Final.jsonl"
+
+
+class GoldenIndex:
+    """
+    In-memory index over the golden prerequisite dataset, loaded once on first use.
+
+    A lookup resolves, in order: the course's own golden entry when its requisite
+    text matches, the exact raw string, then the normalized string (see
+    `normalize_requisite_string`). Every hit returns its own copy of the entry,
+    so callers may modify it. Safe to share across threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.environ.get("GOLDEN_DATASET_PATH") or DEFAULT_GOLDEN_PATH)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.by_course: Dict[str, Tuple[str, Any]] = {}
+        self.by_raw: Dict[str, Any] = {}
+        self.by_normalized: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self._digest: Optional[str] = None
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                for entry in iter_ndjson(self.path):
+                    raw = entry.get("raw_requisite")
+                    if not isinstance(raw, str):
+                        continue
+                    prereqs = entry.get("prerequisites")
+                    normalized = normalize_requisite_string(raw)
+                    if entry.get("course_code"):
+                        self.by_course[entry["course_code"]] = (normalized, prereqs)
+                    self.by_raw.setdefault(raw, prereqs)
+                    self.by_normalized.setdefault(normalized, prereqs)
+                logger.info(f"Golden index: loaded {len(self.by_raw)} requisite strings from {self.path.name}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Golden index unavailable ({self.path}): {e}")
+            self._loaded = True
+
+    def lookup(self, raw_text: str, course_code: Optional[str] = None,
+               normalized: Optional[str] = None) -> Tuple[bool, Any]:
+        """Returns (hit, a copy of the prerequisites). A hit may carry a None result."""
+        if not self._loaded:
+            self._load()
+        if normalized is None:
+            normalized = normalize_requisite_string(raw_text)
+
+        found, result = False, None
+        course_entry = self.by_course.get(course_code) if course_code else None
+        if course_entry is not None and course_entry[0] == normalized:
+            found, result = True, course_entry[1]
+        elif raw_text in self.by_raw:
+            found, result = True, self.by_raw[raw_text]
+        elif normalized in self.by_normalized:
+            found, result = True, self.by_normalized[normalized]
+
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, copy.deepcopy(result)
+
+    def digest(self) -> str:
+        """SHA-256 of the dataset file ('missing' if it cannot be read), computed once."""
+        if self._digest is None:
+            sha = hashlib.sha256()
+            try:
+                with open(self.path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 16), b""):
+                        sha.update(chunk)
+                self._digest = sha.hexdigest()
+            except OSError:
+                self._digest = "missing"
+        return self._digest
+
+    def __len__(self) -> int:
+        if not self._loaded:
+            self._load()
+        return len(self.by_raw)
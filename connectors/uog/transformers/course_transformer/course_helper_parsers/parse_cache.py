@@ -0,0 +1,161 @@
+# transformer/course_transformer/course_helper_parsers/parse_cache.py
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# One SQLite file shared by every LLM-backed parser; override with PARSE_CACHE_PATH.
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[2] / "cache" / "llm_parses.sqlite3"
+
+# Boilerplate the registrar appends to many requisite strings. The golden dataset was
+# built with it stripped (see OLLAMA/batch-parser.py), so it is not part of the key.
+BOILERPLATE_SUFFIX_RE = re.compile(r'\s*-\s*Must be (?:completed|taken either) prior to.*$', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parses (
+    key            TEXT PRIMARY KEY,
+    kind           TEXT NOT NULL,
+    model_id       TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    input          TEXT NOT NULL,
+    result         TEXT NOT NULL,
+    created_at     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parses_model ON parses (kind, model_id, prompt_version);
+"""
+
+
+def normalize_requisite_string(text: str) -> str:
+    """Collapses whitespace and strips the 'Must be completed prior to...' boilerplate."""
+    text = WHITESPACE_RE.sub(' ', text).strip()
+    return BOILERPLATE_SUFFIX_RE.sub('', text).strip()
+
+
+def cache_key(kind: str, model_id: str, prompt_version: str, normalized_input: str) -> str:
+    material = "\x00".join((kind, model_id, prompt_version, normalized_input))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent, content-addressed store of LLM parse results.
+
+    Entries are keyed by (kind, model ID, prompt version, normalized input), so a new
+    fine-tuned model or prompt revision never sees stale results: it simply misses,
+    and `purge_stale` can drop the superseded rows. Safe to share across threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.environ.get("PARSE_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def get(self, kind: str, model_id: str, prompt_version: str, normalized_input: str) -> Tuple[bool, Any]:
+        """Returns (hit, result). A hit may carry a None result (model found no rule)."""
+        key = cache_key(kind, model_id, prompt_version, normalized_input)
+        with self._lock:
+            row = self._connect().execute("SELECT result FROM parses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def put(self, kind: str, model_id: str, prompt_version: str, normalized_input: str, result: Any) -> None:
+        key = cache_key(kind, model_id, prompt_version, normalized_input)
+        created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO parses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, model_id, prompt_version, normalized_input, json.dumps(result), created_at)
+            )
+            conn.commit()
+            self.stores += 1
+
+    def purge_stale(self, kind: str, model_id: str, prompt_version: str) -> int:
+        """Deletes `kind` entries produced by any other model ID or prompt version."""
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute(
+                "DELETE FROM parses WHERE kind = ? AND NOT (model_id = ? AND prompt_version = ?)",
+                (kind, model_id, prompt_version)
+            )
+            conn.commit()
+        logger.info(f"Parse cache: purged {cur.rowcount} stale '{kind}' entries")
+        return cur.rowcount
+
+    def purge_model(self, model_id: str) -> int:
+        """Deletes every entry produced by `model_id`."""
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute("DELETE FROM parses WHERE model_id = ?", (model_id,))
+            conn.commit()
+        logger.info(f"Parse cache: purged {cur.rowcount} entries for model {model_id}")
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def log_stats(self, label: str = "Parse cache") -> None:
+        s = self.stats()
+        logger.info(f"{label}: {s['hits']} hits / {s['misses']} misses "
+                    f"({100 * s['hit_rate']:.1f}% hit rate), {s['stores']} new entries")
+
+    def entry_counts(self) -> Dict[Tuple[str, str, str], int]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT kind, model_id, prompt_version, COUNT(*) FROM parses GROUP BY 1, 2, 3"
+            ).fetchall()
+        return {(kind, model, prompt): n for kind, model, prompt, n in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+if __name__ == "__main__":
+    # python -m connectors.uog.transformers.course_transformer.course_helper_parsers.parse_cache --help
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S")
+    cli = argparse.ArgumentParser(description="Inspect or invalidate the LLM parse cache.")
+    cli.add_argument("--path", type=Path, default=None, help="Cache file (default: PARSE_CACHE_PATH or transformers/cache)")
+    cli.add_argument("--purge-model", metavar="MODEL_ID", help="Delete every entry produced by MODEL_ID")
+    args = cli.parse_args()
+
+    cache = ParseCache(args.path)
+    if args.purge_model:
+        cache.purge_model(args.purge_model)
+    for (kind, model, prompt), n in sorted(cache.entry_counts().items()):
+        print(f"{kind:<14} {model:<40} prompt v{prompt:<4} {n:>6} entries")
+    cache.close()
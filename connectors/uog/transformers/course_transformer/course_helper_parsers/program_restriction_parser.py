@@ -2,18 +2,42 @@
 
 # Need to switch over to the paid plan to use this in production- should be cheap overall though as small prompt + small input --> small ouput
 
+import copy
 import os
 import json
 import logging
+import threading
+import httpx
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable, Tuple
+
+from core.llm_backend import GeminiRestBackend, stub_url
+from core.llm_batch import BatchParser, DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY
+from core.rate_limit import get_limiter
+from core.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 # Your Gemini API Key should be stored securely as an environment variable
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
+# (a local stub server set by LLM_STUB_URL needs none)
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY") or ("stub" if stub_url() else None)
+GEMINI_API_URL = os.environ.get(
+    "GEMINI_API_URL",
+    f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
+)
+# Restriction strings packed into one request by `prime_program_restrictions`
+RESTRICTION_BATCH_SIZE = int(os.environ.get("RESTRICTION_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+# Batch requests (and single retries) in flight at once; LIMITER paces them
+RESTRICTION_BATCH_CONCURRENCY = int(os.environ.get("RESTRICTION_BATCH_CONCURRENCY", DEFAULT_CONCURRENCY))
+# Shared RPM / TPM limiter for every Gemini call, across worker threads and tasks
+LIMITER = get_limiter("gemini")
+BACKEND = GeminiRestBackend(GEMINI_API_URL, limiter=LIMITER, json_mode=True)
+# Bump when RESTRICTION_SYSTEM_PROMPT or the model changes what a string parses to
+PROMPT_VERSION = "1"
+
+# Marks the RAW_UNPARSED fallback of a failed call
+FAILURE_PREFIX = "RESTRICTION_PARSING_FAILED:"
 
 # The concise, targeted prompt for parsing program/status restrictions.
 RESTRICTION_SYSTEM_PROMPT = """You are a precise data extraction engine. Your sole task is to parse a `raw_restriction` string into a valid JSON object based on the `RequisiteExpression` schema.
@@ -38,6 +62,70 @@ Input: “{restriction_string}”
 """
 
 
+def _call_gemini(prompt: str) -> Tuple[str, Optional[int]]:
+    """Sends one prompt; returns the response text and the reported prompt token count."""
+    response = BACKEND.complete(prompt)
+    return response.text, response.prompt_tokens
+
+
+async def _call_gemini_async(prompt: str, http: httpx.AsyncClient) -> Tuple[str, Optional[int]]:
+    """`_call_gemini` over the run's shared httpx.AsyncClient."""
+    response = await BACKEND.acomplete(prompt, http)
+    return response.text, response.prompt_tokens
+
+
+def _validate_restriction(entry: Any) -> Optional[Dict[str, Any]]:
+    """One entry of a batched response: a RequisiteExpression, or {} for no rule."""
+    if entry == {}:
+        return None
+    if not isinstance(entry, dict) or not isinstance(entry.get("type"), str):
+        raise ValueError(f"not a RequisiteExpression: {str(entry)[:100]}")
+    return entry
+
+
+def _single_prompt(restrictions_string: str) -> str:
+    return f"{RESTRICTION_SYSTEM_PROMPT}\n\nInput: \"{restrictions_string}\""
+
+
+def _restriction_result(json_string: str) -> Optional[Dict[str, Any]]:
+    if not json_string.strip() or json_string.strip() == '{}':
+        return None
+    return json.loads(json_string)
+
+
+def _restriction_failure(restrictions_string: str) -> Dict[str, Any]:
+    return {"type": "RAW_UNPARSED", "value": f"{FAILURE_PREFIX} {restrictions_string}"}
+
+
+def _is_restriction_failure(result: Optional[Dict[str, Any]]) -> bool:
+    return isinstance(result, dict) and str(result.get("value", "")).startswith(FAILURE_PREFIX)
+
+
+# Successful results of batched and single requests, consulted before making a
+# single-string call, so each distinct string is parsed once. Failures are not
+# kept: the next course carrying the string tries again. SINGLE_FLIGHT makes
+# concurrent duplicates wait for the first one's call.
+_PRIMED: Dict[str, Optional[Dict[str, Any]]] = {}
+_PRIMED_LOCK = threading.Lock()
+SINGLE_FLIGHT = SingleFlight()
+
+
+def _primed(restrictions_string: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    with _PRIMED_LOCK:
+        return restrictions_string in _PRIMED, _PRIMED.get(restrictions_string)
+
+
+def _remember(restrictions_string: str, result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    with _PRIMED_LOCK:
+        _PRIMED[restrictions_string] = result
+    return result
+
+
+def _own_copy(result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Memoized and single-flight results are shared by every course with the string
+    return copy.deepcopy(result)
+
+
 def parse_program_restrictions(restrictions_string: Optional[str]) -> Optional[Dict[str, Any]]:
     """
     Parses a 'restrictions' string for program or status-based rules
@@ -52,32 +140,86 @@ def parse_program_restrictions(restrictions_string: Optional[str]) -> Optional[D
     if not restrictions_string or not restrictions_string.strip() or not GEMINI_API_KEY:
         return None
 
-    full_prompt = f"{RESTRICTION_SYSTEM_PROMPT}\n\nInput: \"{restrictions_string}\""
+    hit, result = _primed(restrictions_string)
+    if hit:
+        return _own_copy(result)
+    return _own_copy(SINGLE_FLIGHT.do(restrictions_string, lambda: _ask_gemini(restrictions_string)))
 
-    payload = {
-        "contents": [{"parts": [{"text": full_prompt}]}],
-        "generationConfig": {
-            "responseMimeType": "application/json",
-            "temperature": 0.0
-        }
-    }
 
+def _ask_gemini(restrictions_string: str) -> Optional[Dict[str, Any]]:
+    hit, result = _primed(restrictions_string)
+    if hit:
+        return result
     try:
-        response = requests.post(GEMINI_API_URL, json=payload, timeout=60)
-        response.raise_for_status()
-        result = response.json()
-        
-        json_string = result['candidates'][0]['content']['parts'][0]['text']
-        
-        if not json_string.strip() or json_string.strip() == '{}':
-            return None
-            
-        parsed_json = json.loads(json_string)
-        return parsed_json
+        json_string, _ = _call_gemini(_single_prompt(restrictions_string))
+        return _remember(restrictions_string, _restriction_result(json_string))
 
     except requests.exceptions.RequestException as e:
         logger.error(f"API call to Gemini failed: {e}")
     except (KeyError, IndexError, json.JSONDecodeError) as e:
         logger.error(f"Failed to parse Gemini response for input '{restrictions_string[:100]}...': {e}")
     
-    return {"type": "RAW_UNPARSED", "value": f"RESTRICTION_PARSING_FAILED: {restrictions_string}"}
+    return _restriction_failure(restrictions_string)
+
+
+async def parse_program_restrictions_async(restrictions_string: Optional[str],
+                                           http: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    """`parse_program_restrictions` for the asyncio engine, over a shared httpx.AsyncClient."""
+    if not restrictions_string or not restrictions_string.strip() or not GEMINI_API_KEY:
+        return None
+
+    hit, result = _primed(restrictions_string)
+    if hit:
+        return _own_copy(result)
+    return _own_copy(await SINGLE_FLIGHT.do_async(restrictions_string,
+                                                  lambda: _ask_gemini_async(restrictions_string, http)))
+
+
+async def _ask_gemini_async(restrictions_string: str, http: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    hit, result = _primed(restrictions_string)
+    if hit:
+        return result
+    try:
+        json_string, _ = await _call_gemini_async(_single_prompt(restrictions_string), http)
+        return _remember(restrictions_string, _restriction_result(json_string))
+
+    except httpx.HTTPError as e:
+        logger.error(f"API call to Gemini failed: {e}")
+    except (KeyError, IndexError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to parse Gemini response for input '{restrictions_string[:100]}...': {e}")
+
+    return _restriction_failure(restrictions_string)
+
+
+# Shared instructions for batched requests: the prompt without its single-input tail
+BATCH_PARSER = BatchParser(
+    instructions=RESTRICTION_SYSTEM_PROMPT.split("### Final Instruction")[0],
+    call=_call_gemini,
+    validate=_validate_restriction,
+    single=parse_program_restrictions,
+    batch_size=RESTRICTION_BATCH_SIZE,
+    label="Restriction batches",
+    concurrency=RESTRICTION_BATCH_CONCURRENCY
+)
+
+
+def prime_program_restrictions(restriction_strings: Iterable[Optional[str]]) -> int:
+    """
+    Parses many restriction strings up front, RESTRICTION_BATCH_SIZE per request, so
+    later `parse_program_restrictions` calls for them make no API call. Entries the
+    batch response gets wrong are retried one string at a time.
+
+    Returns:
+        The number of strings newly parsed.
+    """
+    if not GEMINI_API_KEY:
+        return 0
+    with _PRIMED_LOCK:
+        pending = [s for s in dict.fromkeys(restriction_strings)
+                   if s and s.strip() and s not in _PRIMED]
+    if not pending:
+        return 0
+    results = BATCH_PARSER.parse_all(pending)
+    with _PRIMED_LOCK:
+        _PRIMED.update((s, result) for s, result in results.items() if not _is_restriction_failure(result))
+    return len(results)
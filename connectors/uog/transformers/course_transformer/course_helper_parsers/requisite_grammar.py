@@ -0,0 +1,373 @@
+# transformer/course_transformer/course_helper_parsers/requisite_grammar.py
+
+import argparse
+import copy
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from lark import Lark, Transformer, Token
+from lark.exceptions import LarkError
+
+from .parse_cache import normalize_requisite_string
+
+logger = logging.getLogger(__name__)
+
+# Deterministic parser for the common requisite forms:
+#   "ACCT*1220", "A or B", "A, B and C", "1 of A, B, C", "(A or B), [C, (1 of D, E)]",
+#   "10.00 credits including A, (B or C)", "0.50 credits in Statistics at the 3000 level or above",
+#   "All Phase 2 courses".
+# Anything else (high-school requirements, grades, prose) fails to parse and is left to the model.
+GRAMMAR = r"""
+start: seq
+
+seq: (alt _SEP)* last
+?last: alt | n_of | including
+
+alt: atom (_OR atom)*
+?atom: course | group | credits | subject_alt | phase
+
+course: COURSE
+group: "(" seq ")" | "[" seq "]"
+phase: _PHASE NUMBER _COURSES
+
+credits: _MIN? NUMBER _CREDITS subject_clause?
+subject_clause: _IN _EITHER? SUBJECT _COURSES? level?
+              | level _IN SUBJECT _COURSES?
+subject_alt: SUBJECT _COURSES? level?
+level: _AT_THE NUMBER (_OR NUMBER)* _LEVEL
+
+including: credits _INCLUDING seq
+
+n_of: count _OF members
+count: NUMBER | _ONE
+members: member ((_SEP | _OR)? member)*
+?member: course | group | credits
+
+COURSE.3: /[A-Z]{2,5}\*\d{4}/
+NUMBER: /\d+(\.\d+)?/
+SUBJECT: /(?!(?:or|and|at|in|of|one|either|including|all)\b)[A-Za-z]+(?: (?!(?:Or|And|At|In|Courses)\b)[A-Z][A-Za-z]*)*/
+
+_SEP.2: /,(?!\s*(?:or|including)\b)\s*(?:and\b)?|;|\band\b/i
+_OR.2: /(?:,\s*)?\bor\b/i
+_INCLUDING.2: /,?\s*\bincluding\b\s*[,:]?/i
+_CREDITS.2: /credits?\b/i
+_MIN.2: /\b(?:(?:a\s+)?minimum\s+of|at\s+least|completion\s+of)\b/i
+_IN.2: /\bin\b/i
+_EITHER.2: /\beither\b/i
+_COURSES.2: /\bcourses\b/i
+_AT_THE.2: /\bat\s+the\b/i
+_LEVEL.2: /-?\s*level\b(?:\s+or\s+(?:higher|above)\b)?/i
+_PHASE.2: /\ball\s+phase\b/i
+_OF.2: /of\b/i
+_ONE.2: /\bone\b/i
+
+%import common.WS
+%ignore WS
+"""
+
+# Bump when GRAMMAR or the tree building below changes what a string parses to;
+# it is part of `main.parser_version()`, so stored transformed courses are recomputed.
+GRAMMAR_VERSION = "1"
+
+
+class GrammarReject(ValueError):
+    """Raised while building a tree the grammar accepted but the schema would not."""
+
+
+class _CreditRequirement:
+    """Credits node before its subject / level alternatives are expanded."""
+    __slots__ = ("credits", "subjects", "levels")
+
+    def __init__(self, credits: float, subjects: List[str], levels: List[int]):
+        self.credits = credits
+        self.subjects = subjects
+        self.levels = levels
+
+    def finish(self) -> Dict[str, Any]:
+        if not self.subjects:
+            if self.levels:
+                raise GrammarReject("level without a subject")
+            return {"type": "CREDITS", "credits": self.credits}
+        if self.levels:
+            nodes = [{"type": "SUBJECT_CREDITS_AT_LEVEL", "credits": self.credits, "subject": s, "level": lvl}
+                     for s in self.subjects for lvl in self.levels]
+        else:
+            nodes = [{"type": "SUBJECT_CREDITS", "credits": self.credits, "subject": s} for s in self.subjects]
+        return nodes[0] if len(nodes) == 1 else {"type": "OR", "expressions": nodes}
+
+
+def _finish(node: Any) -> Dict[str, Any]:
+    if isinstance(node, _CreditRequirement):
+        return node.finish()
+    if isinstance(node, tuple):
+        raise GrammarReject("subject without credits")
+    return node
+
+
+def _and(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return items[0] if len(items) == 1 else {"type": "AND", "expressions": items}
+
+
+def _courses_or_expressions(node: Dict[str, Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if all(item["type"] == "COURSE" for item in items):
+        node["courses"] = [item["courses"][0] for item in items]
+    else:
+        node["expressions"] = items
+    return node
+
+
+class _ToExpression(Transformer):
+    """Builds RequisiteExpression dicts bottom-up from the parse tree."""
+
+    def start(self, children):
+        return _and(children[0])
+
+    def seq(self, children):
+        return [_finish(c) for c in children]
+
+    def group(self, children):
+        return _and(children[0])
+
+    def course(self, children):
+        return {"type": "COURSE", "courses": [str(children[0])]}
+
+    def phase(self, children):
+        return {"type": "PHASE_REQUIREMENT", "phase": int(float(children[0]))}
+
+    def credits(self, children):
+        subjects, levels = children[1] if len(children) > 1 else ([], [])
+        return _CreditRequirement(float(children[0]), subjects, levels)
+
+    def subject_clause(self, children):
+        subject = next(str(c) for c in children if isinstance(c, Token))
+        levels = next((c for c in children if isinstance(c, list)), [])
+        return [subject], levels
+
+    def subject_alt(self, children):
+        return str(children[0]), (children[1] if len(children) > 1 else [])
+
+    def level(self, children):
+        return [int(float(c)) for c in children]
+
+    def alt(self, children):
+        atoms: List[Any] = []
+        for child in children:
+            if isinstance(child, tuple):
+                # "1.00 credits in MATH or STAT at the 2000 level": fold the bare subject
+                # into the preceding credits requirement
+                subject, levels = child
+                previous = atoms[-1] if atoms else None
+                if not isinstance(previous, _CreditRequirement) or not previous.subjects:
+                    raise GrammarReject(f"dangling subject '{subject}'")
+                previous.subjects.append(subject)
+                if levels and not previous.levels:
+                    previous.levels = levels
+                elif levels != previous.levels and levels:
+                    raise GrammarReject("conflicting levels")
+                continue
+            atoms.append(child)
+        nodes = [_finish(a) for a in atoms]
+        if len(nodes) == 1:
+            return nodes[0]
+        return _courses_or_expressions({"type": "OR"}, nodes)
+
+    def including(self, children):
+        return {"type": "AND", "expressions": [_finish(children[0]), *children[1]]}
+
+    def count(self, children):
+        if not children:
+            return 1
+        value = float(children[0])
+        if not value.is_integer():
+            raise GrammarReject(f"fractional count {value}")
+        return int(value)
+
+    def members(self, children):
+        members = [_finish(c) for c in children]
+        if len(members) == 1 and members[0]["type"] == "AND":
+            # "1 of (A, B, C)"
+            members = members[0]["expressions"]
+        return members
+
+    def n_of(self, children):
+        count, members = children
+        if not 1 <= count <= len(members):
+            raise GrammarReject(f"{count} of {len(members)} options")
+        return _courses_or_expressions({"type": "N_OF", "count": count}, members)
+
+
+_PARSER: Optional[Lark] = None
+_PARSER_LOCK = threading.Lock()
+
+
+def _get_parser() -> Lark:
+    global _PARSER
+    if _PARSER is None:
+        with _PARSER_LOCK:
+            if _PARSER is None:
+                _PARSER = Lark(GRAMMAR, parser="lalr", lexer="contextual", transformer=_ToExpression())
+    return _PARSER
+
+
+def validate_expression(node: Any) -> bool:
+    """Checks a tree against the RequisiteExpression rules in schemas/universal_course.json."""
+    if not isinstance(node, dict):
+        return False
+    kind = node.get("type")
+    if kind == "COURSE":
+        return len(node.get("courses") or []) == 1
+    if kind in ("AND", "OR", "N_OF"):
+        expressions, courses = node.get("expressions"), node.get("courses")
+        if kind == "N_OF" and not (isinstance(node.get("count"), int) and node["count"] >= 1):
+            return False
+        if courses is not None:
+            return kind != "AND" and len(courses) >= (2 if kind == "OR" else 1)
+        return bool(expressions) and all(validate_expression(e) for e in expressions)
+    if kind in ("CREDITS", "SUBJECT_CREDITS", "SUBJECT_CREDITS_AT_LEVEL"):
+        if not (isinstance(node.get("credits"), float) and node["credits"] >= 0):
+            return False
+        if kind == "CREDITS":
+            return True
+        if not node.get("subject"):
+            return False
+        return kind == "SUBJECT_CREDITS" or (isinstance(node.get("level"), int) and node["level"] >= 1000)
+    if kind == "PHASE_REQUIREMENT":
+        return isinstance(node.get("phase"), int) and node["phase"] >= 1
+    return False
+
+
+def parse_requisite(raw_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses a requisite string with the local grammar.
+
+    Args:
+        raw_text: The raw `requisites` string (boilerplate and whitespace are normalized here).
+
+    Returns:
+        A validated RequisiteExpression dict, or None when the string is not one of the
+        forms the grammar covers. Each call returns its own copy of the memoized tree.
+    """
+    return copy.deepcopy(_parse_cached(raw_text))
+
+
+@lru_cache(maxsize=8192)
+def _parse_cached(raw_text: str) -> Optional[Dict[str, Any]]:
+    text = normalize_requisite_string(raw_text).rstrip(" .;")
+    if not text:
+        return None
+    try:
+        tree = _get_parser().parse(text)
+    except (LarkError, GrammarReject):
+        return None
+    return tree if validate_expression(tree) else None
+
+
+class RequisiteGrammar:
+    """Counts how many lookups `parse_requisite` resolves. Safe to share across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, raw_text: str) -> Optional[Dict[str, Any]]:
+        result = parse_requisite(raw_text)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+
+# --- Coverage against the golden dataset ---
+
+def canonical(node: Any) -> Any:
+    """Comparable form of a tree: 'courses' shorthand expanded and same-type AND/OR nesting flattened."""
+    if not isinstance(node, dict):
+        return node
+    kind = node.get("type")
+    if kind in ("AND", "OR", "N_OF"):
+        children = [canonical(e) for e in node.get("expressions") or []]
+        children += [{"type": "COURSE", "courses": [c]} for c in node.get("courses") or []]
+        flat = []
+        for child in children:
+            if kind != "N_OF" and isinstance(child, dict) and child.get("type") == kind:
+                flat.extend(child["expressions"])
+            else:
+                flat.append(child)
+        if kind != "N_OF" and len(flat) == 1:
+            return flat[0]
+        result = {"type": kind, "expressions": flat}
+        if kind == "N_OF":
+            result["count"] = node.get("count")
+        return result
+    result = {k: v for k, v in node.items() if v is not None}
+    if "credits" in result:
+        result["credits"] = float(result["credits"])
+    return result
+
+
+def golden_coverage(path: Path) -> Dict[str, Any]:
+    """
+    Runs the grammar over every distinct requisite string in a golden JSONL file.
+
+    Returns:
+        Counts of distinct strings, grammar parses, parses matching the golden tree,
+        the mismatching strings, and the mean parse time in microseconds (uncached).
+    """
+    from core.artifacts import iter_ndjson
+
+    golden: Dict[str, Any] = {}
+    for entry in iter_ndjson(path):
+        raw = entry.get("raw_requisite")
+        if isinstance(raw, str):
+            golden.setdefault(normalize_requisite_string(raw), entry.get("prerequisites"))
+
+    _get_parser()
+    _parse_cached.cache_clear()
+    start = time.perf_counter()
+    parsed = {text: parse_requisite(text) for text in golden}
+    elapsed = time.perf_counter() - start
+
+    matched, mismatched = 0, []
+    for text, tree in parsed.items():
+        if tree is None:
+            continue
+        if canonical(tree) == canonical(golden[text]):
+            matched += 1
+        else:
+            mismatched.append(text)
+    return {
+        "strings": len(golden),
+        "parsed": sum(tree is not None for tree in parsed.values()),
+        "matched": matched,
+        "mismatched": mismatched,
+        "unparsed": [text for text, tree in parsed.items() if tree is None],
+        "us_per_string": 1e6 * elapsed / len(golden) if golden else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    # python -m connectors.uog.transformers.course_transformer.course_helper_parsers.requisite_grammar
+    from .golden_index import DEFAULT_GOLDEN_PATH
+
+    cli = argparse.ArgumentParser(description="Report the requisite grammar's coverage of the golden dataset.")
+    cli.add_argument("--golden", type=Path, default=DEFAULT_GOLDEN_PATH, help="Golden dataset JSONL")
+    cli.add_argument("--show", choices=("mismatched", "unparsed"), help="List the strings in one bucket")
+    args = cli.parse_args()
+
+    report = golden_coverage(args.golden)
+    n = report["strings"]
+    print(f"Distinct requisite strings: {n}")
+    print(f"Parsed by grammar:          {report['parsed']} ({100 * report['parsed'] / n:.1f}%)")
+    print(f"  matching golden tree:     {report['matched']} ({100 * report['matched'] / max(report['parsed'], 1):.1f}% of parsed)")
+    print(f"Left for the model:         {n - report['parsed']}")
+    print(f"Mean parse time:            {report['us_per_string']:.0f} us/string")
+    if args.show:
+        for text in report[args.show]:
+            print(f"  {text}")
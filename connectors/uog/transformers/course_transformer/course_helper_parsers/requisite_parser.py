@@ -1,50 +1,180 @@
 # transformer/course_transformer/course_helper_parsers/requisite_parser.py
 
+import copy
 import os
 import json
 import logging
-from openai import OpenAI
+import threading
+
+import httpx
+
+from core.llm_backend import OpenAIChatBackend
+from core.rate_limit import get_limiter
+from core.single_flight import SingleFlight
+from .golden_index import GoldenIndex
+from .parse_cache import ParseCache, normalize_requisite_string
+from .requisite_grammar import RequisiteGrammar
 
-client = OpenAI() 
 logger = logging.getLogger(__name__)
-# FINE_TUNED_MODEL_ID = "ft:gpt-3.5-turbo-0125:fodey::BkGY16gt" #openAI fine tuned modal api ID 
+# FINE_TUNED_MODEL_ID = "ft:gpt-3.5-turbo-0125:fodey::BkGY16gt" #openAI fine tuned modal api ID
 FINE_TUNED_MODEL_ID = "TEST"
+# Bump when the request sent to the model changes (message layout, normalization...)
+PROMPT_VERSION = "1"
+CACHE_KIND = "prerequisite"
+# Shared RPM / TPM limiter for every OpenAI call, across worker threads and tasks
+LIMITER = get_limiter("openai")
+# The fine-tuned model takes the bare requisite string as the user message
+BACKEND = OpenAIChatBackend(model=FINE_TUNED_MODEL_ID, limiter=LIMITER, json_mode=True)
+
+# Resolver tiers, tried in order: golden dataset -> local grammar -> persistent cache -> model.
+# All are shared by all worker threads.
+GOLDEN_INDEX = GoldenIndex()
+GRAMMAR = RequisiteGrammar()
+PARSE_CACHE = ParseCache()
+
+# This process's successful model answers by normalized string, so each distinct
+# string reaches the model once however many courses carry it. Failures are not
+# kept: the next course carrying the string tries again. SINGLE_FLIGHT makes
+# concurrent duplicates wait for the first one's call.
+_MODEL_RESULTS: dict = {}
+_MODEL_RESULTS_LOCK = threading.Lock()
+_MODEL_CALLS = 0
+SINGLE_FLIGHT = SingleFlight()
+
+def _resolve_locally(raw_prereq_text: str, course_code: str | None) -> tuple:
+    """Tries every tier but the model. Returns (resolved, result, normalized text)."""
+    prereq_text = normalize_requisite_string(raw_prereq_text)
+    hit, golden = GOLDEN_INDEX.lookup(raw_prereq_text, course_code, prereq_text)
+    if hit:
+        return True, golden, prereq_text
+
+    parsed = GRAMMAR.parse(prereq_text)
+    if parsed is not None:
+        return True, parsed, prereq_text
+
+    hit, cached = PARSE_CACHE.get(CACHE_KIND, FINE_TUNED_MODEL_ID, PROMPT_VERSION, prereq_text)
+    return hit, cached, prereq_text
+
+
+def _model_result(raw_prereq_text: str, prereq_text: str, assistant_response_str: str | None) -> tuple:
+    """Returns (succeeded, result); only a successful parse is cached."""
+    if assistant_response_str:
+        structured_prereqs = json.loads(assistant_response_str)
+        PARSE_CACHE.put(CACHE_KIND, FINE_TUNED_MODEL_ID, PROMPT_VERSION, prereq_text, structured_prereqs)
+        return True, structured_prereqs
+    else:
+        logger.warning(f"API response content was None for prerequisite: {raw_prereq_text}")
+        return False, {
+            "type": "RAW_UNPARSED",
+            "value": f"PARSING_FAILED: Model returned no content for '{raw_prereq_text}'"
+        }
+
+
+def _model_failure(raw_prereq_text: str, e: Exception) -> dict:
+    logger.error(f"Failed to parse prerequisite string due to API error: {e}")
+    logger.error(f"Offending prerequisite string: {raw_prereq_text}")
+    return {
+        "type": "RAW_UNPARSED",
+        "value": f"PARSING_FAILED: {raw_prereq_text}"
+    }
 
-def parse_prerequisite_string(raw_prereq_text: str) -> dict | None:
+
+def parse_prerequisite_string(raw_prereq_text: str, course_code: str | None = None) -> dict | None:
     """
-    Parses a raw prerequisite string into a structured JSON object
-    using the fine-tuned model.
+    Parses a raw prerequisite string into a structured JSON object.
+
+    The validated golden dataset is consulted first (preferring the entry for
+    `course_code`), then the deterministic grammar for the common forms, then
+    the persistent parse cache, and only then the fine-tuned model, whose
+    successful results are cached by normalized string, model ID and prompt version.
     """
     # --- UPDATED CHECK ---
     # This now checks for None, empty strings, and the literal string 'None' (case-insensitive).
     if not raw_prereq_text or raw_prereq_text.strip().lower() == 'none':
         return None
 
+    resolved, result, prereq_text = _resolve_locally(raw_prereq_text, course_code)
+    if resolved:
+        return result
+    # Remembered and single-flight answers are shared by every course with the string
+    return copy.deepcopy(SINGLE_FLIGHT.do(prereq_text, lambda: _ask_model(raw_prereq_text, prereq_text)))
+
+
+def _remembered(prereq_text: str) -> tuple:
+    with _MODEL_RESULTS_LOCK:
+        return prereq_text in _MODEL_RESULTS, _MODEL_RESULTS.get(prereq_text)
+
+
+def _remember(prereq_text: str, outcome: tuple) -> dict:
+    succeeded, result = outcome
+    if succeeded:
+        with _MODEL_RESULTS_LOCK:
+            _MODEL_RESULTS[prereq_text] = result
+    return result
+
+
+def _count_call() -> None:
+    global _MODEL_CALLS
+    with _MODEL_RESULTS_LOCK:
+        _MODEL_CALLS += 1
+
+
+def _ask_model(raw_prereq_text: str, prereq_text: str) -> dict:
+    hit, result = _remembered(prereq_text)
+    if hit:
+        return result
+    _count_call()
     try:
-        response = client.chat.completions.create(
-            model=FINE_TUNED_MODEL_ID,
-            messages=[
-                {"role": "user", "content": raw_prereq_text}
-            ],
-            temperature=0.0,
-            response_format={"type": "json_object"}
-        )
-
-        assistant_response_str = response.choices[0].message.content
-        if assistant_response_str:
-            structured_prereqs = json.loads(assistant_response_str)
-            return structured_prereqs
-        else:
-            logger.warning(f"API response content was None for prerequisite: {raw_prereq_text}")
-            return {
-                "type": "RAW_UNPARSED",
-                "value": f"PARSING_FAILED: Model returned no content for '{raw_prereq_text}'"
-            }
+        response = BACKEND.complete(prereq_text)
+        return _remember(prereq_text, _model_result(raw_prereq_text, prereq_text, response.text))
+    except Exception as e:
+        return _model_failure(raw_prereq_text, e)
+
+
+async def parse_prerequisite_string_async(raw_prereq_text: str, course_code: str | None,
+                                          http: httpx.AsyncClient) -> dict | None:
+    """`parse_prerequisite_string` for the asyncio engine; only the model call awaits."""
+    if not raw_prereq_text or raw_prereq_text.strip().lower() == 'none':
+        return None
 
+    resolved, result, prereq_text = _resolve_locally(raw_prereq_text, course_code)
+    if resolved:
+        return result
+    return copy.deepcopy(await SINGLE_FLIGHT.do_async(
+        prereq_text, lambda: _ask_model_async(raw_prereq_text, prereq_text, http)))
+
+
+async def _ask_model_async(raw_prereq_text: str, prereq_text: str, http: httpx.AsyncClient) -> dict:
+    hit, result = _remembered(prereq_text)
+    if hit:
+        return result
+    _count_call()
+    try:
+        response = await BACKEND.acomplete(prereq_text, http)
+        return _remember(prereq_text, _model_result(raw_prereq_text, prereq_text, response.text))
     except Exception as e:
-        logger.error(f"Failed to parse prerequisite string due to API error: {e}")
-        logger.error(f"Offending prerequisite string: {raw_prereq_text}")
-        return {
-            "type": "RAW_UNPARSED",
-            "value": f"PARSING_FAILED: {raw_prereq_text}"
-        }
\ No newline at end of file
+        return _model_failure(raw_prereq_text, e)
+
+
+def resolver_stats() -> dict:
+    """
+    Lookups resolved by each tier; every cache miss went to the model tier,
+    which sent each distinct string once, plus one more call per retry after
+    a failure (`model_calls`).
+    """
+    total = GOLDEN_INDEX.hits + GOLDEN_INDEX.misses
+    tiers = {"golden": GOLDEN_INDEX.hits, "grammar": GRAMMAR.hits, "cache": PARSE_CACHE.hits, "model": PARSE_CACHE.misses}
+    with _MODEL_RESULTS_LOCK:
+        model_calls = _MODEL_CALLS
+    return {
+        "lookups": total,
+        **{tier: {"count": n, "rate": n / total if total else 0.0} for tier, n in tiers.items()},
+        "model_calls": model_calls,
+    }
+
+def log_resolver_stats() -> None:
+    stats = resolver_stats()
+    tiers = ", ".join(f"{tier} {stats[tier]['count']} ({100 * stats[tier]['rate']:.1f}%)"
+                      for tier in ("golden", "grammar", "cache", "model"))
+    logger.info(f"Prerequisite resolver: {stats['lookups']} lookups -> {tiers}; "
+                f"{stats['model_calls']} model calls")
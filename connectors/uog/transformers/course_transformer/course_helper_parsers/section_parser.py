@@ -0,0 +1,218 @@
+# transformer/course_transformer/course_helper_parsers/section_parser.py
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
+
+# Day abbreviations used by Colleague ("M/W/F", "T/Th", "Sa") -> DayOfWeekEnum values
+DAY_CODES = {
+    "M": "Mon", "T": "Tue", "W": "Wed", "Th": "Thu", "F": "Fri", "Sa": "Sat", "Su": "Sun"
+}
+
+# Trailing location line (e.g. "Guelph\nLEC") -> Meeting.type
+MEETING_TYPES = {
+    "LEC": "Lecture",
+    "LAB": "Lab",
+    "SEM": "Seminar",
+    "TUT": "Tutorial",
+    "EXAM": "Exam",
+}
+
+# Trailing location lines that say how the section is delivered rather than where
+DELIVERY_MODES = {
+    "Distance Education": "Distance",
+    "Electronic": "Online",
+}
+
+# Start month -> termId season suffix ('2025FA')
+TERM_SUFFIX_BY_MONTH = {
+    **{m: "WI" for m in (1, 2, 3, 4)},
+    **{m: "SU" for m in (5, 6, 7, 8)},
+    **{m: "FA" for m in (9, 10, 11, 12)},
+}
+UNKNOWN_TERM_ID = "TBD"
+
+# "T/Th 11:30 AM - 12:50 PM" (days are occasionally missing)
+DAY_TIME_RE = re.compile(
+    r"^(?:(?P<days>[A-Za-z]+(?:/[A-Za-z]+)*)\s+)?"
+    r"(?P<start>\d{1,2}:\d{2}\s*[AP]M)\s*-\s*(?P<end>\d{1,2}:\d{2}\s*[AP]M)$"
+)
+TIME_RE = re.compile(r"^(?P<hour>\d{1,2}):(?P<minute>\d{2})\s*(?P<ampm>[AP]M)$")
+# "5/8/2025 - 8/13/2025"
+DATE_RANGE_RE = re.compile(r"(?P<start>\d{1,2}/\d{1,2}/\d{4})\s*-\s*(?P<end>\d{1,2}/\d{1,2}/\d{4})")
+# "66 / 250 / 0" -> available / capacity / waitlist
+SEATS_RE = re.compile(r"^(?P<available>\d+)\s*/\s*(?P<capacity>\d+)\s*/\s*(?P<waitlist>\d+)$")
+
+PLACEHOLDER_DAY_TIME = "Meeting Times TBD"
+
+
+def _to_24h(time_string: str) -> Optional[str]:
+    match = TIME_RE.match(time_string.strip())
+    if not match:
+        return None
+    hour = int(match.group("hour")) % 12
+    if match.group("ampm") == "PM":
+        hour += 12
+    return f"{hour:02d}:{match.group('minute')}"
+
+
+def _to_iso(mdy: str) -> Optional[str]:
+    month, day, year = (int(part) for part in mdy.split("/"))
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_day_time(day_time: str) -> Tuple[Optional[Tuple[str, ...]], Optional[str], Optional[str]]:
+    """
+    Parses the first line of a raw 'day_time' string.
+
+    Args:
+        day_time: e.g. "T/Th 11:30 AM - 12:50 PM\\n5/8/2025 - 8/13/2025", "TBD".
+
+    Returns:
+        (days, startTime, endTime) with HH:MM times; all None when the time is TBD.
+    """
+    first_line = day_time.split("\n", 1)[0].strip()
+    match = DAY_TIME_RE.match(first_line)
+    if not match:
+        return None, None, None
+    days = tuple(DAY_CODES[d] for d in (match.group("days") or "").split("/") if d in DAY_CODES)
+    return days or None, _to_24h(match.group("start")), _to_24h(match.group("end"))
+
+
+@lru_cache(maxsize=1024)
+def parse_dates(dates: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Parses a raw 'dates' string ("5/8/2025 - 8/13/2025") into ISO start/end dates.
+    Returns (None, None) for 'N/A' or anything unrecognized.
+    """
+    match = DATE_RANGE_RE.search(dates)
+    if not match:
+        return None, None
+    return _to_iso(match.group("start")), _to_iso(match.group("end"))
+
+
+@lru_cache(maxsize=1024)
+def parse_location(location: str) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    Splits a raw 'location' string ("Guelph\\nLEC") into its place and block label.
+
+    Returns:
+        (location, Meeting.type, Delivery or None).
+    """
+    lines = [ln.strip() for ln in location.split("\n") if ln.strip()]
+    if not lines:
+        return None, "Other", None
+    label = lines[-1] if len(lines) > 1 else ""
+    return lines[0], MEETING_TYPES.get(label, "Other"), DELIVERY_MODES.get(label)
+
+
+@lru_cache(maxsize=4096)
+def _parse_meeting_parts(day_time: str, dates: str, location: str) -> Tuple:
+    days, start_time, end_time = parse_day_time(day_time)
+    start_date, end_date = parse_dates(dates)
+    if start_date is None:
+        # Colleague also repeats the date range on the second day_time line
+        start_date, end_date = parse_dates(day_time)
+    place, meeting_type, delivery = parse_location(location)
+    return meeting_type, days, start_time, end_time, start_date, end_date, place, delivery
+
+
+def parse_meeting(source_meeting: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Transforms one source-clean meeting into a universal Meeting object.
+
+    Returns:
+        (meeting dict, delivery mode implied by its location label or None).
+    """
+    day_time = source_meeting.get("day_time") or ""
+    meeting_type, days, start_time, end_time, start_date, end_date, place, delivery = _parse_meeting_parts(
+        day_time, source_meeting.get("dates") or "", source_meeting.get("location") or ""
+    )
+    meeting = {
+        "type": meeting_type,
+        "dayOfWeek": list(days) if days else None,
+        "startTime": start_time,
+        "endTime": end_time,
+        "startDate": start_date,
+        "endDate": end_date,
+        "location": place,
+        "raw": day_time or None
+    }
+    return meeting, delivery
+
+
+def _infer_term_id(meetings: List[Dict[str, Any]]) -> str:
+    """Term of the earliest non-exam meeting start date, e.g. '2025SU'."""
+    starts = [m["startDate"] for m in meetings if m["startDate"] and m["type"] != "Exam"]
+    starts = starts or [m["startDate"] for m in meetings if m["startDate"]]
+    if not starts:
+        return UNKNOWN_TERM_ID
+    first = min(starts)
+    return f"{first[:4]}{TERM_SUFFIX_BY_MONTH[int(first[5:7])]}"
+
+
+def _parse_seats(seats: Optional[str]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    match = SEATS_RE.match((seats or "").strip())
+    if not match:
+        return None, None, None
+    available, capacity, waitlist = (int(match.group(g)) for g in ("available", "capacity", "waitlist"))
+    return capacity, max(capacity - available, 0), waitlist
+
+
+def parse_sections(source_sections: Optional[List[Dict[str, Any]]], course_code: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Transforms a course's source-clean sections into universal Section objects.
+
+    Args:
+        source_sections: The course's 'sections' list (section_code, section_name, seats, meetings).
+        course_code: The owning course code, e.g. "ACCT*1220".
+
+    Returns:
+        A list of Section dictionaries; the source section is kept under 'raw'.
+    """
+    if not source_sections:
+        return []
+
+    sections = []
+    for source_section in source_sections:
+        section_id = source_section.get("section_code") or ""
+        meetings, deliveries = [], set()
+        for source_meeting in source_section.get("meetings") or []:
+            if (source_meeting.get("day_time") or "") == PLACEHOLDER_DAY_TIME and not source_meeting.get("location"):
+                # Colleague's empty "Meeting Times TBD" row carries nothing to parse
+                continue
+            meeting, delivery = parse_meeting(source_meeting)
+            meetings.append(meeting)
+            if delivery:
+                deliveries.add(delivery)
+
+        if len(deliveries) > 1:
+            delivery_mode = "Hybrid"
+        elif deliveries:
+            delivery_mode = deliveries.pop()
+        elif any(m["location"] for m in meetings):
+            delivery_mode = "InPerson"
+        else:
+            delivery_mode = None
+
+        capacity, enrolled, waitlist = _parse_seats(source_section.get("seats"))
+        sections.append({
+            "sectionId": section_id,
+            "courseCode": course_code,
+            "termId": _infer_term_id(meetings),
+            "sectionCode": section_id.rsplit("*", 1)[-1] if section_id else None,
+            "status": None,
+            "capacity": capacity,
+            "enrolled": enrolled,
+            "waitlist": waitlist,
+            "delivery": delivery_mode,
+            "instructors": None,
+            "meetings": meetings,
+            "raw": source_section
+        })
+    return sections
@@ -1,20 +1,12 @@
 # transformer/course_transformer/course_helper_parsers/terms_offered_parser.py
 
-import re
 from typing import Dict, Any, Optional, List
 
-# Define the keywords we are looking for based on the universal schema.
-# This makes the parser easy to maintain.
-SEASONS = ["Winter", "Spring", "Summer", "Fall"]
-YEAR_PATTERNS = {
-    "All Years": "All",
-    "All": "All",
-    "Even": "Even",
-    "Odd": "Odd",
-    "Annually": "Annually",
-    "Biennially": "Biennially",
-    "Triennially": "Triennially"
-}
+# The keywords we are looking for live with the shared scanner, so the parsers
+# stay easy to maintain; re-exported for existing imports.
+from .text_scanner import SEASONS, YEAR_PATTERNS, scan_text, strip_spans
+
+_YEAR_ORDER = list(dict.fromkeys(YEAR_PATTERNS.values()))
 
 def parse_terms_offered(offered_string: Optional[str]) -> List[Dict[str, Any]]:
     """
@@ -30,32 +22,18 @@ def parse_terms_offered(offered_string: Optional[str]) -> List[Dict[str, Any]]:
     if not offered_string or offered_string.strip().lower() == 'n/a':
         return []
 
-    found_seasons = []
-    found_years = []
-    
-    # Create a copy of the string to find the note later.
-    note_text = offered_string
+    scanned = scan_text(offered_string)
 
-    # 2. Extract Seasons
-    for season in SEASONS:
-        if re.search(rf'\b{season}\b', offered_string, re.IGNORECASE):
-            found_seasons.append(season)
-            # Remove the found season from our note text copy
-            note_text = re.sub(rf'\b{season}\b', '', note_text, flags=re.IGNORECASE)
+    # 2. Extract Seasons, in SEASONS order
+    found_seasons = sorted({token.value for token in scanned.seasons}, key=SEASONS.index)
 
-    # 3. Extract Year Patterns
-    for pattern_text, pattern_enum in YEAR_PATTERNS.items():
-        if re.search(rf'\b{pattern_text}\b', offered_string, re.IGNORECASE):
-            if pattern_enum not in found_years:
-                found_years.append(pattern_enum)
-            # Remove the found year pattern from our note text copy
-            note_text = re.sub(rf'\b{pattern_text}\b', '', note_text, flags=re.IGNORECASE)
+    # 3. Extract Year Patterns, in YEAR_PATTERNS order
+    found_years = sorted({token.value for token in scanned.years}, key=_YEAR_ORDER.index)
 
-    # 4. Clean up the remaining text to create the note
-    
-    # --- FIX APPLIED HERE ---
-    # The updated regex now uses word boundaries (\b) to only match the whole word 'and'.
-    note_text = re.sub(r',|\band\b|&', '', note_text, flags=re.IGNORECASE)
+    # 4. The note is whatever is left once the seasons, years and
+    # separators (',', whole-word 'and', '&') are cut out
+    note_text = strip_spans(offered_string, [(token.start, token.end) for token in
+                                             scanned.seasons + scanned.years + scanned.separators])
     cleaned_note = note_text.strip() if note_text.strip() else None
 
     # 5. Construct the final object
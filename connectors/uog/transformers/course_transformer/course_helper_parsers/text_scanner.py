@@ -0,0 +1,129 @@
+# transformer/course_transformer/course_helper_parsers/text_scanner.py
+
+"""
+Single-pass scanner for the rule-based restriction and offering parsers.
+
+One precompiled pattern finds, left to right, every course code, antirequisite
+trigger phrase, season, year pattern and list separator in a string. The
+antirequisite and terms-offered parsers read their answers off the result, and
+text is stripped by slicing around token spans instead of one `re.sub` per
+code or keyword:
+
+    scanned = scan_text("ECON*2300. Restricted to BComm.")
+    scanned.codes            # (Token('code', 'ECON*2300', 0, 9),)
+    strip_spans(scanned.text, [extend_code_span(scanned.text, t) for t in scanned.codes])
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Tuple
+
+# A constant for the course code pattern for reusability.
+COURSE_CODE_REGEX = r'[A-Z]{2,5}\*\d{4}'
+
+# A list of phrases that reliably indicate an antirequisite relationship,
+# based on our analysis of the grouped_by_restrictions.json file.
+ANTIREQUISITE_TRIGGERS = [
+    "credit may be obtained for only one of",
+    "credit will not be given for",
+    "may not be taken for credit",
+    "not available to students with credit in",
+    "excluding"
+]
+
+# Define the keywords we are looking for based on the universal schema.
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+YEAR_PATTERNS = {
+    "All Years": "All",
+    "All": "All",
+    "Even": "Even",
+    "Odd": "Odd",
+    "Annually": "Annually",
+    "Biennially": "Biennially",
+    "Triennially": "Triennially"
+}
+
+_SEASONS_BY_LOWER = {season.lower(): season for season in SEASONS}
+_YEARS_BY_LOWER = {text.lower(): enum for text, enum in YEAR_PATTERNS.items()}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # Longest first, so "All Years" wins over "All" at the same position
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# Course codes are case-sensitive; every keyword group matches in any case.
+# Triggers match anywhere (like a substring test); keywords as whole words.
+_SCANNER = re.compile(
+    rf"(?P<code>{COURSE_CODE_REGEX})"
+    rf"|(?i:(?P<trigger>{_alternation(ANTIREQUISITE_TRIGGERS)})"
+    rf"|\b(?P<season>{_alternation(SEASONS)})\b"
+    rf"|\b(?P<year>{_alternation(YEAR_PATTERNS)})\b"
+    r"|(?P<separator>,|\band\b|&))"
+)
+# What `strip_antirequisites` removes after each code: whitespace and one '.' or ','
+_CODE_TAIL = re.compile(r'\s*[.,]?')
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+class ScannedText(NamedTuple):
+    text: str
+    codes: Tuple[Token, ...]
+    triggers: Tuple[Token, ...]
+    seasons: Tuple[Token, ...]
+    years: Tuple[Token, ...]
+    separators: Tuple[Token, ...]
+
+    @property
+    def starts_with_code(self) -> bool:
+        return bool(self.codes) and self.codes[0].start == 0
+
+
+@lru_cache(maxsize=4096)
+def scan_text(text: str) -> ScannedText:
+    """
+    Tokenizes `text` in one pass. Token values are canonical: season names
+    as in SEASONS, year tokens as their YEAR_PATTERNS enum, triggers lowercased.
+    """
+    found = {"code": [], "trigger": [], "season": [], "year": [], "separator": []}
+    for match in _SCANNER.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "trigger":
+            value = value.lower()
+        elif kind == "season":
+            value = _SEASONS_BY_LOWER[value.lower()]
+        elif kind == "year":
+            value = _YEARS_BY_LOWER[value.lower()]
+        found[kind].append(Token(kind, value, match.start(), match.end()))
+    return ScannedText(text, tuple(found["code"]), tuple(found["trigger"]), tuple(found["season"]),
+                       tuple(found["year"]), tuple(found["separator"]))
+
+
+def is_word_bounded(text: str, token: Token) -> bool:
+    """True when the token is a whole word (`\\b` on both sides) in `text`."""
+    before = text[token.start - 1] if token.start else " "
+    after = text[token.end] if token.end < len(text) else " "
+    return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+
+
+def extend_code_span(text: str, token: Token) -> Tuple[int, int]:
+    """The code's span plus the whitespace and '.' / ',' that follow it."""
+    return token.start, _CODE_TAIL.match(text, token.end).end()
+
+
+def strip_spans(text: str, spans: Iterable[Tuple[int, int]]) -> str:
+    """`text` with the given non-overlapping (start, end) spans cut out."""
+    pieces = []
+    position = 0
+    for start, end in sorted(spans):
+        pieces.append(text[position:start])
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces)
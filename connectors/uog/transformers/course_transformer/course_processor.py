@@ -1,18 +1,35 @@
 # transformer/course_transformer/course_processor.py
 
+import asyncio
 import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Any, Optional, List
 
+import httpx
+
 # --- UPDATED IMPORTS ---
-from .course_helper_parsers.requisite_parser import parse_prerequisite_string
+from .course_helper_parsers.requisite_parser import parse_prerequisite_string, parse_prerequisite_string_async
 from .course_helper_parsers.department_parser import parse_department
 from .course_helper_parsers.terms_offered_parser import parse_terms_offered
 from .course_helper_parsers.antirequisite_parser import parse_antirequisites
-from .course_helper_parsers.program_restriction_parser import parse_program_restrictions # <-- NEW
+from .course_helper_parsers.program_restriction_parser import parse_program_restrictions, parse_program_restrictions_async
+from .course_helper_parsers.section_parser import parse_sections
+from .course_helper_parsers.text_scanner import extend_code_span, is_word_bounded, scan_text, strip_spans
 
 logger = logging.getLogger(__name__)
 
+# Threads for the two remote parses of each course, shared by every course worker.
+# Each worker has at most two calls outstanding, so this is sized for
+# main.MAX_WORKERS (10) courses at once.
+REMOTE_PARSE_WORKERS = int(os.environ.get("REMOTE_PARSE_WORKERS", 20))
+REMOTE_PARSE_POOL = ThreadPoolExecutor(max_workers=REMOTE_PARSE_WORKERS, thread_name_prefix="remote-parse")
+# Bump when the rule-based parsing changes what a source course transforms into
+COURSE_TRANSFORM_VERSION = "1"
+# Values of the RAW_UNPARSED fallbacks the remote parsers return when a call fails
+FAILED_PARSE_PREFIXES = ("PARSING_FAILED:", "RESTRICTION_PARSING_FAILED:")
+
 # Other helper functions remain the same...
 def _parse_credits_from_string(credit_string: Optional[str]) -> Optional[float]:
     if not isinstance(credit_string, str): return None
@@ -24,78 +41,134 @@ def _parse_level_from_code(course_code: Optional[str]) -> Optional[int]:
     match = re.search(r'\*(\d)', course_code)
     return int(match.group(1)) * 1000 if match else None
 
-def _parse_sections(source_sections: Optional[List[Dict]]) -> List[Dict[str, Any]]:
-    if not source_sections: return []
-    return [{"sectionId": s.get("section_code"), "raw_data": s} for s in source_sections]
+def strip_antirequisites(restrictions_text: Optional[str], antireqs: List[str]) -> Optional[str]:
+    """Removes the found antirequisite codes (and trailing punctuation) from a restrictions string."""
+    if not antireqs or not restrictions_text:
+        return restrictions_text
+    # Cut the code spans the scanner already found (whole words only, each with
+    # its following whitespace and '.' / ','), rather than one regex per code
+    codes = set(antireqs)
+    spans = [extend_code_span(restrictions_text, token) for token in scan_text(restrictions_text).codes
+             if token.value in codes and is_word_bounded(restrictions_text, token)]
+    return strip_spans(restrictions_text, spans).strip()
+
+def filtered_restrictions_of(source_course: Dict[str, Any]) -> Optional[str]:
+    """The string `process_single_course` sends to the restriction parser for this course."""
+    restrictions_text = source_course.get("restrictions")
+    return strip_antirequisites(restrictions_text, parse_antirequisites(restrictions_text, source_course.get("code")))
+
+
+def _combine_prerequisites(course_prereqs: Optional[Dict[str, Any]],
+                           program_restrictions: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """ANDs the parsed `requisites` and `restrictions` expressions (either may be None)."""
+    final_prereqs = []
+    if course_prereqs:
+        final_prereqs.append(course_prereqs)
+    if program_restrictions:
+        final_prereqs.append(program_restrictions)
+
+    if len(final_prereqs) > 1:
+        return {"type": "AND", "expressions": final_prereqs}
+    elif len(final_prereqs) == 1:
+        return final_prereqs[0]
+    return None
+
+
+def has_failed_parse(universal_course: Dict[str, Any]) -> bool:
+    """True if a remote parse of this course failed and fell back to RAW_UNPARSED."""
+    stack = [universal_course.get("prerequisites")]
+    while stack:
+        node = stack.pop()
+        if not node:
+            continue
+        if node.get("type") == "RAW_UNPARSED" and str(node.get("value", "")).startswith(FAILED_PARSE_PREFIXES):
+            return True
+        stack.extend(node.get("expressions") or ())
+    return False
+
+
+def local_fields_of(source_course: Dict[str, Any]) -> Dict[str, Any]:
+    """One course's `course_columns.LOCAL_FIELDS`, computed record by record."""
+    return {
+        "department": parse_department(source_course.get("departments")),
+        "level": _parse_level_from_code(source_course.get("code")),
+        "credits": _parse_credits_from_string(source_course.get("credits")),
+        "termsOffered": parse_terms_offered(source_course.get("offered")),
+    }
+
+
+def _assemble_course(source_course: Dict[str, Any], antireqs: List[str],
+                     local_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Runs the local rule-based parsers into a universal course, leaving
+    `prerequisites` for the caller to fill in once the remote parses return.
+    `local_fields` are this course's row from `course_columns.local_course_fields`,
+    if the caller already computed them for the whole catalog.
+    """
+    course_code = source_course.get("code")
+    fields = local_fields if local_fields is not None else local_fields_of(source_course)
+    return {
+        "courseId": course_code,
+        "courseCode": course_code,
+        "title": source_course.get("name"),
+        "description": source_course.get("description"),
+        "department": fields["department"],
+        "level": fields["level"],
+        "credits": fields["credits"],
+        "prerequisites": None,
+        "corequisites": None,
+        "antirequisites": antireqs,
+        "crossListings": [],
+        "tags": [],
+        "termsOffered": fields["termsOffered"],
+        "courseStatus": "Active",
+        "sections": parse_sections(source_course.get("sections"), course_code)
+    }
 
 
 # --- MAIN WORKER FUNCTION ---
 
-def process_single_course(source_course: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def process_single_course(source_course: Dict[str, Any],
+                          local_fields: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
     """
     Transforms a single source-clean course object into the universal schema.
+
+    The two remote parses (requisites via OpenAI, restrictions via Gemini) are
+    independent, so both are dispatched to REMOTE_PARSE_POOL at once; the course
+    then takes about as long as the slower call rather than the sum of both.
+
+    They start only once the local parsers have succeeded, and both are waited
+    on to the end, so a failing course never leaves a remote parse in flight
+    with nothing collecting it (as in `process_single_course_async`).
+
+    `local_fields` is this course's row from `course_columns.local_course_fields`;
+    without it the deterministic fields are parsed here, one record at a time.
     """
     try:
         course_code = source_course.get("code")
-        
-        # --- 1. Parse all fields independently ---
-        
-        # Parse course-based prerequisites from the 'requisites' field
-        prereq_text = source_course.get("requisites")
-        course_prereqs = parse_prerequisite_string(prereq_text)
-
-        # Start processing the 'restrictions' field
         restrictions_text = source_course.get("restrictions")
-        
-        # --- 2. Implement the "Strip-and-Pass" logic ---
-        
+
+        # --- 1. Implement the "Strip-and-Pass" logic ---
+
         # Step A: Parse for antirequisites first from the original string
         antireqs = parse_antirequisites(restrictions_text, course_code)
-        
+
         # Step B: Filter the original string by removing the found antirequisites
         # This creates a cleaner string to send to the API
-        filtered_restrictions = restrictions_text
-        if antireqs and filtered_restrictions:
-            for code in antireqs:
-                # Use regex to remove the course code and potential following punctuation
-                filtered_restrictions = re.sub(rf'\b{re.escape(code)}\b\s*[.,]?', '', filtered_restrictions).strip()
-
-        # Step C: Parse the *filtered* string for program restrictions
-        program_restrictions = parse_program_restrictions(filtered_restrictions)
-        
-        # --- 3. Intelligently combine prerequisite results ---
-        final_prereqs = []
-        if course_prereqs:
-            final_prereqs.append(course_prereqs)
-        if program_restrictions:
-            final_prereqs.append(program_restrictions)
-
-        if len(final_prereqs) > 1:
-            prerequisite_obj = {"type": "AND", "expressions": final_prereqs}
-        elif len(final_prereqs) == 1:
-            prerequisite_obj = final_prereqs[0]
-        else:
-            prerequisite_obj = None
-
-        # --- 4. Assemble the final universal course object ---
-        universal_course = {
-            "courseId": course_code,
-            "courseCode": course_code,
-            "title": source_course.get("name"),
-            "description": source_course.get("description"),
-            "department": parse_department(source_course.get("departments")),
-            "level": _parse_level_from_code(course_code),
-            "credits": _parse_credits_from_string(source_course.get("credits")),
-            "prerequisites": prerequisite_obj,
-            "corequisites": None,
-            "antirequisites": antireqs,
-            "crossListings": [],
-            "tags": [],
-            "termsOffered": parse_terms_offered(source_course.get("offered")),
-            "courseStatus": "Active",
-            "sections": _parse_sections(source_course.get("sections"))
-        }
+        filtered_restrictions = strip_antirequisites(restrictions_text, antireqs)
+
+        # --- 2. Run the local parsers before any remote call is made ---
+        universal_course = _assemble_course(source_course, antireqs, local_fields)
+
+        # --- 3. Dispatch both remote parses and wait for both ---
+        prereq_future = REMOTE_PARSE_POOL.submit(parse_prerequisite_string, source_course.get("requisites"),
+                                                 course_code)
+        restrictions_future = REMOTE_PARSE_POOL.submit(parse_program_restrictions, filtered_restrictions)
+        wait([prereq_future, restrictions_future])
 
+        # --- 4. Intelligently combine prerequisite results ---
+        universal_course["prerequisites"] = _combine_prerequisites(prereq_future.result(),
+                                                                   restrictions_future.result())
         logger.info(f"Successfully processed course: {universal_course['courseCode']}")
         return universal_course
 
@@ -103,3 +176,40 @@ def process_single_course(source_course: Dict[str, Any]) -> Optional[Dict[str, A
         course_code = source_course.get('code', 'UNKNOWN')
         logger.error(f"Failed to process course {course_code} due to error: {e}", exc_info=True)
         return None
+
+
+async def process_single_course_async(source_course: Dict[str, Any], requisite_http: httpx.AsyncClient,
+                                      restriction_http: httpx.AsyncClient,
+                                      local_fields: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    `process_single_course` for the asyncio engine: both remote parses run
+    concurrently, each on its provider's shared httpx client.
+
+    They start only once the local parsers have succeeded, and both are awaited
+    to the end, so a failing course never leaves a remote parse running with
+    nothing awaiting it. (Cancelling one instead could cancel a single-flight
+    call other courses are waiting on.)
+    """
+    try:
+        course_code = source_course.get("code")
+        restrictions_text = source_course.get("restrictions")
+        antireqs = parse_antirequisites(restrictions_text, course_code)
+        filtered_restrictions = strip_antirequisites(restrictions_text, antireqs)
+        universal_course = _assemble_course(source_course, antireqs, local_fields)
+
+        results = await asyncio.gather(
+            parse_prerequisite_string_async(source_course.get("requisites"), course_code, requisite_http),
+            parse_program_restrictions_async(filtered_restrictions, restriction_http),
+            return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        course_prereqs, program_restrictions = results
+        universal_course["prerequisites"] = _combine_prerequisites(course_prereqs, program_restrictions)
+        logger.debug(f"Successfully processed course: {universal_course['courseCode']}")
+        return universal_course
+
+    except Exception as e:
+        course_code = source_course.get('code', 'UNKNOWN')
+        logger.error(f"Failed to process course {course_code} due to error: {e}", exc_info=True)
+        return None
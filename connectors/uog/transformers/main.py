@@ -1,15 +1,42 @@
 #!/usr/bin/env python3
 # transformer/main.py
 
+import asyncio
 import logging
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor
+import copy
+import os
+from pathlib import Path
+from collections import Counter
+from typing import List, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from itertools import islice, repeat
+
+import httpx
+
+from core.artifacts import iter_records
+from core.models.course import UniversalCourseSchema
+from core.models.program import UniversalProgramSchema
+from core.prerequisite_graph import PrerequisiteGraph
+from core.rate_limit import log_limiter_stats
+from core.result_spool import ResultSpool
+from core.schema_validation import ValidationReport, validate_batch, validate_stream
+from core.transform_store import TransformStore, source_hash
 
 # --- Real Imports ---
 # We now import the actual worker functions from the processor files.
-from .course_transformer.course_processor import process_single_course
-# The program processor will follow the same pattern once created.
-# from .program_transformer.program_processor import process_single_program
+from .course_transformer.course_processor import (
+    COURSE_TRANSFORM_VERSION, process_single_course, process_single_course_async, filtered_restrictions_of,
+    has_failed_parse
+)
+from .course_transformer.course_columns import local_course_fields
+from .course_transformer.course_helper_parsers import program_restriction_parser, requisite_parser
+from .course_transformer.course_helper_parsers.requisite_parser import log_resolver_stats
+from .course_transformer.course_helper_parsers.parse_cache import normalize_requisite_string
+from .course_transformer.course_helper_parsers.requisite_grammar import GRAMMAR_VERSION
+from .course_transformer.course_helper_parsers.program_restriction_parser import (
+    BATCH_PARSER as RESTRICTION_BATCHES, prime_program_restrictions
+)
+from .program_transformer.program_processor import build_course_index, process_single_program
 
 # --- Configuration ---
 logging.basicConfig(
@@ -22,46 +49,417 @@ logger = logging.getLogger(__name__)
 # This controls the number of concurrent API calls.
 # It can be tuned based on the API's rate limits.
 MAX_WORKERS = 10
+# Courses the asyncio engine processes at once; each has at most two remote calls
+# (requisites, restrictions) in flight, none of them holding a thread.
+MAX_IN_FLIGHT = int(os.environ.get("TRANSFORM_MAX_IN_FLIGHT", 64))
+# Share of transformed courses validated against UniversalCourseSchema after a run:
+# 1 checks every course, 0 turns validation off; trusted re-runs can sample (e.g. 0.1).
+VALIDATION_SAMPLE = float(os.environ.get("TRANSFORM_VALIDATION_SAMPLE", 1.0))
+# Transformed courses from earlier runs, by source-course hash (core.transform_store).
+# Unchanged courses are reused instead of re-parsed; TRANSFORM_INCREMENTAL=0
+# transforms every course (and still refreshes the store).
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent / "cache" / "transformed_courses.sqlite3"
+TRANSFORM_STORE = TransformStore(os.environ.get("TRANSFORM_STORE_PATH") or DEFAULT_STORE_PATH)
+INCREMENTAL = os.environ.get("TRANSFORM_INCREMENTAL", "1") != "0"
+# Source courses a streaming run reads, looks up and dispatches at a time
+STREAM_WINDOW = int(os.environ.get("TRANSFORM_STREAM_WINDOW", 500))
+# New results a streaming run writes to the store at a time, so an interrupted
+# run keeps what it finished
+STORE_FLUSH_EVERY = 100
 
 # --- Main Orchestration Functions ---
 # These functions now call the imported processors.
 
-def transform_courses_universal(source_courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def group_remote_strings(courses: List[Dict[str, Any]]) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
     """
-    Orchestrates the parallel transformation of a list of source-clean courses.
+    Groups courses by the strings their remote parses would send: the normalized
+    `requisites` string and the antirequisite-filtered `restrictions` string.
 
-    This function is designed to be called by an upstream connector.
+    Returns:
+        (requisite groups, restriction groups), each mapping a string to the codes
+        of the courses that carry it.
     """
-    logger.info(f"Starting universal transformation for {len(source_courses)} courses with {MAX_WORKERS} workers...")
-    transformed_courses = []
+    requisites: Dict[str, List[str]] = {}
+    restrictions: Dict[str, List[str]] = {}
+    for course in courses:
+        code = course.get("code")
+        raw = course.get("requisites")
+        if raw and raw.strip().lower() != "none":
+            requisites.setdefault(normalize_requisite_string(raw), []).append(code)
+        filtered = filtered_restrictions_of(course)
+        if filtered and filtered.strip():
+            restrictions.setdefault(filtered, []).append(code)
+    return requisites, restrictions
 
-    # The ThreadPoolExecutor now maps the REAL `process_single_course` function
-    # from your course_processor.py file across all the source courses.
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        results_iterator = executor.map(process_single_course, source_courses)
 
-        for result in results_iterator:
-            if result:
-                transformed_courses.append(result)
+def _group_and_prime(courses: List[Dict[str, Any]], batch_restrictions: bool) -> None:
+    """
+    Logs how many distinct strings the courses reduce to. Each is parsed once: the
+    parsers keep this run's answers and join concurrent duplicates to one call.
+    """
+    requisites, restrictions = group_remote_strings(courses)
+    logger.info(f"Dedup: {len(courses)} courses -> "
+                f"{len(requisites)} unique requisite strings (from {sum(map(len, requisites.values()))} courses), "
+                f"{len(restrictions)} unique restriction strings (from {sum(map(len, restrictions.values()))} courses)")
+    if batch_restrictions and prime_program_restrictions(restrictions):
+        RESTRICTION_BATCHES.log_stats()
+
+
+def validate_courses(courses: Iterable[Dict[str, Any]], sample: float = VALIDATION_SAMPLE) -> Optional[ValidationReport]:
+    """
+    Checks transformed courses against `UniversalCourseSchema` in batches
+    (`core.schema_validation`) and logs the error counts per field. A list is
+    validated as one batch; any other iterable (e.g. courses read back from an
+    artifact) is read and validated a window at a time.
+
+    Returns:
+        The report, or None when `sample` is 0 or there are no courses. Invalid
+        courses are reported, not dropped.
+    """
+    if sample <= 0:
+        return None
+    if isinstance(courses, list):
+        report = validate_batch(courses, UniversalCourseSchema, sample=sample, id_field="courseCode")
+    else:
+        report = validate_stream(courses, UniversalCourseSchema, sample=sample, id_field="courseCode")
+    if not report.checked:
+        return None
+    report.log("courses")
+    return report
+
+
+def validate_programs(programs: List[Dict[str, Any]], sample: float = VALIDATION_SAMPLE) -> Optional[ValidationReport]:
+    """`validate_courses` for transformed programs, against `UniversalProgramSchema`."""
+    if sample <= 0 or not programs:
+        return None
+    report = validate_batch(programs, UniversalProgramSchema, sample=sample, id_field="programId")
+    report.log("programs")
+    return report
+
+
+def parser_version() -> str:
+    """
+    Everything besides the source course that decides its transformed form: the
+    rule-based transform version, the golden dataset's contents, the requisite
+    grammar version and each remote parser's model and prompt version.
+    Stored courses from any other version are recomputed.
+    """
+    return (f"course:{COURSE_TRANSFORM_VERSION}"
+            f"|golden:{requisite_parser.GOLDEN_INDEX.digest()[:16]}"
+            f"|grammar:{GRAMMAR_VERSION}"
+            f"|requisites:{requisite_parser.FINE_TUNED_MODEL_ID}/{requisite_parser.PROMPT_VERSION}"
+            f"|restrictions:{program_restriction_parser.PROMPT_VERSION}")
+
+
+def _reuse_unchanged(courses: List[Dict[str, Any]], incremental: bool) -> Tuple[List[str], Dict[str, Any]]:
+    """(source hash per course, {hash: stored course} for those unchanged since an earlier run)."""
+    hashes = [source_hash(course) for course in courses]
+    reused = TRANSFORM_STORE.lookup(hashes, parser_version()) if incremental else {}
+    reused_count = sum(1 for key in hashes if key in reused)
+    logger.info(f"Incremental transform: {reused_count} courses reused, {len(hashes) - reused_count} recomputed")
+    return hashes, reused
+
+
+def _merge_and_store(courses: List[Dict[str, Any]], hashes: List[str], reused: Dict[str, Any],
+                     new_results: Iterable[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Puts reused and newly transformed courses back in input order, and stores
+    the new ones, except those whose remote parse failed, so they are retried.
+    `new_results` has one entry (None on failure) per course missing from `reused`.
+    """
+    new_results = iter(new_results)
+    merged = []
+    used = set()
+    to_store = []
+    for course, key in zip(courses, hashes):
+        if key in reused:
+            # Identical source courses each get their own copy
+            merged.append(copy.deepcopy(reused[key]) if key in used else reused[key])
+            used.add(key)
+            continue
+        result = next(new_results)
+        if result:
+            merged.append(result)
+            to_store.append((key, course.get("code"), result))
+    _store_results(to_store)
+    return merged
+
+
+def _store_results(entries: List[Tuple[str, Optional[str], Dict[str, Any]]]) -> None:
+    """Stores (source hash, code, course) entries, except courses whose remote parse failed."""
+    keep = [entry for entry in entries if not has_failed_parse(entry[2])]
+    if keep:
+        TRANSFORM_STORE.put_many(keep, parser_version())
+        logger.info(f"Transform store: {len(keep)} newly transformed courses stored")
+
+
+def build_prerequisite_graph(courses: Iterable[Dict[str, Any]]) -> PrerequisiteGraph:
+    """
+    Indexes transformed courses' prerequisite expressions as a graph
+    (`core.prerequisite_graph`) for "what does X unlock" / "what comes before Y"
+    queries, and logs its size and any prerequisite cycles.
+    """
+    graph = PrerequisiteGraph.from_courses(courses)
+    graph.log()
+    return graph
+
+
+class TransformedCourse(NamedTuple):
+    """One result of `iter_courses_universal`."""
+    index: int              # position in the source courses
+    source_hash: str        # `source_hash` of the source course
+    course: Dict[str, Any]  # the universal course
+
+
+def _windows(source_courses: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """(index, course) pairs, `size` at a time, read lazily from the input."""
+    indexed = enumerate(source_courses)
+    while True:
+        window = list(islice(indexed, size))
+        if not window:
+            return
+        yield window
+
+
+def iter_courses_universal(source_courses: Iterable[Dict[str, Any]], batch_restrictions: bool = True,
+                           incremental: bool = INCREMENTAL,
+                           skip: Optional[Callable[[int, str], bool]] = None,
+                           window: int = STREAM_WINDOW) -> Iterator[TransformedCourse]:
+    """
+    Streaming form of `transform_courses_universal`: yields each course as it
+    completes, so no result is held once the caller has taken it. Failed courses
+    are not yielded.
+
+    The input is read `window` courses at a time. Each window's reused courses are
+    looked up in the transform store and yielded at once. The rest are grouped,
+    primed and dispatched while the previous window's courses are still running.
+    Memory therefore depends on the window size, not on the catalog size.
 
+    `skip(index, source hash)` returning True leaves a course out, e.g. one an
+    interrupted run already wrote. New results go to the transform store every
+    STORE_FLUSH_EVERY courses and when the generator finishes or is closed;
+    closing it cancels the courses not yet started.
+    """
+    logger.info(f"Starting universal transformation with {MAX_WORKERS} workers, {window} courses at a time...")
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    futures: Dict[Future, Tuple[int, str, Optional[str]]] = {}
+    to_store: List[Tuple[str, Optional[str], Dict[str, Any]]] = []
+    counts = Counter()
+
+    def finished(done: Iterable[Future]) -> Iterator[TransformedCourse]:
+        nonlocal to_store
+        for future in done:
+            index, key, code = futures.pop(future)
+            result = future.result()
+            if not result:
+                continue
+            to_store.append((key, code, result))
+            if len(to_store) >= STORE_FLUSH_EVERY:
+                _store_results(to_store)
+                to_store = []
+            yield TransformedCourse(index, key, result)
+
+    try:
+        for chunk in _windows(source_courses, max(1, window)):
+            keyed = [(index, course, source_hash(course)) for index, course in chunk]
+            if skip is not None:
+                keyed = [entry for entry in keyed if not skip(entry[0], entry[2])]
+            counts["skipped"] += len(chunk) - len(keyed)
+            reused = TRANSFORM_STORE.lookup([key for _, _, key in keyed], parser_version()) if incremental else {}
+
+            # Identical source courses each get their own copy; the last one takes the stored dict
+            remaining = Counter(key for _, _, key in keyed if key in reused)
+            pending = []
+            for index, course, key in keyed:
+                if key not in reused:
+                    pending.append((index, course, key))
+                    continue
+                remaining[key] -= 1
+                counts["reused"] += 1
+                yield TransformedCourse(index, key, reused[key] if not remaining[key] else copy.deepcopy(reused[key]))
+
+            if pending:
+                courses = [course for _, course, _ in pending]
+                _group_and_prime(courses, batch_restrictions)
+                for (index, course, key), fields in zip(pending, local_course_fields(courses)):
+                    futures[executor.submit(process_single_course, course, fields)] = (index, key, course.get("code"))
+                counts["recomputed"] += len(pending)
+
+            # Keep at most one window running while the next one is read and primed
+            while len(futures) > window:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+
+        for future in as_completed(list(futures)):
+            yield from finished([future])
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        _store_results(to_store)
+        logger.info(f"Incremental transform: {counts['reused']} courses reused, {counts['recomputed']} recomputed"
+                    + (f", {counts['skipped']} skipped" if counts['skipped'] else ""))
+
+
+def transform_courses_universal(source_courses: Iterable[Dict[str, Any]], batch_restrictions: bool = True,
+                                incremental: bool = INCREMENTAL) -> List[Dict[str, Any]]:
+    """
+    Orchestrates the parallel transformation of source-clean courses.
+
+    This function is designed to be called by an upstream connector. `source_courses`
+    may be a list or a stream, e.g. the courses from
+    `subjects_with_courses_parser.iter_subject_courses`.
+
+    The courses are collected and grouped by their requisite and filtered
+    restriction strings first (`group_remote_strings`), and each distinct string
+    is parsed once however many courses carry it. With `batch_restrictions`, every
+    distinct restriction string is parsed in batched requests before the workers
+    start, so the workers make no per-course restriction calls.
+
+    The deterministic fields (department, level, credits, terms offered) are
+    computed for the whole catalog in one columnar pass (`local_course_fields`)
+    before dispatch, so the workers only do the per-record and LLM-dependent work.
+
+    With `incremental`, courses whose source hash and `parser_version()` match a
+    stored result (`TRANSFORM_STORE`) are reused, and only the rest are grouped,
+    parsed and dispatched. New results are stored for the next run.
+
+    The courses come from `iter_courses_universal` and are returned in input
+    order; `transform_courses_to_file` streams them to disk instead.
+    """
+    # The list is held anyway, so the whole catalog is grouped and primed as one window
+    source_courses = list(source_courses)
+    by_index = {item.index: item.course for item in iter_courses_universal(
+        source_courses, batch_restrictions, incremental, window=len(source_courses))}
+    transformed_courses = [by_index.pop(index) for index in sorted(by_index)]
     logger.info(f"Successfully transformed {len(transformed_courses)} out of {len(source_courses)} courses.")
+    log_resolver_stats()
+    log_limiter_stats()
+    validate_courses(transformed_courses)
+    return transformed_courses
+
+
+def transform_courses_to_file(source_courses: Iterable[Dict[str, Any]], out_path: Path,
+                              batch_restrictions: bool = True, incremental: bool = INCREMENTAL) -> int:
+    """
+    Transforms source-clean courses straight to `out_path` (a JSON array, or
+    NDJSON for .ndjson/.jsonl names) without keeping the results in memory.
+
+    Courses are appended to a spool next to the output
+    (`<name>.partial.ndjson`, `core.result_spool`) as they complete, with
+    periodic flushes. Each spool line carries the course's source hash. If the
+    run dies, the spool stays behind, and the next call for the same `out_path`
+    resumes from it: a position is skipped only if its spooled hash still
+    matches the input course there, so courses that were reordered, edited or
+    removed since are transformed again. Once every course is done, the matching
+    spool lines are merged in input order into `out_path`, written atomically,
+    and the spool is removed.
+
+    Returns:
+        The number of courses written.
+    """
+    out_path = Path(out_path)
+    spool = ResultSpool(out_path.with_name(f"{out_path.name}.partial.ndjson"))
+    done = spool.completed_keys()
+    kept: Set[int] = set()
+    written: Set[int] = set()
+
+    def already_done(index: int, key: str) -> bool:
+        if done.get(index) != key:
+            return False
+        kept.add(index)
+        return True
+
+    with spool:
+        for item in iter_courses_universal(source_courses, batch_restrictions, incremental, skip=already_done):
+            spool.write(item.index, item.course, key=item.source_hash)
+            written.add(item.index)
+    if len(done) > len(kept):
+        logger.warning(f"{len(done) - len(kept)} spooled courses no longer match the input; they were redone or dropped.")
+    count = spool.merge_to(out_path, indices=kept | written)
+    spool.remove()
+    logger.info(f"Wrote {count} transformed courses to {out_path} ({spool.written} this run).")
+    # Read back from the artifact, so courses kept from an interrupted run are checked too
+    validate_courses(iter_records(out_path))
+    log_resolver_stats()
+    log_limiter_stats()
+    return count
+
+
+async def transform_courses_universal_async(source_courses: Iterable[Dict[str, Any]],
+                                            max_in_flight: int = MAX_IN_FLIGHT, batch_restrictions: bool = True,
+                                            incremental: bool = INCREMENTAL) -> List[Dict[str, Any]]:
+    """
+    asyncio counterpart of `transform_courses_universal`.
+
+    Every course runs as a coroutine, with at most `max_in_flight` courses in
+    progress, so hundreds of model calls can be outstanding instead of
+    MAX_WORKERS. Each LLM backend gets its own httpx.AsyncClient for the run.
+    Results keep the input order; unchanged courses are reused as in the thread engine.
+
+    Usage: `asyncio.run(transform_courses_universal_async(courses))`.
+    """
+    courses = list(source_courses)
+    hashes, reused = await asyncio.to_thread(_reuse_unchanged, courses, incremental)
+    pending = [course for course, key in zip(courses, hashes) if key not in reused]
+    await asyncio.to_thread(_group_and_prime, pending, batch_restrictions)
+    local_fields = local_course_fields(pending)
+
+    logger.info(f"Starting async universal transformation of {len(pending)} courses, {max_in_flight} in flight...")
+    in_flight = asyncio.Semaphore(max_in_flight)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    # One pool per provider: httpcore rescans every queued request against every
+    # connection on each release, so one shared pool costs far more CPU than two
+    async with httpx.AsyncClient(limits=limits) as requisite_http, \
+            httpx.AsyncClient(limits=limits) as restriction_http:
+        async def run(course: Dict[str, Any], fields: Dict[str, Any]):
+            async with in_flight:
+                return await process_single_course_async(course, requisite_http, restriction_http, fields)
+
+        results = await asyncio.gather(*(run(course, fields) for course, fields in zip(pending, local_fields)))
+
+    transformed_courses = await asyncio.to_thread(_merge_and_store, courses, hashes, reused, results)
+    logger.info(f"Successfully transformed {len(transformed_courses)} out of {len(courses)} courses.")
+    log_resolver_stats()
+    log_limiter_stats()
+    await asyncio.to_thread(validate_courses, transformed_courses)
     return transformed_courses
 
 
-def transform_programs_universal(source_programs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def transform_programs_universal(source_programs: List[Dict[str, Any]], courses: Iterable[Dict[str, Any]] = (),
+                                 graph: Optional[PrerequisiteGraph] = None) -> List[Dict[str, Any]]:
     """
-    (This will be functional once program_processor.py is created)
-    Orchestrates the parallel transformation of a list of source-clean programs.
+    Orchestrates the parallel transformation of a list of source-clean programs
+    (`parse_programs_with_sections` output).
+
+    `courses` are the run's transformed universal courses. They are indexed by
+    code once (`build_course_index`) before dispatch, and every worker resolves
+    its course references and prerequisite map against that shared index, one
+    dict lookup per reference. Codes missing from the index keep the program's
+    own title and credits and are listed under `extensions.unresolvedCourses`.
+
+    `graph` is the run's `build_prerequisite_graph` result over the same courses;
+    it is built here if not given.
     """
-    logger.info(f"Starting universal transformation for {len(source_programs)} programs with {MAX_WORKERS} workers...")
+    courses = list(courses)
+    if graph is None:
+        graph = build_prerequisite_graph(courses)
+    course_index = build_course_index(courses, graph)
+    logger.info(f"Starting universal transformation for {len(source_programs)} programs with {MAX_WORKERS} workers "
+                f"({len(course_index)} courses indexed)...")
     transformed_programs = []
 
-    # This part will work once you create program_processor.py and uncomment the import
-    # with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-    #     results_iterator = executor.map(process_single_program, source_programs)
-    #     for result in results_iterator:
-    #         if result:
-    #             transformed_programs.append(result)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results_iterator = executor.map(process_single_program, source_programs, repeat(course_index))
+        for result in results_iterator:
+            if result:
+                transformed_programs.append(result)
 
+    references = sum(len(group["courses"]) for program in transformed_programs
+                     for group in program["requirementGroups"] or ())
+    unresolved = sum(len((program["extensions"] or {}).get("unresolvedCourses", ()))
+                     for program in transformed_programs)
     logger.info(f"Successfully transformed {len(transformed_programs)} out of {len(source_programs)} programs.")
+    logger.info(f"Program course references: {references}; not in the course index: {unresolved} "
+                f"(see each program's extensions.unresolvedCourses)")
+    validate_programs(transformed_programs)
     return transformed_programs
\ No newline at end of file
@@ -0,0 +1,187 @@
+# transformer/program_transformer/program_processor.py
+
+"""
+Worker for transforming a single source-clean program into the universal schema.
+
+Course references are resolved against a `CourseIndex` built once per run from
+the transformed courses: a dict from course code to the fields a program needs
+(id, title, credits and the course's direct prerequisites, read off the run's
+`core.prerequisite_graph.PrerequisiteGraph`). Each reference is then a single
+dict lookup, and each course's prerequisite tree is walked once, when the
+graph is built, rather than once per program listing it.
+
+    index = build_course_index(universal_courses, graph)
+    program = process_single_program(source_program, index)
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.prerequisite_graph import PrerequisiteGraph
+
+from .program_type_split import requirement_sections, split_program_types
+
+logger = logging.getLogger(__name__)
+
+# Leading overview paragraphs that name the owning unit, e.g.
+# "Department of Management, Gordon S. Lang School of Business and Economics"
+_DEPARTMENT_RE = re.compile(r"^(?:Department|School) of ")
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+class IndexedCourse(NamedTuple):
+    courseId: str
+    title: Optional[str]
+    credits: Optional[float]
+    # Codes of the courses named in the course's prerequisites, in first-seen order
+    prerequisites: Tuple[str, ...]
+
+
+CourseIndex = Dict[str, IndexedCourse]
+
+
+def build_course_index(courses: Iterable[Dict[str, Any]], graph: Optional[PrerequisiteGraph] = None) -> CourseIndex:
+    """
+    Indexes transformed (universal) courses by course code.
+
+    Args:
+        courses: Universal course dicts, e.g. the output of `transform_courses_universal`.
+        graph: The run's prerequisite graph over the same courses; built here if not given.
+
+    Returns:
+        {courseCode: IndexedCourse}. A code listed twice keeps its first course.
+    """
+    courses = list(courses)
+    if graph is None:
+        graph = PrerequisiteGraph.from_courses(courses)
+    index: CourseIndex = {}
+    for course in courses:
+        code = course.get("courseCode")
+        if code and code not in index:
+            index[code] = IndexedCourse(course.get("courseId") or code, course.get("title"),
+                                        course.get("credits"), tuple(graph.requires(code)))
+    return index
+
+
+def _slug(text: str) -> str:
+    return _SLUG_RE.sub("-", text.lower()).strip("-")
+
+
+def _program_code(calendar_url: Optional[str], name: str) -> str:
+    """The calendar's program abbreviation, the last word of its page slug (".../accounting-acct/" -> "ACCT")."""
+    page = (calendar_url or "").split("#")[0].rstrip("/").rsplit("/", 1)[-1]
+    return page.rsplit("-", 1)[-1].upper() if page else _slug(name).upper()
+
+
+def _department(paragraphs: List[str]) -> Optional[str]:
+    if paragraphs and _DEPARTMENT_RE.match(paragraphs[0]):
+        return paragraphs[0].split(",", 1)[0]
+    return None
+
+
+def _requirement_groups(section_name: str, section: Dict[str, Any], index: CourseIndex,
+                        unresolved: Dict[str, None]) -> List[Dict[str, Any]]:
+    """One group per term of the section's program sequence."""
+    groups = []
+    for term, items in section.get("program_sequence", {}).items():
+        courses = []
+        electives = []
+        for item in items:
+            code = item.get("course_code")
+            if not code:
+                electives.append(f"{item['credits']:g} credits of {item['title']}")
+                continue
+            course = index.get(code)
+            if course is None:
+                unresolved.setdefault(code, None)
+                courses.append({"courseId": code, "code": code, "title": item["title"], "credits": item["credits"]})
+            else:
+                courses.append({"courseId": course.courseId, "code": code,
+                                "title": course.title or item["title"],
+                                "credits": course.credits if course.credits is not None else item["credits"]})
+        credits = sum(item["credits"] for item in items)
+        groups.append({
+            "groupId": f"{_slug(section_name)}-{_slug(term)}",
+            "name": f"{section_name}: {term}",
+            "description": "; ".join(electives) or None,
+            "creditsMin": credits,
+            "creditsMax": credits,
+            "courses": courses,
+        })
+    return groups
+
+
+def process_single_program(source_program: Dict[str, Any], course_index: CourseIndex) -> Optional[Dict[str, Any]]:
+    """
+    Transforms a single source-clean program (`parse_programs_with_sections` output)
+    into the universal schema.
+
+    Args:
+        source_program: One cleaned program with its calendar sections.
+        course_index: The run's `build_course_index` result; read-only, so every
+            worker shares it.
+
+    Returns:
+        The universal program dict, or None if it could not be transformed.
+    """
+    try:
+        name = source_program.get("name")
+        sections = source_program.get("sections") or {}
+        program_types, primary = split_program_types(sections, source_program.get("degree"))
+        primary_section = sections.get(primary, {}) if primary else {}
+        overview = sections.get("Overview") or {}
+        paragraphs = overview.get("paragraphs") or []
+
+        groups: List[Dict[str, Any]] = []
+        notes: Dict[str, None] = {}
+        unresolved: Dict[str, None] = {}
+        primary_credits = 0.0
+        for section_name, section in requirement_sections(sections):
+            section_groups = _requirement_groups(section_name, section, course_index, unresolved)
+            if section_name == primary:
+                primary_credits = sum(group["creditsMin"] for group in section_groups)
+            groups.extend(section_groups)
+            for note in section.get("elective_options", []) + section.get("notes", []):
+                notes.setdefault(note, None)
+
+        summary = primary_section.get("credit_summary") or {}
+        # Without a credit summary, the credits the primary section's sequence lists
+        total_credits = summary.get("total_credits")
+        if total_credits is None:
+            total_credits = primary_credits
+
+        prerequisite_map = {}
+        for group in groups:
+            for ref in group["courses"]:
+                course = course_index.get(ref["code"])
+                if course is not None and course.prerequisites:
+                    prerequisite_map.setdefault(ref["code"], list(course.prerequisites))
+
+        if unresolved:
+            logger.debug(f"Program {name}: {len(unresolved)} course codes not in the course index")
+        return {
+            "programId": _slug(name),
+            "code": _program_code(source_program.get("calendar_url"), name),
+            "name": name,
+            "description": (primary_section.get("requirements") or {}).get("description") or None,
+            "url": source_program.get("calendar_url") or None,
+            "programTypes": program_types,
+            "degreeType": source_program.get("degree") or None,
+            "department": _department(paragraphs),
+            "totalCredits": float(total_credits),
+            "creditBreakdown": summary.get("breakdown") or None,
+            "overview": paragraphs or None,
+            "panels": [{"title": panel["header"], "bulletList": panel["content"].split("\n")}
+                       for panel in overview.get("collapsibles", [])] or None,
+            "requirementGroups": groups or None,
+            "prerequisiteMap": prerequisite_map or None,
+            "corequisiteMap": None,
+            "notes": list(notes) or None,
+            "extensions": {"unresolvedCourses": list(unresolved)} if unresolved else None,
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to process program {source_program.get('name', 'UNKNOWN')} due to error: {e}",
+                     exc_info=True)
+        return None
@@ -0,0 +1,57 @@
+# transformer/program_transformer/program_type_split.py
+
+"""
+Maps a source-clean program's calendar sections to universal program types.
+
+The calendar lays each offering of a program out as its own section ("Major",
+"Co-op", "Minor", ...). Each section becomes one `ProgramType`, and the first
+requirement section in calendar order is the program's primary one, whose
+credit summary stands for the program. Degree pages carry no requirement
+sections, so their type comes from the degree name instead.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.models.program import ProgramType
+
+# Calendar section name -> universal program type
+SECTION_TYPES: Dict[str, ProgramType] = {
+    "Major": ProgramType.Major,
+    "Minor": ProgramType.Minor,
+    "Co-op": ProgramType.Cooperative,
+    "Area of Concentration": ProgramType.Concentration,
+    "Certificate": ProgramType.Certificate,
+    "Diploma": ProgramType.Diploma,
+}
+
+# Degree-name prefix -> type, for programs without requirement sections
+DEGREE_TYPES: Tuple[Tuple[str, ProgramType], ...] = (
+    ("Minor", ProgramType.Minor),
+    ("Certificate", ProgramType.Certificate),
+    ("Diploma", ProgramType.Diploma),
+    ("Doctor", ProgramType.Doctoral),
+    ("Master", ProgramType.Masters),
+)
+
+
+def requirement_sections(sections: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """The (name, section) pairs that describe requirements, in calendar order."""
+    return [(name, section) for name, section in sections.items() if name in SECTION_TYPES]
+
+
+def split_program_types(sections: Dict[str, Any], degree: Optional[str]) -> Tuple[List[str], Optional[str]]:
+    """
+    Args:
+        sections: The program's cleaned calendar sections.
+        degree: The program's degree name, used when no section maps to a type.
+
+    Returns:
+        (program type values in calendar order, name of the primary section or None).
+    """
+    names = [name for name, _ in requirement_sections(sections)]
+    if names:
+        return [SECTION_TYPES[name].value for name in names], names[0]
+    for prefix, program_type in DEGREE_TYPES:
+        if degree and degree.startswith(prefix):
+            return [program_type.value], None
+    return [ProgramType.Major.value], None
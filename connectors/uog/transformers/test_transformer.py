@@ -1,17 +1,23 @@
 #!/usr/bin/env python3
 # D:\CourseMap\etl\connectors\uog\transformers\test_transformer.py
 
+# Run from the repo root: python -m connectors.uog.transformers.test_transformer
+
 import json
 import logging
 import re
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 from concurrent.futures import ThreadPoolExecutor
 
 # --- Import all real, implemented parsers ---
-from course_transformer.course_helper_parsers.department_parser import parse_department
-from course_transformer.course_helper_parsers.terms_offered_parser import parse_terms_offered
-from course_transformer.course_helper_parsers.antirequisite_parser import parse_antirequisites
+from connectors.uog.transformers.course_transformer.course_helper_parsers.department_parser import parse_department
+from connectors.uog.transformers.course_transformer.course_helper_parsers.terms_offered_parser import parse_terms_offered
+from connectors.uog.transformers.course_transformer.course_helper_parsers.antirequisite_parser import parse_antirequisites
+from connectors.uog.transformers.course_transformer.course_helper_parsers.section_parser import parse_sections
+from connectors.uog.extract.parsers.subjects_with_courses_parser import iter_raw_courses
+from core.artifacts import write_json
 # We do NOT import the Gemini parser, as we will simulate its output below.
 
 # --- Configuration ---
@@ -67,21 +73,17 @@ def load_golden_prerequisites(path: Path) -> Dict[str, Any]:
         logger.error(f"Failed to load Golden Prerequisite file: {e}")
     return prereq_lookup
 
-def load_source_courses(path: Path) -> List[Dict[str, Any]]:
-    """Loads and flattens the source course data."""
-    logger.info(f"Loading source course data from: {path}")
-    all_courses = []
+def load_source_courses(path: Path) -> Iterator[Dict[str, Any]]:
+    """Streams the source course data, flattened across subjects, one course at a time."""
+    logger.info(f"Streaming source course data from: {path}")
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            source_data_by_subject = json.load(f)
-            for subject_courses in source_data_by_subject.values():
-                all_courses.extend(subject_courses)
+        for _, course in iter_raw_courses(path):
+            yield course
     except Exception as e:
         logger.error(f"Failed to load source course data: {e}")
-    return all_courses
 
 
-# --- Local Helpers & Remaining Stubs ---
+# --- Local Helpers ---
 def _parse_credits_from_string(credit_string: Optional[str]) -> Optional[float]:
     if not isinstance(credit_string, str): return None
     match = re.search(r'\d+\.?\d*', credit_string)
@@ -92,11 +94,6 @@ def _parse_level_from_code(course_code: Optional[str]) -> Optional[int]:
     match = re.search(r'\*(\d)', course_code)
     return int(match.group(1)) * 1000 if match else None
 
-def _parse_sections(source_sections: Optional[List[Dict]]) -> List[Dict[str, Any]]:
-    """(STUB) This remains a stub for now."""
-    if not source_sections: return []
-    return [{"sectionId": s.get("section_code"), "raw_data": s} for s in source_sections]
-
 
 # --- UPDATED Worker Function for Testing ---
 def process_single_course_for_test(source_course: Dict[str, Any], prereq_lookup: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -156,7 +153,7 @@ def process_single_course_for_test(source_course: Dict[str, Any], prereq_lookup:
             "tags": [],
             "termsOffered": parse_terms_offered(source_course.get("offered")),
             "courseStatus": "Active",
-            "sections": _parse_sections(source_course.get("sections"))
+            "sections": parse_sections(source_course.get("sections"), course_code)
         }
         return universal_course
 
@@ -166,25 +163,25 @@ def process_single_course_for_test(source_course: Dict[str, Any], prereq_lookup:
 
 # --- Main Test Orchestration Logic ---
 if __name__ == "__main__":
-    all_source_courses = load_source_courses(RAW_DATA_PATH)
     golden_prereqs = load_golden_prerequisites(GOLDEN_PREREQS_PATH)
+    courses_to_process = islice(load_source_courses(RAW_DATA_PATH), 2500)
+
+    logger.info("Starting test transformation...")
+    transformed_courses = []
+    seen = 0
 
-    if not all_source_courses:
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results_iterator = executor.map(lambda course: process_single_course_for_test(course, golden_prereqs), courses_to_process)
+        for result in results_iterator:
+            seen += 1
+            if result:
+                transformed_courses.append(result)
+
+    if not seen:
         logger.error("No source courses loaded, exiting.")
     else:
-        courses_to_process = all_source_courses[:2500]
-        logger.info(f"Starting test transformation for {len(courses_to_process)} courses...")
-        transformed_courses = []
-        
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            results_iterator = executor.map(lambda course: process_single_course_for_test(course, golden_prereqs), courses_to_process)
-            for result in results_iterator:
-                if result:
-                    transformed_courses.append(result)
-
-        logger.info(f"Successfully transformed {len(transformed_courses)} courses.")
+        logger.info(f"Successfully transformed {len(transformed_courses)} out of {seen} courses.")
         logger.info(f"Saving output to {OUTPUT_PATH}")
-        with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-            json.dump(transformed_courses, f, indent=2, ensure_ascii=False)
+        write_json(OUTPUT_PATH, transformed_courses)
         
         logger.info("Test run complete.")
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# core/artifacts.py
+
+"""
+One place to read and write the pipeline's JSON artifacts.
+
+- Serialization goes through orjson when it is installed and falls back to
+  the standard library otherwise; pretty output is byte-identical to
+  `json.dumps(obj, ensure_ascii=False, indent=2)` either way.
+- Compression is chosen by suffix: `.gz` (gzip) or `.zst` (zstandard, optional
+  dependency), e.g. `programs_with_sections.json.zst`.
+- Two layouts: a single JSON document (`write_json` / `read_json`) and NDJSON,
+  one record per line (`write_ndjson` / `iter_ndjson`), picked by `.ndjson` or
+  `.jsonl` in the name. `write_records` streams an iterable into either layout
+  (`write_json_array` for the single document) without building a list.
+- Writes are atomic: data goes to a temp file in the target directory, is
+  fsynced, then renamed over the destination, so readers never see half a file.
+- Reads can stream: `iter_records` yields array items or NDJSON lines one at a
+  time, and `iter_object_arrays` walks `{key: [item, ...]}` documents without
+  holding more than one item in memory.
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PathLike = Union[str, Path]
+
+# Characters read per refill by the streaming decoder
+READ_CHUNK = 64 * 1024
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+
+# --- Serialization ---
+
+def dumps(obj: Any, pretty: bool = True, sort_keys: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (2-space indented when `pretty`)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# --- Files ---
+
+def compression_of(path: PathLike) -> Optional[str]:
+    suffix = Path(path).suffix
+    if suffix == '.gz':
+        return 'gzip'
+    if suffix == '.zst':
+        return 'zstd'
+    return None
+
+
+def is_ndjson(path: PathLike) -> bool:
+    name = Path(path).name
+    if compression_of(name):
+        name = name.rsplit('.', 1)[0]
+    return name.endswith(NDJSON_SUFFIXES)
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise ImportError("zstandard is required for .zst artifacts (pip install zstandard)")
+
+
+@contextmanager
+def _open_read(path: PathLike) -> Iterator[BinaryIO]:
+    kind = compression_of(path)
+    if kind == 'gzip':
+        with gzip.open(path, 'rb') as f:
+            yield f
+    elif kind == 'zstd':
+        _require_zstd()
+        with open(path, 'rb') as raw, zstandard.ZstdDecompressor().stream_reader(raw) as f:
+            yield f
+    else:
+        with open(path, 'rb') as f:
+            yield f
+
+
+@contextmanager
+def _open_atomic(path: PathLike) -> Iterator[BinaryIO]:
+    """Binary writer that replaces `path` only once everything was written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            kind = compression_of(path)
+            if kind == 'gzip':
+                with gzip.GzipFile(filename=path.name, mode='wb', fileobj=raw, compresslevel=GZIP_LEVEL) as f:
+                    yield f
+            elif kind == 'zstd':
+                _require_zstd()
+                with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False) as f:
+                    yield f
+            else:
+                yield raw
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def write_json(path: PathLike, obj: Any, pretty: bool = True, sort_keys: bool = False) -> Path:
+    """Atomically write one JSON document (compressed by suffix)."""
+    with _open_atomic(path) as f:
+        f.write(dumps(obj, pretty=pretty, sort_keys=sort_keys))
+    return Path(path)
+
+
+def read_json(path: PathLike) -> Any:
+    with _open_read(path) as f:
+        return loads(f.read())
+
+
+def write_ndjson(path: PathLike, records: Iterable[Any]) -> int:
+    """Atomically write records one per line, consuming `records` lazily. Returns the count."""
+    count = 0
+    with _open_atomic(path) as f:
+        for record in records:
+            f.write(dumps(record, pretty=False))
+            f.write(b'\n')
+            count += 1
+    return count
+
+
+def write_json_array(path: PathLike, records: Iterable[Any], pretty: bool = True) -> int:
+    """
+    Atomically write records as one JSON array, consuming `records` lazily.
+    The bytes match `write_json(path, list(records), pretty)`. Returns the count.
+    """
+    count = 0
+    with _open_atomic(path) as f:
+        for record in records:
+            f.write(b',' if count else b'[')
+            if pretty:
+                # Raw newlines in a pretty dump are all structural (strings escape theirs)
+                f.write(b'\n  ' + dumps(record).replace(b'\n', b'\n  '))
+            else:
+                f.write(dumps(record, pretty=False))
+            count += 1
+        f.write((b'\n]' if pretty else b']') if count else b'[]')
+    return count
+
+
+def write_records(path: PathLike, records: Iterable[Any]) -> int:
+    """`write_ndjson` for .ndjson/.jsonl names, `write_json_array` otherwise; both stream."""
+    if is_ndjson(path):
+        return write_ndjson(path, records)
+    return write_json_array(path, records)
+
+
+def iter_ndjson(path: PathLike) -> Iterator[Any]:
+    with _open_read(path) as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def write_artifact(path: PathLike, obj: Any) -> Path:
+    """`write_ndjson` for .ndjson/.jsonl names, `write_json` otherwise."""
+    if is_ndjson(path):
+        write_ndjson(path, obj)
+        return Path(path)
+    return write_json(path, obj)
+
+
+def read_artifact(path: PathLike) -> Any:
+    """`list(iter_ndjson)` for .ndjson/.jsonl names, `read_json` otherwise."""
+    if is_ndjson(path):
+        return list(iter_ndjson(path))
+    return read_json(path)
+
+
+# --- Streaming reads of single-document JSON ---
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER_END = _WHITESPACE + ',]}'
+
+
+class _StreamReader:
+    """Minimal incremental JSON reader over a text stream: just enough to walk
+    arrays and `{key: [value, ...]}` objects one value at a time."""
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.fp.read(READ_CHUNK)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def take(self, expected: str) -> str:
+        ch = self.peek()
+        if ch not in expected:
+            raise ValueError(f"Expected one of {expected!r} in JSON stream, got {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value runs past the buffer; read more and retry
+                if not self._fill():
+                    raise
+                continue
+            if (isinstance(obj, (int, float)) and not isinstance(obj, bool)
+                    and (end == len(self.buf) or self.buf[end] not in _NUMBER_END)
+                    and self._fill()):
+                # A bare number may have been cut at the buffer edge ("1." of "1.5")
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self) -> Iterator[Any]:
+        self.take('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.take(',]') == ']':
+                return
+
+
+@contextmanager
+def _open_text(path: PathLike) -> Iterator[TextIO]:
+    with _open_read(path) as f:
+        text = io.TextIOWrapper(f, encoding='utf-8')
+        try:
+            yield text
+        finally:
+            text.detach()
+
+
+def iter_records(path: PathLike) -> Iterator[Any]:
+    """Stream the items of a top-level JSON array, or the lines of an NDJSON file."""
+    if is_ndjson(path):
+        yield from iter_ndjson(path)
+        return
+    with _open_text(path) as fp:
+        yield from _StreamReader(fp).array_items()
+
+
+def iter_object_arrays(path: PathLike) -> Iterator[Tuple[str, Iterator[Any]]]:
+    """
+    Stream a `{key: [item, ...], ...}` document as (key, item iterator) pairs in
+    file order. Each item iterator must be consumed (or is skipped) before the
+    next key is read; keys with empty lists are still yielded.
+    """
+    with _open_text(path) as fp:
+        reader = _StreamReader(fp)
+        reader.take('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.take(':')
+            items = reader.array_items()
+            yield key, items
+            for _ in items:
+                pass
+            if reader.take(',}') == '}':
+                return
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# core/llm_backend.py
+
+"""
+One interface for every LLM call site, sync and async.
+
+    backend = OpenAIChatBackend(model="ft:gpt-3.5-turbo-...")
+    response = backend.complete(prompt)                  # LLMResponse(text, prompt_tokens, total_tokens)
+    response = await backend.acomplete(prompt, http)     # http: the run's shared httpx.AsyncClient
+
+Adapters:
+
+- `OpenAIChatBackend`: OpenAI chat completions, and any OpenAI-compatible
+  endpoint (OpenRouter: `base_url=OPENROUTER_BASE_URL`).
+- `GeminiRestBackend`: Gemini `generateContent` over plain HTTP.
+- `GenAIBackend`: Gemini through the `google-genai` SDK.
+
+Every backend builds its SDK / HTTP client once and reuses it. Each call is
+paced and retried by the backend's `core.rate_limit` limiter, and the token
+reservation is settled with the usage the response reports.
+
+Setting `LLM_STUB_URL` (e.g. to a `benchmarks.stub_llm_server`) points every
+adapter at that server instead, so the whole pipeline runs with no network.
+"""
+import os
+import threading
+import weakref
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type
+
+import httpx
+import requests
+
+from core.llm_batch import estimate_tokens
+from core.rate_limit import RateLimiter, call_with_retry, call_with_retry_async, get_limiter
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Tokens reserved for a reply until the response reports its real usage
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 200
+REQUEST_TIMEOUT_SECONDS = 60
+
+
+def stub_url() -> Optional[str]:
+    """The local stub server every backend talks to instead, if LLM_STUB_URL is set."""
+    url = os.environ.get("LLM_STUB_URL")
+    return url.rstrip("/") if url else None
+
+
+class LLMResponse(NamedTuple):
+    text: str
+    prompt_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+
+
+class LLMBackend:
+    """
+    Base class: subclasses implement `_send` / `_asend` for one request; this
+    class reserves rate-limit capacity, retries, and settles token usage.
+
+    Args:
+        limiter: The provider's shared limiter.
+        expected_output_tokens: Reply tokens reserved up front.
+    """
+    # Transport errors worth retrying, besides 429 / 5xx responses
+    retry_on: Tuple[Type[BaseException], ...] = ()
+
+    def __init__(self, limiter: RateLimiter, expected_output_tokens: int = DEFAULT_EXPECTED_OUTPUT_TOKENS):
+        self.limiter = limiter
+        self.expected_output_tokens = expected_output_tokens
+
+    def _reserve(self, prompt: str) -> int:
+        return estimate_tokens(prompt) + self.expected_output_tokens
+
+    def complete(self, prompt: str, role: str = "user") -> LLMResponse:
+        tokens = self._reserve(prompt)
+        response = call_with_retry(self.limiter, lambda: self._send(prompt, role),
+                                   tokens=tokens, retry_on=self.retry_on)
+        self.limiter.settle(tokens, response.total_tokens)
+        return response
+
+    async def acomplete(self, prompt: str, http: httpx.AsyncClient, role: str = "user") -> LLMResponse:
+        tokens = self._reserve(prompt)
+        response = await call_with_retry_async(self.limiter, lambda: self._asend(prompt, role, http),
+                                               tokens=tokens, retry_on=self.retry_on)
+        self.limiter.settle(tokens, response.total_tokens)
+        return response
+
+    def _send(self, prompt: str, role: str) -> LLMResponse:
+        raise NotImplementedError
+
+    async def _asend(self, prompt: str, role: str, http: httpx.AsyncClient) -> LLMResponse:
+        raise NotImplementedError
+
+
+class OpenAIChatBackend(LLMBackend):
+    """
+    Chat completions through the `openai` SDK, with SDK retries off (the limiter retries).
+
+    Args:
+        model: Model ID.
+        base_url / api_key: Default to the SDK's env vars (OPENAI_BASE_URL / OPENAI_API_KEY).
+        json_mode: Ask for a JSON object response.
+        max_tokens: Reply cap, if any.
+    """
+
+    def __init__(self, model: str, limiter: Optional[RateLimiter] = None, base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, json_mode: bool = True, temperature: float = 0.0,
+                 max_tokens: Optional[int] = None, **kwargs):
+        super().__init__(limiter or get_limiter("openai"), **kwargs)
+        import openai
+
+        self.retry_on = (openai.APIConnectionError,)
+        self.model = model
+        self.base_url = f"{stub_url()}/v1" if stub_url() else base_url
+        self.api_key = "stub" if stub_url() else api_key
+        self.json_mode = json_mode
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self._client = None
+        self._lock = threading.Lock()
+        # One AsyncOpenAI per run's httpx.AsyncClient (async clients belong to one event loop)
+        self._async_clients: "weakref.WeakKeyDictionary[httpx.AsyncClient, Any]" = weakref.WeakKeyDictionary()
+
+    def _request(self, prompt: str, role: str) -> Dict[str, Any]:
+        request = dict(model=self.model, messages=[{"role": role, "content": prompt}], temperature=self.temperature)
+        if self.json_mode:
+            request["response_format"] = {"type": "json_object"}
+        if self.max_tokens:
+            request["max_tokens"] = self.max_tokens
+        return request
+
+    @staticmethod
+    def _response(completion) -> LLMResponse:
+        usage = completion.usage
+        return LLMResponse(completion.choices[0].message.content or "",
+                           usage.prompt_tokens if usage else None, usage.total_tokens if usage else None)
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(base_url=self.base_url, api_key=self.api_key, max_retries=0)
+            return self._client
+
+    def async_client(self, http: httpx.AsyncClient):
+        with self._lock:
+            client = self._async_clients.get(http)
+            if client is None:
+                from openai import AsyncOpenAI
+                client = self._async_clients[http] = AsyncOpenAI(
+                    base_url=self.base_url, api_key=self.api_key, max_retries=0, http_client=http)
+            return client
+
+    def _send(self, prompt: str, role: str) -> LLMResponse:
+        return self._response(self.client().chat.completions.create(**self._request(prompt, role)))
+
+    async def _asend(self, prompt: str, role: str, http: httpx.AsyncClient) -> LLMResponse:
+        completion = await self.async_client(http).chat.completions.create(**self._request(prompt, role))
+        return self._response(completion)
+
+
+class GeminiRestBackend(LLMBackend):
+    """
+    Gemini `generateContent` over HTTP: a pooled `requests.Session` for sync
+    calls, the run's httpx.AsyncClient for async ones.
+
+    Args:
+        url: Full endpoint URL, including `?key=...`.
+    """
+    retry_on = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, httpx.TransportError)
+
+    def __init__(self, url: str, limiter: Optional[RateLimiter] = None, json_mode: bool = True,
+                 temperature: float = 0.0, **kwargs):
+        super().__init__(limiter or get_limiter("gemini"), **kwargs)
+        self.url = f"{stub_url()}/v1beta/models/stub:generateContent" if stub_url() else url
+        self.json_mode = json_mode
+        self.temperature = temperature
+        self._session = requests.Session()
+
+    def _payload(self, prompt: str) -> Dict[str, Any]:
+        config: Dict[str, Any] = {"temperature": self.temperature}
+        if self.json_mode:
+            config["responseMimeType"] = "application/json"
+        return {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": config}
+
+    @staticmethod
+    def _response(result: Dict[str, Any]) -> LLMResponse:
+        usage = result.get("usageMetadata", {})
+        return LLMResponse(result['candidates'][0]['content']['parts'][0]['text'],
+                           usage.get("promptTokenCount"), usage.get("totalTokenCount"))
+
+    def _send(self, prompt: str, role: str) -> LLMResponse:
+        response = self._session.post(self.url, json=self._payload(prompt), timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return self._response(response.json())
+
+    async def _asend(self, prompt: str, role: str, http: httpx.AsyncClient) -> LLMResponse:
+        response = await http.post(self.url, json=self._payload(prompt), timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return self._response(response.json())
+
+
+class GenAIBackend(LLMBackend):
+    """
+    Gemini through the `google-genai` SDK, with one `genai.Client` for all calls.
+
+    Args:
+        model: Model name, e.g. "gemini-2.5-flash-lite-preview-06-17".
+        api_key: Defaults to GEMINI_API_KEY.
+    """
+
+    def __init__(self, model: str, limiter: Optional[RateLimiter] = None, api_key: Optional[str] = None,
+                 json_mode: bool = True, **kwargs):
+        super().__init__(limiter or get_limiter("gemini"), **kwargs)
+        self.model = model
+        self.api_key = api_key
+        self.json_mode = json_mode
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google import genai
+
+                api_key = self.api_key or os.getenv("GEMINI_API_KEY")
+                if stub_url():
+                    self._client = genai.Client(api_key=api_key or "stub",
+                                                http_options={"base_url": stub_url()})
+                else:
+                    if not api_key:
+                        raise ValueError("GEMINI_API_KEY environment variable is not set.")
+                    self._client = genai.Client(api_key=api_key)
+            return self._client
+
+    def _config(self) -> Optional[Dict[str, Any]]:
+        return {"response_mime_type": "application/json"} if self.json_mode else None
+
+    @staticmethod
+    def _response(result) -> LLMResponse:
+        usage = getattr(result, "usage_metadata", None)
+        return LLMResponse(result.text or "", getattr(usage, "prompt_token_count", None),
+                           getattr(usage, "total_token_count", None))
+
+    def _send(self, prompt: str, role: str) -> LLMResponse:
+        return self._response(self.client().models.generate_content(
+            model=self.model, contents=prompt, config=self._config()))
+
+    async def _asend(self, prompt: str, role: str, http: httpx.AsyncClient) -> LLMResponse:
+        return self._response(await self.client().aio.models.generate_content(
+            model=self.model, contents=prompt, config=self._config()))
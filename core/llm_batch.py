@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# core/llm_batch.py
+
+"""
+Pack many strings into one LLM request.
+
+Single-string prompts resend the full instructions with every input, so for a
+long prompt (the restriction prompt, `OLLAMA/prompt-gen3.txt`) the
+instructions are nearly all of the tokens. `BatchParser` sends N inputs per
+request as a keyed JSON object and asks for a keyed JSON object back:
+
+    {"1": "<input>", "2": "<input>", ...}  ->  {"1": <output>, "2": <output>, ...}
+
+- Each returned entry is validated on its own; one bad entry does not sink
+  the batch.
+- Entries that are missing, invalid, or lost with a failed request are
+  retried one string per call through the caller's single-string parser.
+- Batches, and then the retries, are sent `concurrency` at a time. The
+  transport's shared rate limiter paces them, so a run waits for about
+  N / (batch_size * concurrency) round-trips instead of N / batch_size.
+- Calls, retries and prompt tokens are counted, so the saving is visible in
+  the logs.
+
+The transport is a plain `call(prompt) -> (text, prompt_tokens)` function, so a
+stub can stand in for the real endpoint in tests.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 25
+# Requests in flight at once (batches, then single retries)
+DEFAULT_CONCURRENCY = 8
+# Rough chars-per-token ratio, used when the endpoint does not report usage
+CHARS_PER_TOKEN = 4
+
+BATCH_INSTRUCTIONS = """### Batch Input
+The inputs below are a JSON object mapping an id to one input string. Parse every
+input independently, following all of the rules above exactly as for a single input.
+Respond with ONE JSON object that maps each id to the JSON output for that input
+(use {{}} where an input contains no rule). Include every id and nothing else.
+
+Inputs: {inputs}
+"""
+
+# call(prompt) -> (response text, prompt tokens or None)
+CallFn = Callable[[str], Tuple[str, Optional[int]]]
+# validate(entry) -> cleaned entry; raises ValueError (or KeyError / TypeError) when invalid
+ValidateFn = Callable[[Any], Any]
+# single(input) -> parsed result, the existing one-string-per-call path
+SingleFn = Callable[[str], Any]
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def build_batch_prompt(instructions: str, inputs: Dict[str, str]) -> str:
+    """Shared instructions followed by one keyed JSON object of inputs."""
+    keyed = json.dumps(inputs, ensure_ascii=False)
+    return f"{instructions.rstrip()}\n\n{BATCH_INSTRUCTIONS.format(inputs=keyed)}"
+
+
+def parse_batch_response(text: str, keys: Iterable[str]) -> Dict[str, Any]:
+    """Decodes a keyed response; keys absent from the response are simply missing."""
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object keyed by input id, got {type(data).__name__}")
+    return {key: data[key] for key in keys if key in data}
+
+
+class BatchParser:
+    """
+    Parses strings N per request, validating each entry and retrying failures singly.
+
+    Args:
+        instructions: The prompt's shared instructions, without its single-input tail.
+        call: Sends a prompt, returns (text, prompt tokens or None).
+        validate: Checks / cleans one entry of the keyed response.
+        single: Fallback parser for one string (used for retries).
+        batch_size: Inputs per request.
+        concurrency: Requests in flight at once; `call` and `single` must be thread-safe.
+    """
+
+    def __init__(self, instructions: str, call: CallFn, validate: ValidateFn, single: SingleFn,
+                 batch_size: int = DEFAULT_BATCH_SIZE, label: str = "LLM batch",
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        self.instructions = instructions
+        self.call = call
+        self.validate = validate
+        self.single = single
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.label = label
+        self._lock = threading.Lock()
+        self.strings = 0
+        self.batch_calls = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+
+    def _send(self, chunk: List[str]) -> Dict[str, Any]:
+        inputs = {str(i): text for i, text in enumerate(chunk, 1)}
+        prompt = build_batch_prompt(self.instructions, inputs)
+        text, prompt_tokens = self.call(prompt)
+        with self._lock:
+            self.batch_calls += 1
+            self.prompt_tokens += prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt)
+        return parse_batch_response(text, inputs)
+
+    def _parse_chunk(self, chunk: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """Sends one batch. Returns (validated results, strings to retry singly)."""
+        try:
+            entries = self._send(chunk)
+        except Exception as e:
+            logger.warning(f"{self.label}: request for {len(chunk)} inputs failed ({e}); retrying individually")
+            return {}, list(chunk)
+        results: Dict[str, Any] = {}
+        failed: List[str] = []
+        for i, text in enumerate(chunk, 1):
+            key = str(i)
+            try:
+                results[text] = self.validate(entries[key])
+            except (KeyError, TypeError, ValueError) as e:
+                logger.debug(f"{self.label}: entry {key} invalid ({e}): {text[:80]}")
+                failed.append(text)
+        return results, failed
+
+    def parse_all(self, strings: Iterable[str]) -> Dict[str, Any]:
+        """
+        Parses every distinct string.
+
+        Returns:
+            A dict mapping each input string to its validated result (or the single
+            parser's result for entries that had to be retried).
+        """
+        unique = list(dict.fromkeys(strings))
+        chunks = [unique[start:start + self.batch_size] for start in range(0, len(unique), self.batch_size)]
+        results: Dict[str, Any] = {}
+        failed: List[str] = []
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for chunk_results, chunk_failed in executor.map(self._parse_chunk, chunks):
+                results.update(chunk_results)
+                failed.extend(chunk_failed)
+            results.update(zip(failed, executor.map(self.single, failed)))
+
+        with self._lock:
+            self.strings += len(unique)
+            self.retries += len(failed)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strings": self.strings,
+            "calls": self.batch_calls + self.retries,
+            "batch_calls": self.batch_calls,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+        }
+
+    def log_stats(self) -> None:
+        s = self.stats()
+        logger.info(f"{self.label}: {s['strings']} strings in {s['calls']} calls "
+                    f"({s['batch_calls']} batched, {s['retries']} single retries), "
+                    f"~{s['prompt_tokens']} batched prompt tokens")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# core/prerequisite_graph.py
+
+"""
+Course prerequisite graph over universal courses, with precomputed closures.
+
+    graph = PrerequisiteGraph.from_courses(courses)
+    graph.requires("ACCT*3330")               # direct prerequisites
+    graph.all_requirements("ACCT*3330")       # everything required before it
+    graph.all_unlocked("ACCT*1220")           # everything it leads to
+    graph.is_required_before("ACCT*1220", "ACCT*3330")
+    graph.cycles                              # [["A*1000", "B*1000"], ...]
+
+- Edges come from each course's `prerequisites` expression: codes in COURSE,
+  OR and N_OF nodes and the course of MIN_GRADE nodes are requirements (an OR
+  alternative counts, so closures are an upper bound on what a student needs);
+  EXCLUDE_COURSE codes are kept as exclusions and are not followed by closures.
+- Course codes get dense integer ids (catalog courses first, then codes only
+  referenced). Forward and reverse adjacency are stored as CSR `array('i')`
+  pairs: one offsets array and one flat targets array per direction.
+- Transitive closures are bitsets (Python ints, bit i = course id i), computed
+  once over the strongly connected components in topological order, so a
+  closure is the OR of its neighbours' closures. Membership is a shift and a
+  mask; listing a closure decodes its set bits.
+- Strongly connected components with more than one course, or a course that
+  requires itself, are reported as cycles.
+"""
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Node types whose `courses` are requirements / exclusions
+REQUIRING_TYPES = frozenset({"COURSE", "OR", "N_OF"})
+EXCLUDING_TYPES = frozenset({"EXCLUDE_COURSE"})
+
+
+def requisite_edges(expression: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    (required codes, excluded codes) named in a requisite expression, each in
+    first-seen order (left to right through nested expressions).
+    """
+    required: Dict[str, None] = {}
+    excluded: Dict[str, None] = {}
+    stack = [expression] if expression else []
+    while stack:
+        node = stack.pop()
+        kind = node.get("type")
+        if kind in REQUIRING_TYPES:
+            for code in node.get("courses") or ():
+                required.setdefault(code, None)
+        elif kind in EXCLUDING_TYPES:
+            for code in node.get("courses") or ():
+                excluded.setdefault(code, None)
+        elif kind == "MIN_GRADE" and node.get("course"):
+            required.setdefault(node["course"], None)
+        # Reversed, so nested expressions are visited left to right
+        stack.extend(reversed(node.get("expressions") or ()))
+    return tuple(required), tuple(excluded)
+
+
+def _csr(adjacency: Sequence[Sequence[int]]) -> Tuple[array, array]:
+    """(offsets, targets): node i's neighbours are targets[offsets[i]:offsets[i + 1]]."""
+    offsets = array("i", [0])
+    targets = array("i")
+    for neighbours in adjacency:
+        targets.extend(neighbours)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def _strongly_connected(offsets: array, targets: array) -> List[List[int]]:
+    """Tarjan's algorithm, iteratively. Components come out sinks first."""
+    count = len(offsets) - 1
+    index = [-1] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+    for root in range(count):
+        if index[root] >= 0:
+            continue
+        # (node, position of the next neighbour to visit)
+        work = [(root, offsets[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, position = work[-1]
+            if position < offsets[node + 1]:
+                work[-1] = (node, position + 1)
+                child = targets[position]
+                if index[child] < 0:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, offsets[child]))
+                elif on_stack[child]:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def _closures(offsets: array, targets: array, components: Iterable[List[int]], count: int) -> List[int]:
+    """Reachability bitsets, given components in an order where successors come first."""
+    closure = [0] * count
+    for component in components:
+        bits = 0
+        for node in component:
+            for position in range(offsets[node], offsets[node + 1]):
+                child = targets[position]
+                bits |= (1 << child) | closure[child]
+        # Every member of a component reaches the same set (itself included, if cyclic)
+        for node in component:
+            closure[node] = bits
+    return closure
+
+
+class PrerequisiteGraph:
+    """Read-only prerequisite graph; build it with `from_courses`."""
+
+    def __init__(self, codes: List[str], catalog_size: int, required: List[Sequence[int]],
+                 excluded: List[Sequence[int]]):
+        self.codes = codes
+        self.ids: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+        # Ids below this belong to catalog courses; the rest are only referenced
+        self.catalog_size = catalog_size
+        self._requires = _csr(required)
+        self._excludes = _csr(excluded)
+        unlocks: List[List[int]] = [[] for _ in codes]
+        for course, prerequisites in enumerate(required):
+            for prerequisite in prerequisites:
+                unlocks[prerequisite].append(course)
+        self._unlocks = _csr(unlocks)
+
+        components = _strongly_connected(*self._requires)
+        self._requirement_bits = _closures(*self._requires, components, len(codes))
+        # Topological order of the forward graph is sinks-first for the reverse one
+        self._unlocked_bits = _closures(*self._unlocks, reversed(components), len(codes))
+        self.cycles: List[List[str]] = [
+            sorted(codes[node] for node in component) for component in components
+            if len(component) > 1 or self._requirement_bits[component[0]] >> component[0] & 1
+        ]
+
+    @classmethod
+    def from_courses(cls, courses: Iterable[Dict[str, Any]]) -> "PrerequisiteGraph":
+        """
+        Args:
+            courses: Universal course dicts (`courseCode`, `prerequisites`). A code
+                listed twice keeps its first course.
+
+        Returns:
+            The graph, closures and cycles included.
+        """
+        edges: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        for course in courses:
+            code = course.get("courseCode")
+            if code and code not in edges:
+                edges[code] = requisite_edges(course.get("prerequisites"))
+
+        codes = list(edges)
+        ids = {code: i for i, code in enumerate(codes)}
+        catalog_size = len(codes)
+
+        def id_of(code: str) -> int:
+            if code not in ids:
+                ids[code] = len(codes)
+                codes.append(code)
+            return ids[code]
+
+        required = [[id_of(c) for c in edges[code][0]] for code in codes[:catalog_size]]
+        excluded = [[id_of(c) for c in edges[code][1]] for code in codes[:catalog_size]]
+        # Referenced-only codes have no edges of their own
+        required.extend([] for _ in range(len(codes) - catalog_size))
+        excluded.extend([] for _ in range(len(codes) - catalog_size))
+        return cls(codes, catalog_size, required, excluded)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.ids
+
+    def _neighbours(self, csr: Tuple[array, array], code: str) -> List[str]:
+        node = self.ids.get(code)
+        if node is None:
+            return []
+        offsets, targets = csr
+        return [self.codes[target] for target in targets[offsets[node]:offsets[node + 1]]]
+
+    def _decode(self, bits: int) -> List[str]:
+        found = []
+        while bits:
+            lowest = bits & -bits
+            found.append(self.codes[lowest.bit_length() - 1])
+            bits ^= lowest
+        return found
+
+    def requires(self, code: str) -> List[str]:
+        """Direct prerequisites of `code`, in expression order."""
+        return self._neighbours(self._requires, code)
+
+    def unlocks(self, code: str) -> List[str]:
+        """Courses that list `code` directly as a prerequisite."""
+        return self._neighbours(self._unlocks, code)
+
+    def excludes(self, code: str) -> List[str]:
+        """Codes in `code`'s EXCLUDE_COURSE nodes."""
+        return self._neighbours(self._excludes, code)
+
+    def requirement_bits(self, code: str) -> int:
+        """The bitset of everything required before `code` (bit i = `codes[i]`)."""
+        node = self.ids.get(code)
+        return self._requirement_bits[node] if node is not None else 0
+
+    def unlocked_bits(self, code: str) -> int:
+        """The bitset of everything `code` leads to (bit i = `codes[i]`)."""
+        node = self.ids.get(code)
+        return self._unlocked_bits[node] if node is not None else 0
+
+    def all_requirements(self, code: str) -> List[str]:
+        """Every course required, directly or transitively, before `code`, by id."""
+        return self._decode(self.requirement_bits(code))
+
+    def all_unlocked(self, code: str) -> List[str]:
+        """Every course `code` is required for, directly or transitively, by id."""
+        return self._decode(self.unlocked_bits(code))
+
+    def is_required_before(self, prerequisite: str, course: str) -> bool:
+        node = self.ids.get(prerequisite)
+        return node is not None and bool(self.requirement_bits(course) >> node & 1)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "courses": self.catalog_size,
+            "referenced_only": len(self.codes) - self.catalog_size,
+            "requirement_edges": len(self._requires[1]),
+            "exclusion_edges": len(self._excludes[1]),
+            "cycles": len(self.cycles),
+        }
+
+    def log(self) -> None:
+        stats = self.stats()
+        logger.info(f"Prerequisite graph: {stats['courses']} courses (+{stats['referenced_only']} referenced only), "
+                    f"{stats['requirement_edges']} requirement edges, {stats['exclusion_edges']} exclusions")
+        for cycle in self.cycles:
+            logger.warning(f"Prerequisite cycle among: {', '.join(cycle)}")
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# core/rate_limit.py
+
+"""
+Shared requests-per-minute / tokens-per-minute limiter and retry layer for LLM calls.
+
+Every caller of a provider shares one `RateLimiter` (`get_limiter("openai")`),
+so worker threads and asyncio tasks draw from the same two token buckets:
+
+    limiter = get_limiter("gemini")
+    text = call_with_retry(limiter, lambda: post(prompt), tokens=estimate_tokens(prompt))
+    text = await call_with_retry_async(limiter, lambda: apost(prompt), tokens=...)
+
+- A call waits until both buckets can cover it. Each bucket refills
+  continuously and holds at most `BURST_SECONDS` of refill, sized so any
+  60-second window stays within the per-minute limit: calls run at the
+  ceiling but not above it.
+- 429 and 5xx responses, plus the caller's transport errors, are retried with
+  full-jitter exponential backoff. A Retry-After header (or retry-after-ms)
+  is honoured and pauses the whole provider, not just the failing caller.
+- Limits come from PROVIDER_LIMITS, overridden by `LLM_RPM_<NAME>` and
+  `LLM_TPM_<NAME>`; a limit of 0 or None means unlimited.
+
+Errors are classified by duck typing (`status_code`, `response.status_code`,
+`response.headers`), so requests, httpx, openai and google errors all work
+without this module importing them.
+"""
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (requests per minute, tokens per minute); None = unlimited
+PROVIDER_LIMITS: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    # gpt-3.5-turbo fine-tunes, usage tier 1
+    "openai": (3500, 200_000),
+    # gemini-2.0-flash, paid tier 1
+    "gemini": (2000, 4_000_000),
+    # Local models
+    "ollama": (None, None),
+}
+# Largest burst a bucket allows, in seconds of its limit
+BURST_SECONDS = 1.0
+
+DEFAULT_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 60.0
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    A continuously refilling bucket. Not locked; `RateLimiter` serializes access.
+
+    `reserve` deducts at once and returns how long the caller must wait, so
+    waiting happens outside any lock and callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        # The burst comes out of the minute's budget: any 60 s window totals at most per_minute
+        self.rate = per_minute / (60.0 + BURST_SECONDS)
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request bigger than the bucket waits for a full bucket, then overdraws it
+        wait = max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+        self.tokens -= amount
+        return wait
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    RPM and TPM buckets for one provider, shared by threads and tasks.
+
+    Args:
+        name: Provider name, used in logs and env overrides.
+        rpm: Requests per minute, or None for no request limit.
+        tpm: Tokens per minute, or None for no token limit.
+        clock: Monotonic time source (tests substitute a fake one).
+    """
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.rpm = rpm or None
+        self.tpm = tpm or None
+        self.clock = clock
+        now = clock()
+        self._requests = TokenBucket(self.rpm, now) if self.rpm else None
+        self._tokens = TokenBucket(self.tpm, now) if self.tpm else None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Claims one request and `tokens` tokens; returns the seconds to wait before sending."""
+        with self._lock:
+            now = self.clock()
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self.calls += 1
+            self.waited += wait
+            return wait
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """Corrects the token bucket once a response reports its real usage."""
+        if not self._tokens or used is None or used == reserved:
+            return
+        with self._lock:
+            if used < reserved:
+                self._tokens.refund(reserved - used)
+            else:
+                self._tokens.tokens -= used - reserved
+
+    def pause(self, seconds: float) -> None:
+        """Holds every caller of this provider for `seconds` (e.g. a Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+            self.throttled += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def _blocked_for(self) -> float:
+        with self._lock:
+            return max(0.0, self._blocked_until - self.clock())
+
+    def acquire(self, tokens: int = 0) -> None:
+        time.sleep(self.reserve(tokens))
+        # A pause set by another caller while this one slept
+        while (blocked := self._blocked_for()) > 0:
+            time.sleep(blocked)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        await asyncio.sleep(self.reserve(tokens))
+        while (blocked := self._blocked_for()) > 0:
+            await asyncio.sleep(blocked)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "waited_seconds": round(self.waited, 2),
+        }
+
+    def log_stats(self) -> None:
+        s = self.stats()
+        if s["calls"]:
+            logger.info(f"Rate limiter '{self.name}' (rpm={self.rpm}, tpm={self.tpm}): {s['calls']} calls, "
+                        f"{s['retries']} retries, {s['throttled']} throttled, {s['waited_seconds']}s waited")
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _env_limit(kind: str, name: str) -> Optional[float]:
+    value = os.environ.get(f"LLM_{kind}_{re.sub(r'[^A-Z0-9]', '_', name.upper())}")
+    return float(value) if value is not None else None
+
+
+def get_limiter(name: str, rpm: Optional[float] = None, tpm: Optional[float] = None) -> RateLimiter:
+    """
+    The process-wide limiter for `name`, created on first use.
+
+    Limits: `LLM_RPM_<NAME>` / `LLM_TPM_<NAME>` env vars, else the `rpm` / `tpm`
+    arguments, else PROVIDER_LIMITS.
+    """
+    with _LIMITERS_LOCK:
+        if name not in _LIMITERS:
+            default_rpm, default_tpm = PROVIDER_LIMITS.get(name, (None, None))
+            env_rpm, env_tpm = _env_limit("RPM", name), _env_limit("TPM", name)
+            _LIMITERS[name] = RateLimiter(
+                name,
+                rpm=env_rpm if env_rpm is not None else rpm if rpm is not None else default_rpm,
+                tpm=env_tpm if env_tpm is not None else tpm if tpm is not None else default_tpm,
+            )
+        return _LIMITERS[name]
+
+
+def log_limiter_stats() -> None:
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.values())
+    for limiter in limiters:
+        limiter.log_stats()
+
+
+# --- Retry ---
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    for status in (getattr(exc, "status_code", None),
+                   getattr(getattr(exc, "response", None), "status_code", None),
+                   getattr(exc, "code", None)):
+        if isinstance(status, int):
+            return int(status)
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """The delay a Retry-After / retry-after-ms header on the error's response asks for."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if (ms := headers.get("retry-after-ms")) is not None:
+            return max(0.0, float(ms) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY_SECONDS,
+                  cap: float = RETRY_MAX_DELAY_SECONDS) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _retry_delay(limiter: RateLimiter, exc: BaseException, attempt: int,
+                 retry_on: Tuple[Type[BaseException], ...]) -> Optional[float]:
+    """Seconds to wait before retrying `exc`, or None when it should not be retried."""
+    status = _status_of(exc)
+    if status not in RETRYABLE_STATUS and not isinstance(exc, retry_on):
+        return None
+    delay = retry_after_seconds(exc)
+    if delay is None:
+        delay = backoff_delay(attempt)
+    if status == 429:
+        # The provider is over its limit for everyone, not just this caller
+        limiter.pause(delay)
+    limiter.record_retry()
+    logger.warning(f"{limiter.name}: attempt {attempt} failed ({status or type(exc).__name__}); "
+                   f"retrying in {delay:.1f}s")
+    return delay
+
+
+def call_with_retry(limiter: RateLimiter, call: Callable[[], T], tokens: int = 0,
+                    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                    retry_on: Tuple[Type[BaseException], ...] = ()) -> T:
+    """
+    Runs `call()` within the limiter, retrying rate-limit, server and `retry_on` errors.
+
+    Args:
+        limiter: The provider's limiter.
+        call: Sends the request; raises on failure.
+        tokens: Estimated tokens the request will use (see `core.llm_batch.estimate_tokens`).
+        max_attempts: Attempts before the last error is re-raised.
+        retry_on: Extra exception types to retry, e.g. the client's connection errors.
+    """
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire(tokens)
+        try:
+            return call()
+        except Exception as e:
+            delay = _retry_delay(limiter, e, attempt, retry_on) if attempt < max_attempts else None
+            if delay is None:
+                raise
+            time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def call_with_retry_async(limiter: RateLimiter, call: Callable[[], Awaitable[T]], tokens: int = 0,
+                                max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                                retry_on: Tuple[Type[BaseException], ...] = ()) -> T:
+    """`call_with_retry` for coroutines: `call()` returns an awaitable."""
+    for attempt in range(1, max_attempts + 1):
+        await limiter.acquire_async(tokens)
+        try:
+            return await call()
+        except Exception as e:
+            delay = _retry_delay(limiter, e, attempt, retry_on) if attempt < max_attempts else None
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# core/result_spool.py
+
+"""
+Crash-tolerant spool for records that complete out of order, merged into an
+ordered artifact at the end.
+
+    spool = ResultSpool(Path("out/courses.json.partial.ndjson"))
+    done = spool.completed_keys()         # index -> key an interrupted run already wrote
+    with spool:
+        for index, key, record in results:    # any completion order, skipping `done` hits
+            spool.write(index, record, key=key)
+    spool.merge_to(Path("out/courses.json"))
+    spool.remove()
+
+- The spool is NDJSON, one `{"index": i, "key": k, "record": {...}}` line per
+  record, appended as results arrive. The optional key (e.g. a hash of the
+  input the record came from) lets a resuming caller check that position `i`
+  still means the same input. It is flushed and fsynced every `flush_every`
+  records or `flush_seconds`, whichever comes first, so a crash loses at most
+  that much work; nothing is kept in memory after a write.
+- `completed()` / `completed_keys()` reopen a spool left by an earlier run,
+  truncate a torn last line and return the indices (and keys) it holds, so the
+  caller can skip them.
+- `merge_to` is a streaming merge: one pass records each index's byte offset
+  (the last copy of an index wins, so a record redone after its input changed
+  replaces the stale one), then the records are read back one at a time in
+  index order and written atomically with `artifacts.write_records`. `indices`
+  limits the merge to the positions the caller still wants. Memory is one
+  offset per record, never the records themselves.
+"""
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Collection, Dict, Iterator, Optional, Set, Tuple
+
+from core.artifacts import PathLike, dumps, loads, write_records
+
+logger = logging.getLogger(__name__)
+
+# Records / seconds between flushes (each flush also fsyncs)
+SPOOL_FLUSH_EVERY = int(os.environ.get("SPOOL_FLUSH_EVERY", 100))
+SPOOL_FLUSH_SECONDS = float(os.environ.get("SPOOL_FLUSH_SECONDS", 5.0))
+
+# Every spool line starts with this, then the index, then ','; the key (if any) follows
+_PREFIX = b'{"index":'
+_KEY = b'"key":'
+
+
+def _parse_head(line: bytes) -> Tuple[int, Optional[str]]:
+    """(index, key) of a spool line, read without decoding the record."""
+    comma = line.index(b",", len(_PREFIX))
+    index = int(line[len(_PREFIX):comma])
+    if not line.startswith(_KEY, comma + 1):
+        return index, None  # a line written before keys existed
+    start = comma + 1 + len(_KEY)
+    if line.startswith(b"null", start):
+        return index, None
+    return index, line[start + 1:line.index(b'"', start + 1)].decode()
+
+
+class ResultSpool:
+    """Append-only spool of (index, record) pairs; see the module docstring."""
+
+    def __init__(self, path: PathLike, flush_every: int = SPOOL_FLUSH_EVERY,
+                 flush_seconds: float = SPOOL_FLUSH_SECONDS):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self._file: Optional[BinaryIO] = None
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def _scan(self) -> Iterator[Tuple[int, Optional[str], int]]:
+        """(index, key, byte offset) of every complete line; truncates a torn tail."""
+        if not self.path.exists():
+            return
+        good_end = 0
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n") or not line.startswith(_PREFIX):
+                    break
+                yield (*_parse_head(line), offset)
+                offset += len(line)
+                good_end = offset
+        if good_end < self.path.stat().st_size:
+            logger.warning(f"Result spool {self.path.name}: dropping a torn record after byte {good_end}")
+            os.truncate(self.path, good_end)
+
+    def completed(self) -> Set[int]:
+        """Indices already in the spool, e.g. from an interrupted run."""
+        return set(self.completed_keys())
+
+    def completed_keys(self) -> Dict[int, Optional[str]]:
+        """Index -> key of the records already in the spool; the last copy of an index wins."""
+        done = {index: key for index, key, _ in self._scan()}
+        if done:
+            logger.info(f"Result spool {self.path.name}: recovered {len(done)} records from an earlier run")
+        return done
+
+    def __enter__(self) -> "ResultSpool":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._last_flush = time.monotonic()
+        return self
+
+    def write(self, index: int, record: Any, key: Optional[str] = None) -> None:
+        self._file.write(dumps({"index": index, "key": key, "record": record}, pretty=False) + b"\n")
+        self.written += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def iter_ordered(self, indices: Optional[Collection[int]] = None) -> Iterator[Any]:
+        """The spooled records (only `indices`, if given) in index order, read back one at a time."""
+        offsets: Dict[int, int] = {}
+        for index, _, offset in self._scan():
+            if indices is None or index in indices:
+                offsets[index] = offset
+        with open(self.path, "rb") as f:
+            for index in sorted(offsets):
+                f.seek(offsets[index])
+                yield loads(f.readline())["record"]
+
+    def merge_to(self, path: PathLike, indices: Optional[Collection[int]] = None) -> int:
+        """Writes the records (only `indices`, if given) in index order to `path` (NDJSON or a JSON array, by name). Returns the count."""
+        count = write_records(path, self.iter_ordered(indices)) if self.path.exists() else write_records(path, ())
+        logger.info(f"Result spool {self.path.name}: merged {count} records into {Path(path).name}")
+        return count
+
+    def remove(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# core/schema_validation.py
+
+"""
+Batch validation of transformed records against a pydantic model.
+
+    report = validate_batch(courses, UniversalCourseSchema)             # every record
+    report = validate_batch(courses, UniversalCourseSchema, sample=0.1)  # trusted re-run
+    report.log()
+    report = validate_stream(iter_records(path), UniversalCourseSchema)  # a window at a time
+
+- One compiled `TypeAdapter(List[model])` per process validates a whole chunk
+  in a single call, with no per-record Python loop or try/except. Chunks are
+  dropped as soon as they are checked, which keeps the garbage collector from
+  rescanning thousands of live model instances.
+- Large batches are spread over a process pool (the validator holds the GIL,
+  so threads would not help). Each chunk is serialized to JSON once and
+  validated with `validate_json` in the worker.
+- Errors are aggregated per field path, with list positions collapsed to `*`
+  (e.g. `sections.*.meetings.*.startTime`), so a report for thousands of
+  records stays a short table.
+- `validate_stream` reads an iterable a window at a time and validates each
+  window as a batch, so checking a large artifact read back from disk needs
+  memory for one window, not for every record.
+"""
+import logging
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, islice
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Type, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from core.artifacts import dumps
+
+logger = logging.getLogger(__name__)
+
+# Records per validator call / process-pool task
+VALIDATION_CHUNK_SIZE = int(os.environ.get("VALIDATION_CHUNK_SIZE", 200))
+# Process-pool size; 1 validates in this process
+VALIDATION_WORKERS = int(os.environ.get("VALIDATION_WORKERS", os.cpu_count() or 1))
+# Below this many records, starting worker processes costs more than it saves
+VALIDATION_POOL_MIN_RECORDS = int(os.environ.get("VALIDATION_POOL_MIN_RECORDS", 20_000))
+# Records `validate_stream` holds and validates at a time
+VALIDATION_STREAM_WINDOW = int(os.environ.get("VALIDATION_STREAM_WINDOW", 5_000))
+# Records whose identifiers a report keeps
+MAX_INVALID_EXAMPLES = 20
+
+_ADAPTERS: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def _adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """The process's compiled List[model] validator, built on first use."""
+    adapter = _ADAPTERS.get(model)
+    if adapter is None:
+        adapter = _ADAPTERS[model] = TypeAdapter(List[model])
+    return adapter
+
+
+def field_path(loc: Tuple[Union[str, int], ...]) -> str:
+    """An error location without its record index, list positions as '*'."""
+    return ".".join("*" if isinstance(part, int) else str(part) for part in loc[1:]) or "<record>"
+
+
+class ValidationReport(NamedTuple):
+    checked: int
+    invalid: int
+    # field path -> number of errors
+    field_errors: Dict[str, int]
+    # field path -> first error message seen
+    messages: Dict[str, str]
+    # (record index, identifier) of the first invalid records
+    invalid_records: List[Tuple[int, Any]]
+
+    @property
+    def ok(self) -> bool:
+        return self.invalid == 0
+
+    def log(self, label: str = "records") -> None:
+        if self.ok:
+            logger.info(f"Validation: {self.checked} {label} checked, all valid")
+            return
+        logger.warning(f"Validation: {self.invalid} of {self.checked} {label} invalid")
+        for path, count in sorted(self.field_errors.items(), key=lambda item: -item[1]):
+            logger.warning(f"  {path}: {count} ({self.messages[path]})")
+        logger.warning(f"  first invalid: {[ident for _, ident in self.invalid_records]}")
+
+
+def _validate_chunk(model: Type[BaseModel], payload: Union[bytes, List[Dict[str, Any]]], indices: Sequence[int],
+                    id_field: Optional[str], ids: Sequence[Any]) -> Tuple[Counter, Dict[str, str], List[Tuple[int, Any]]]:
+    """Validates one chunk: JSON bytes in a pool worker, the records themselves in-process."""
+    counts: Counter = Counter()
+    messages: Dict[str, str] = {}
+    invalid: Dict[int, Any] = {}
+    try:
+        if isinstance(payload, bytes):
+            _adapter(model).validate_json(payload)
+        else:
+            _adapter(model).validate_python(payload)
+    except ValidationError as e:
+        for error in e.errors(include_url=False, include_input=False):
+            loc = error["loc"]
+            path = field_path(loc)
+            counts[path] += 1
+            messages.setdefault(path, error["msg"])
+            if loc and isinstance(loc[0], int):
+                invalid.setdefault(indices[loc[0]], ids[loc[0]] if id_field else indices[loc[0]])
+    return counts, messages, sorted(invalid.items())
+
+
+def _sample_indices(total: int, sample: Optional[float], seed: Optional[int]) -> List[int]:
+    if sample is None or sample >= 1:
+        return list(range(total))
+    size = min(total, max(1, round(total * sample))) if total else 0
+    return sorted(random.Random(seed).sample(range(total), size))
+
+
+def validate_batch(records: Sequence[Dict[str, Any]], model: Type[BaseModel], sample: Optional[float] = None,
+                   seed: Optional[int] = None, id_field: Optional[str] = None,
+                   chunk_size: int = VALIDATION_CHUNK_SIZE, workers: int = VALIDATION_WORKERS) -> ValidationReport:
+    """
+    Validates `records` against `model` and aggregates the errors per field.
+
+    Args:
+        records: Plain JSON-compatible dicts (e.g. transformer output).
+        model: The pydantic model every record must satisfy.
+        sample: Fraction of records to check (0 < sample < 1), for trusted re-runs;
+            None or 1 checks them all.
+        seed: Seed for the sample, for reproducible runs.
+        id_field: Record field reported for invalid records (default: their index).
+        chunk_size: Records per validator call.
+        workers: Processes to spread chunks over, for batches of at least
+            VALIDATION_POOL_MIN_RECORDS; 1 validates in this process.
+
+    Returns:
+        A ValidationReport.
+    """
+    indices = _sample_indices(len(records), sample, seed)
+    pooled = workers > 1 and len(indices) >= VALIDATION_POOL_MIN_RECORDS
+
+    def chunks():
+        for start in range(0, len(indices), chunk_size):
+            chunk_indices = indices[start:start + chunk_size]
+            chunk = [records[i] for i in chunk_indices]
+            ids = [record.get(id_field) for record in chunk] if id_field else []
+            yield model, dumps(chunk, pretty=False) if pooled else chunk, chunk_indices, id_field, ids
+
+    if pooled:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_validate_chunk, *zip(*chunks())))
+    else:
+        results = [_validate_chunk(*chunk) for chunk in chunks()]
+
+    field_errors: Counter = Counter()
+    messages: Dict[str, str] = {}
+    invalid_records: List[Tuple[int, Any]] = []
+    invalid = 0
+    for counts, chunk_messages, chunk_invalid in results:
+        field_errors.update(counts)
+        for path, message in chunk_messages.items():
+            messages.setdefault(path, message)
+        invalid += len(chunk_invalid)
+        invalid_records.extend(chunk_invalid[:MAX_INVALID_EXAMPLES - len(invalid_records)])
+    return ValidationReport(len(indices), invalid, dict(field_errors), messages, invalid_records)
+
+
+def validate_stream(records: Iterable[Dict[str, Any]], model: Type[BaseModel], sample: Optional[float] = None,
+                    seed: Optional[int] = None, id_field: Optional[str] = None,
+                    window: int = VALIDATION_STREAM_WINDOW, **options: Any) -> ValidationReport:
+    """
+    `validate_batch` for an iterable too large to hold: records are read and
+    validated `window` at a time and the reports combined. Indices in the report
+    are positions in the whole stream. `options` go to `validate_batch`.
+    """
+    records_iter = iter(records)
+    field_errors: Counter = Counter()
+    messages: Dict[str, str] = {}
+    invalid_records: List[Tuple[int, Any]] = []
+    checked = invalid = 0
+    for n, offset in enumerate(count(0, window)):
+        chunk = list(islice(records_iter, window))
+        if not chunk:
+            break
+        report = validate_batch(chunk, model, sample=sample, seed=None if seed is None else seed + n,
+                                id_field=id_field, **options)
+        checked += report.checked
+        invalid += report.invalid
+        field_errors.update(report.field_errors)
+        for path, message in report.messages.items():
+            messages.setdefault(path, message)
+        # Without an id field a record is identified by its index, which moves with the window
+        invalid_records.extend((offset + index, ident if id_field else offset + index)
+                               for index, ident in report.invalid_records[:MAX_INVALID_EXAMPLES - len(invalid_records)])
+    return ValidationReport(checked, invalid, dict(field_errors), messages, invalid_records)
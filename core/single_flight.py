@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# core/single_flight.py
+
+"""
+Collapse concurrent identical calls into one.
+
+    flight = SingleFlight()
+    result = flight.do(key, lambda: expensive(key))          # threads
+    result = await flight.do_async(key, lambda: aexpensive(key))  # asyncio tasks
+
+The first caller for a key runs the call. Anyone asking for the same key while
+it is in flight waits for that call and gets its result (or its exception)
+instead of making their own. Once the call finishes the key is forgotten, so
+callers keep completed results themselves (see `requisite_parser` and
+`program_restriction_parser`).
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, call: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def do_async(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """`do` for coroutines; callers share within one event loop."""
+        with self._lock:
+            future = self._tasks.get(key)
+            leader = future is None
+            if leader:
+                future = self._tasks[key] = asyncio.get_running_loop().create_future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await call()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved: with no waiters asyncio would log it as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._tasks[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "shared": self.shared}
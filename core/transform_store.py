@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# core/transform_store.py
+
+"""
+Persistent store of transformed records keyed by a hash of their source record.
+
+    store = TransformStore(path)
+    hashes = [source_hash(course) for course in courses]
+    reused = store.lookup(hashes, parser_version)      # {hash: transformed record}
+    ... transform only the courses whose hash is missing ...
+    store.put_many(new_entries, parser_version)
+
+- `source_hash` is the SHA-256 of the record's canonical JSON (sorted keys,
+  compact), so any change to any source field is a miss and nothing else is.
+- Every entry carries the parser version that produced it. A lookup only
+  returns entries of the version asked for, so bumping a parser version
+  recomputes everything that version touches; `purge_stale` drops the
+  superseded rows.
+- Lookups and writes are batched, one query per `LOOKUP_BATCH` hashes and one
+  transaction per `put_many`, so a re-run of thousands of unchanged records
+  costs a few queries. Safe to share across threads.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from core.artifacts import dumps
+
+logger = logging.getLogger(__name__)
+
+# Hashes per SELECT ... IN (...) query, well under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transforms (
+    source_hash    TEXT PRIMARY KEY,
+    record_id      TEXT,
+    parser_version TEXT NOT NULL,
+    result         TEXT NOT NULL,
+    created_at     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transforms_version ON transforms (parser_version);
+"""
+
+
+def source_hash(record: Dict[str, Any]) -> str:
+    """The content hash of a source record, independent of key order."""
+    return hashlib.sha256(dumps(record, pretty=False, sort_keys=True)).hexdigest()
+
+
+class TransformStore:
+    """Source hash -> transformed record, from earlier runs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.reused = 0
+        self.recomputed = 0
+        self.stores = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def lookup(self, hashes: Sequence[str], parser_version: str) -> Dict[str, Any]:
+        """
+        Returns {hash: stored result} for the hashes stored under `parser_version`;
+        the rest count as recomputed.
+        """
+        found: Dict[str, Any] = {}
+        distinct = list(dict.fromkeys(hashes))
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(distinct), LOOKUP_BATCH):
+                batch = distinct[start:start + LOOKUP_BATCH]
+                rows = conn.execute(
+                    f"SELECT source_hash, result FROM transforms WHERE parser_version = ? "
+                    f"AND source_hash IN ({', '.join('?' * len(batch))})",
+                    (parser_version, *batch)
+                ).fetchall()
+                found.update((key, json.loads(result)) for key, result in rows)
+            reused = sum(1 for key in hashes if key in found)
+            self.reused += reused
+            self.recomputed += len(hashes) - reused
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, Optional[str], Any]], parser_version: str) -> int:
+        """Stores (source hash, record id, result) entries in one transaction."""
+        created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [(key, record_id, parser_version, json.dumps(result), created_at)
+                for key, record_id, result in entries]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO transforms VALUES (?, ?, ?, ?, ?)", rows)
+            self.stores += len(rows)
+        return len(rows)
+
+    def purge_stale(self, parser_version: str) -> int:
+        """Deletes entries produced by any other parser version."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.execute("DELETE FROM transforms WHERE parser_version != ?", (parser_version,))
+        logger.info(f"Transform store: purged {cur.rowcount} entries from older parser versions")
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        return {"reused": self.reused, "recomputed": self.recomputed, "stores": self.stores}
+
+    def log_stats(self, label: str = "Transform store") -> None:
+        s = self.stats()
+        logger.info(f"{label}: {s['reused']} reused / {s['recomputed']} recomputed, {s['stores']} stored")
+
+    def entry_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT parser_version, COUNT(*) FROM transforms GROUP BY 1").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,399 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from core import (
+    artifacts, llm_backend, llm_batch, prerequisite_graph, rate_limit, result_spool, schema_validation, single_flight
+)
+
+
+class _Meeting(BaseModel):
+    day: str
+    hours: int = Field(..., ge=0)
+
+
+class _Record(BaseModel):
+    code: str
+    credits: float
+    meetings: Optional[List[_Meeting]] = None
+
+
+class TestArtifacts(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_pretty_json_matches_stdlib_layout(self):
+        obj = {'ACCT': [{'code': 'ACCT*1220', 'name': 'Intro é', 'sections': [], 'credits': 0.5}], 'EMPTY': []}
+        path = artifacts.write_json(self.tmp / 'out' / 'subjects.json', obj)
+        self.assertEqual(path.read_text(encoding='utf-8'), json.dumps(obj, ensure_ascii=False, indent=2))
+        self.assertEqual(artifacts.read_json(path), obj)
+
+    def test_compressed_and_ndjson_round_trips(self):
+        records = [{'course_code': f'ACCT*{n}', 'prerequisites': None} for n in range(50)]
+        for name in ('r.json.gz', 'r.ndjson', 'r.jsonl.gz'):
+            path = artifacts.write_artifact(self.tmp / name, records)
+            self.assertEqual(artifacts.read_artifact(path), records, name)
+            self.assertEqual(list(artifacts.iter_records(path)), records, name)
+        self.assertEqual((self.tmp / 'r.ndjson').read_text().count('\n'), 50)
+
+    def test_failed_write_leaves_previous_file_untouched(self):
+        path = artifacts.write_json(self.tmp / 'state.json', {'ok': True})
+        with self.assertRaises(TypeError):
+            artifacts.write_json(path, {'bad': object()})
+        self.assertEqual(artifacts.read_json(path), {'ok': True})
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ['state.json'])
+
+    def test_streaming_reads_across_chunk_boundaries(self):
+        obj = {'A': [{'n': 12345}, {'s': 'x' * 20}], 'B': [], 'C': [1.5, 'tail']}
+        path = artifacts.write_json(self.tmp / 'obj.json.gz', obj)
+        with mock.patch.object(artifacts, 'READ_CHUNK', 3):
+            streamed = [(k, list(items)) for k, items in artifacts.iter_object_arrays(path)]
+            array = list(artifacts.iter_records(artifacts.write_json(self.tmp / 'arr.json', obj['C'])))
+        self.assertEqual(dict(streamed), obj)
+        self.assertEqual(array, obj['C'])
+
+
+class TestLLMBatch(unittest.TestCase):
+    def test_keyed_batches_validate_each_entry_and_retry_failures_singly(self):
+        prompts = []
+
+        def call(prompt):
+            prompts.append(prompt)
+            inputs = json.loads(prompt.rsplit('Inputs: ', 1)[1])
+            # entry for 'bad' is malformed and the last id is missing from the reply
+            reply = {key: ({'oops': 1} if text == 'bad' else {'type': 'COURSE', 'courses': [text]})
+                     for key, text in inputs.items()}
+            reply.pop(max(inputs, key=int))
+            return json.dumps(reply), 1000
+
+        def validate(entry):
+            if 'type' not in entry:
+                raise ValueError('no type')
+            return entry
+
+        single = mock.Mock(side_effect=lambda text: {'type': 'RAW_UNPARSED', 'value': text})
+        parser = llm_batch.BatchParser('Shared rules.', call, validate, single, batch_size=4)
+        strings = ['A', 'B', 'bad', 'C', 'D', 'A', 'E']
+        results = parser.parse_all(strings)
+
+        self.assertEqual(len(prompts), 2)
+        self.assertTrue(all(p.startswith('Shared rules.') for p in prompts))
+        self.assertEqual(results['A'], {'type': 'COURSE', 'courses': ['A']})
+        self.assertEqual(sorted(c.args[0] for c in single.call_args_list), ['C', 'E', 'bad'])
+        self.assertEqual(results['bad']['type'], 'RAW_UNPARSED')
+        self.assertEqual(parser.stats(), {'strings': 6, 'calls': 5, 'batch_calls': 2,
+                                          'retries': 3, 'prompt_tokens': 2000})
+
+    def test_failed_request_falls_back_to_single_calls(self):
+        def call(prompt):
+            raise ConnectionError('down')
+
+        parser = llm_batch.BatchParser('Rules.', call, lambda e: e, lambda text: None, batch_size=10)
+        self.assertEqual(parser.parse_all(['A', 'B']), {'A': None, 'B': None})
+        self.assertEqual(parser.stats()['retries'], 2)
+
+    def test_batches_and_retries_are_sent_concurrently(self):
+        import threading
+
+        # Each barrier only opens once three calls are in flight together
+        batches, singles = threading.Barrier(3, timeout=5), threading.Barrier(3, timeout=5)
+
+        def call(prompt):
+            batches.wait()
+            inputs = json.loads(prompt.rsplit('Inputs: ', 1)[1])
+            return json.dumps({key: {'ok': text} for key, text in inputs.items() if text not in 'XYZ'}), 10
+
+        def single(text):
+            singles.wait()
+            return {'single': text}
+
+        parser = llm_batch.BatchParser('Rules.', call, lambda e: e, single, batch_size=2, concurrency=3)
+        results = parser.parse_all(['A', 'X', 'B', 'Y', 'C', 'Z'])
+        self.assertEqual(results['A'], {'ok': 'A'})
+        self.assertEqual(results['Z'], {'single': 'Z'})
+        self.assertEqual(parser.stats()['batch_calls'], 3)
+        self.assertEqual(parser.stats()['retries'], 3)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_buckets_pace_requests_and_tokens(self):
+        now = [0.0]
+        limiter = rate_limit.RateLimiter('test', rpm=60, tpm=6000, clock=lambda: now[0])
+        # About one request per second, burst of one
+        for expected, wait in zip([0.0, 1.0, 2.0], [limiter.reserve() for _ in range(3)]):
+            self.assertAlmostEqual(wait, expected, delta=0.1)
+
+        # About 100 tokens per second: a 250-token call waits for a full bucket, then overdraws it
+        limiter = rate_limit.RateLimiter('test', tpm=6000, clock=lambda: now[0])
+        self.assertEqual(limiter.reserve(tokens=250), 0.0)
+        self.assertAlmostEqual(limiter.reserve(tokens=50), 2.0, delta=0.1)
+        # The first call really used 50 tokens
+        limiter.settle(250, 50)
+        now[0] = 1.0
+        self.assertEqual(limiter.reserve(tokens=50), 0.0)
+
+    def test_retry_honours_retry_after_and_pauses_the_provider(self):
+        class RateLimited(Exception):
+            response = mock.Mock(status_code=429, headers={'retry-after': '0.05'})
+
+        limiter = rate_limit.RateLimiter('test')
+        call = mock.Mock(side_effect=[RateLimited(), 'ok'])
+        self.assertEqual(rate_limit.call_with_retry(limiter, call), 'ok')
+        self.assertEqual(call.call_count, 2)
+        self.assertEqual(limiter.stats()['retries'], 1)
+        self.assertEqual(limiter.stats()['throttled'], 1)
+
+        # Client errors are not retried
+        bad = mock.Mock(side_effect=ValueError('bad request'))
+        with self.assertRaises(ValueError):
+            rate_limit.call_with_retry(limiter, bad)
+        self.assertEqual(bad.call_count, 1)
+
+    def test_async_retry_gives_up_after_max_attempts(self):
+        import asyncio
+
+        class Unavailable(Exception):
+            status_code = 503
+
+        async def call():
+            raise Unavailable()
+
+        limiter = rate_limit.RateLimiter('test')
+        with mock.patch.object(rate_limit, 'backoff_delay', return_value=0.0):
+            with self.assertRaises(Unavailable):
+                asyncio.run(rate_limit.call_with_retry_async(limiter, call, max_attempts=3))
+        self.assertEqual(limiter.stats()['calls'], 3)
+        self.assertEqual(limiter.stats()['retries'], 2)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_threads_share_one_call(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        flight = single_flight.SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return {'type': 'COURSE'}
+
+        with ThreadPoolExecutor(8) as pool:
+            futures = [pool.submit(flight.do, 'ECON*1050', slow) for _ in range(8)]
+            while flight.shared < 7:
+                release.wait(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flight.stats(), {'calls': 1, 'shared': 7})
+        # Finished keys are forgotten
+        self.assertEqual(flight.do('ECON*1050', lambda: 'again'), 'again')
+
+    def test_async_callers_share_result_and_errors(self):
+        import asyncio
+
+        flight = single_flight.SingleFlight()
+        calls = []
+
+        async def slow(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            if value == 'bad':
+                raise ValueError(value)
+            return value
+
+        async def run():
+            ok = await asyncio.gather(*(flight.do_async('k', lambda: slow('ok')) for _ in range(5)))
+            bad = await asyncio.gather(*(flight.do_async('b', lambda: slow('bad')) for _ in range(3)),
+                                       return_exceptions=True)
+            return ok, bad
+
+        ok, bad = asyncio.run(run())
+        self.assertEqual(ok, ['ok'] * 5)
+        self.assertTrue(all(isinstance(e, ValueError) for e in bad))
+        self.assertEqual(calls, ['ok', 'bad'])
+
+
+class TestLLMBackend(unittest.TestCase):
+    def test_adapters_reach_the_stub_and_retry_injected_429s(self):
+        import asyncio
+        import httpx
+        from benchmarks.stub_llm_server import StubLLMServer
+
+        with StubLLMServer(error_rate=0.3, retry_after=0.01, seed=3) as stub, \
+                mock.patch.dict('os.environ', {'LLM_STUB_URL': stub.url}):
+            backends = [
+                llm_backend.OpenAIChatBackend('ft:stub', limiter=rate_limit.RateLimiter('stub-openai')),
+                llm_backend.GeminiRestBackend('https://unused.invalid', limiter=rate_limit.RateLimiter('stub-gemini')),
+            ]
+
+            async def run(backend):
+                async with httpx.AsyncClient() as http:
+                    return await asyncio.gather(*(backend.acomplete(f'async {n}', http) for n in range(5)))
+
+            for backend in backends:
+                sync = [backend.complete(f'sync {n}') for n in range(5)]
+                responses = sync + asyncio.run(run(backend))
+                self.assertEqual([json.loads(r.text)['value'] for r in responses],
+                                 [f'sync {n}' for n in range(5)] + [f'async {n}' for n in range(5)])
+                self.assertEqual(backend.limiter.retries, backend.limiter.throttled)
+            self.assertGreater(stub.errors, 0)
+            self.assertEqual(stub.requests, 20 + stub.errors)
+            self.assertEqual(sum(b.limiter.retries for b in backends), stub.errors)
+
+    def test_golden_responder_replays_known_strings(self):
+        from benchmarks.stub_llm_server import GoldenResponder
+
+        expected = {'type': 'COURSE', 'code': 'ECON*1050'}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'golden.jsonl'
+            path.write_text(json.dumps({'course_code': 'ECON*2310', 'raw_requisite': 'ECON*1050',
+                                        'prerequisites': expected}) + '\n')
+            responder = GoldenResponder(path)
+            self.assertEqual(responder('ECON*1050'), expected)
+            self.assertEqual(responder('Consent of the instructor'),
+                             {'type': 'RAW_UNPARSED', 'value': 'Consent of the instructor'})
+
+
+class TestSchemaValidation(unittest.TestCase):
+    def setUp(self):
+        self.records = [{'code': f'ECON*{n}', 'credits': 0.5, 'meetings': [{'day': 'Mon', 'hours': 1}]}
+                        for n in range(1000, 1050)]
+        self.records[3]['credits'] = None
+        self.records[7]['meetings'] = [{'day': 'Tue', 'hours': -1}, {'hours': 2}]
+        self.records[40]['code'] = None
+
+    def test_errors_are_counted_per_field_across_chunks(self):
+        report = schema_validation.validate_batch(self.records, _Record, id_field='code', chunk_size=8, workers=1)
+        self.assertEqual((report.checked, report.invalid), (50, 3))
+        self.assertEqual(report.field_errors, {'credits': 1, 'meetings.*.hours': 1, 'meetings.*.day': 1, 'code': 1})
+        self.assertEqual(report.invalid_records, [(3, 'ECON*1003'), (7, 'ECON*1007'), (40, None)])
+        self.assertFalse(report.ok)
+
+        # Process-pool path: same report
+        with mock.patch.object(schema_validation, 'VALIDATION_POOL_MIN_RECORDS', 1):
+            pooled = schema_validation.validate_batch(self.records, _Record, id_field='code', chunk_size=8, workers=2)
+        self.assertEqual(pooled, report)
+
+    def test_sampling_checks_a_reproducible_subset(self):
+        first = schema_validation.validate_batch(self.records, _Record, sample=0.2, seed=7, workers=1)
+        again = schema_validation.validate_batch(self.records, _Record, sample=0.2, seed=7, workers=1)
+        self.assertEqual(first.checked, 10)
+        self.assertEqual(first, again)
+        self.assertTrue(schema_validation.validate_batch(self.records[:3], _Record, workers=1).ok)
+
+    def test_stream_reports_like_one_batch(self):
+        batch = schema_validation.validate_batch(self.records, _Record, id_field='code', workers=1)
+        stream = schema_validation.validate_stream(iter(self.records), _Record, id_field='code', window=6, workers=1)
+        self.assertEqual(stream, batch)
+        # Without an id field, records are named by their position in the whole stream
+        unnamed = schema_validation.validate_stream(iter(self.records), _Record, window=6, workers=1)
+        self.assertEqual(unnamed.invalid_records, [(3, 3), (7, 7), (40, 40)])
+
+
+class TestPrerequisiteGraph(unittest.TestCase):
+    def setUp(self):
+        def course(code, prerequisites=None):
+            return {'courseCode': code, 'prerequisites': prerequisites}
+
+        self.graph = prerequisite_graph.PrerequisiteGraph.from_courses([
+            course('A*1000'),
+            course('B*1000', {'type': 'COURSE', 'courses': ['A*1000']}),
+            course('C*2000', {'type': 'AND', 'expressions': [
+                {'type': 'OR', 'courses': ['B*1000', 'X*1000']},
+                {'type': 'MIN_GRADE', 'course': 'A*1000', 'percentage': 60},
+                {'type': 'EXCLUDE_COURSE', 'courses': ['Z*2000']}]}),
+            course('D*3000', {'type': 'N_OF', 'count': 1, 'courses': ['C*2000']}),
+            # A co-requisite pair: each lists the other
+            course('E*6010', {'type': 'COURSE', 'courses': ['E*6020']}),
+            course('E*6020', {'type': 'COURSE', 'courses': ['E*6010']}),
+            course('A*1000', {'type': 'COURSE', 'courses': ['D*3000']}),
+        ])
+
+    def test_adjacency_and_closures(self):
+        graph = self.graph
+        self.assertEqual(graph.requires('C*2000'), ['B*1000', 'X*1000', 'A*1000'])
+        self.assertEqual(graph.unlocks('A*1000'), ['B*1000', 'C*2000'])
+        self.assertEqual(graph.excludes('C*2000'), ['Z*2000'])
+        self.assertEqual(set(graph.all_requirements('D*3000')), {'A*1000', 'B*1000', 'C*2000', 'X*1000'})
+        self.assertEqual(set(graph.all_unlocked('A*1000')), {'B*1000', 'C*2000', 'D*3000'})
+        self.assertTrue(graph.is_required_before('A*1000', 'D*3000'))
+        self.assertFalse(graph.is_required_before('D*3000', 'A*1000'))
+        # Exclusions are not requirements; unknown codes have none
+        self.assertFalse(graph.is_required_before('Z*2000', 'C*2000'))
+        self.assertEqual(graph.all_requirements('NOPE*1000'), [])
+        self.assertEqual(graph.stats(), {'courses': 6, 'referenced_only': 2, 'requirement_edges': 7,
+                                         'exclusion_edges': 1, 'cycles': 1})
+
+    def test_cycles_are_detected(self):
+        self.assertEqual(self.graph.cycles, [['E*6010', 'E*6020']])
+        self.assertEqual(set(self.graph.all_requirements('E*6010')), {'E*6010', 'E*6020'})
+        self.assertEqual(prerequisite_graph.PrerequisiteGraph.from_courses([
+            {'courseCode': 'S*1000', 'prerequisites': {'type': 'COURSE', 'courses': ['S*1000']}}]).cycles,
+            [['S*1000']])
+
+
+class TestResultSpool(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_out_of_order_writes_merge_in_index_order(self):
+        records = [{'code': f'ACCT*{n}', 'title': 'Intro é', 'credits': 0.5} for n in range(30)]
+        spool = result_spool.ResultSpool(self.tmp / 'out.json.partial.ndjson', flush_every=7)
+        with spool:
+            for index in sorted(range(30), key=lambda n: (n % 4, -n)):
+                spool.write(index, records[index])
+        self.assertEqual(spool.merge_to(self.tmp / 'out.json'), 30)
+        self.assertEqual((self.tmp / 'out.json').read_bytes(),
+                         artifacts.write_json(self.tmp / 'expected.json', records).read_bytes())
+        spool.merge_to(self.tmp / 'out.ndjson')
+        self.assertEqual(list(artifacts.iter_records(self.tmp / 'out.ndjson')), records)
+
+    def test_interrupted_spool_resumes_without_the_torn_record(self):
+        path = self.tmp / 'out.json.partial.ndjson'
+        with result_spool.ResultSpool(path) as spool:
+            for index in (3, 0, 2):
+                spool.write(index, {'n': index})
+        with open(path, 'ab') as f:
+            f.write(b'{"index":1,"record":{"n"')
+
+        resumed = result_spool.ResultSpool(path)
+        self.assertEqual(resumed.completed(), {0, 2, 3})
+        with resumed:
+            resumed.write(1, {'n': 1})
+            # A record written twice keeps its last copy
+            resumed.write(3, {'n': 'again'})
+        resumed.merge_to(self.tmp / 'out.json')
+        self.assertEqual(artifacts.read_json(self.tmp / 'out.json'), [{'n': n} for n in range(3)] + [{'n': 'again'}])
+        resumed.remove()
+        self.assertFalse(path.exists())
+
+    def test_keys_are_recovered_and_merge_keeps_only_wanted_indices(self):
+        path = self.tmp / 'out.json.partial.ndjson'
+        with result_spool.ResultSpool(path) as spool:
+            spool.write(0, {'n': 0}, key='aa')
+            spool.write(1, {'n': 1})
+            spool.write(2, {'n': 2}, key='bb')
+            spool.write(0, {'n': 'redone'}, key='cc')
+        # Lines from before keys existed read back with no key
+        with open(path, 'ab') as f:
+            f.write(b'{"index":3,"record":{"n":3}}\n')
+
+        spool = result_spool.ResultSpool(path)
+        self.assertEqual(spool.completed_keys(), {0: 'cc', 1: None, 2: 'bb', 3: None})
+        self.assertEqual(spool.merge_to(self.tmp / 'out.json', indices={0, 3}), 2)
+        self.assertEqual(artifacts.read_json(self.tmp / 'out.json'), [{'n': 'redone'}, {'n': 3}])
@@ -0,0 +1,388 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from connectors.uog.extract import crawl_planner, section_refresh, sharding
+from connectors.uog.extract.scrapper_modules.browser_pool import RecyclingBrowser
+
+
+class _FakeContext:
+    def __init__(self):
+        self._handlers = {}
+
+    def on(self, event, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    async def new_page(self):
+        for h in self._handlers.get('page', []):
+            h(object())
+
+    async def close(self):
+        for h in self._handlers.get('close', []):
+            h(self)
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.closed = False
+
+    async def new_context(self, **kwargs):
+        return _FakeContext()
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    async def launch(self, **kwargs):
+        self.browsers.append(_FakeBrowser())
+        return self.browsers[-1]
+
+
+class _FakePlaywright:
+    def __init__(self):
+        self.chromium = _FakeChromium()
+
+
+class TestRecyclingBrowser(unittest.TestCase):
+    def test_recycles_after_page_ceiling_and_drains_old_browser(self):
+        pw = _FakePlaywright()
+
+        async def run():
+            browser = await RecyclingBrowser(pw, max_pages=2, max_rss_mb=0).start()
+            held = await browser.new_context()
+            await held.new_page()
+            ctx = await browser.new_context()
+            await ctx.new_page()
+            await ctx.close()
+
+            # Third context crosses the ceiling: a new browser is launched while
+            # the first keeps serving the still-open context.
+            ctx = await browser.new_context()
+            self.assertEqual(len(pw.chromium.browsers), 2)
+            self.assertFalse(pw.chromium.browsers[0].closed)
+
+            await held.close()
+            await asyncio.sleep(0)
+            self.assertTrue(pw.chromium.browsers[0].closed)
+
+            await ctx.close()
+            await browser.close()
+            return browser.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(stats['browsers_recycled'], 1)
+        self.assertEqual(stats['pages_total'], 2)
+        self.assertTrue(all(b.closed for b in pw.chromium.browsers))
+
+    def test_memory_ceiling_counts_only_its_own_browser(self):
+        from connectors.uog.extract.scrapper_modules import browser_pool
+
+        pw = _FakePlaywright()
+        # pid 1 is another pool's Chromium; each launch here adds the next pid
+        pids = {1}
+        rss = {1: 4000, 2: 100, 3: 100}
+
+        async def launch(**kwargs):
+            pids.add(max(pids) + 1)
+            return await _FakeChromium.launch(pw.chromium, **kwargs)
+
+        async def run():
+            with mock.patch.object(browser_pool, '_child_pids', lambda: set(pids)), \
+                    mock.patch.object(browser_pool, 'chromium_rss_mb',
+                                      lambda roots=None: sum(rss[pid] for pid in (roots or pids))), \
+                    mock.patch.object(pw.chromium, 'launch', launch):
+                browser = await RecyclingBrowser(pw, max_pages=0, max_rss_mb=1000).start()
+                for _ in range(3):
+                    await (await browser.new_context()).close()
+                self.assertEqual(browser.launched, 1)
+
+                rss[2] = 1500
+                await (await browser.new_context()).close()
+                await (await browser.new_context()).close()
+                await browser.close()
+                return browser.launched
+
+        self.assertEqual(asyncio.run(run()), 2)
+
+
+class TestSharding(unittest.TestCase):
+    def test_parse_rejects_bad_specs(self):
+        self.assertEqual(sharding.ShardSpec.parse('2/4'), (2, 4))
+        for bad in ('0/4', '5/4', '2', 'a/b'):
+            with self.assertRaises(ValueError):
+                sharding.ShardSpec.parse(bad)
+
+    def test_shards_partition_catalog_and_merge_in_order(self):
+        programs = [{'name': f'P{i}', 'calendar_url': f'https://x/{i % 7}'} for i in range(40)]
+        count = 3
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(sharding, 'BASE_DIR', Path(tmp)):
+            digest = sharding.catalog_digest(programs, sharding.program_key)
+            owned = []
+            for i in range(1, count + 1):
+                spec = sharding.ShardSpec(i, count)
+                part = sharding.select_shard(programs, spec, sharding.program_key)
+                owned.extend(part)
+                results = [{'name': p['name'], 'sections': {}} for p in part]
+                sharding.write_shard('programs', 'programs_with_sections_raw', spec, digest, results)
+
+            self.assertEqual(len(owned), len(programs))
+            merged = sharding.merge_program_shards(programs, count)
+            self.assertEqual([m['name'] for m in merged], [p['name'] for p in programs])
+
+            with self.assertRaises(ValueError):
+                sharding.merge_program_shards(programs[:-1], count)
+
+
+class TestSectionRefresh(unittest.TestCase):
+    def _poll(self, seats_a, with_b=True):
+        courses = [{'code': 'ACCT*1220', 'sections': [
+            {'section_code': 'ACCT*1220*01', 'section_name': 'Intro', 'seats': seats_a,
+             'meetings': [{'day_time': 'M 8:30 AM - 9:20 AM', 'dates': 'N/A', 'location': 'Guelph', 'instructor': 'N/A'}]},
+        ]}]
+        if with_b:
+            courses[0]['sections'].append(
+                {'section_code': 'ACCT*1220*02', 'section_name': 'Intro', 'seats': '5 / 40 / 0', 'meetings': []})
+        return section_refresh.build_snapshot(courses)
+
+    def test_polls_stored_as_deltas_and_replayed(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(section_refresh, 'SECTIONS_DIR', Path(tmp)):
+            section_refresh.save_poll(self._poll('10 / 40 / 0'))
+            self.assertIsNone(section_refresh.save_poll(self._poll('10 / 40 / 0')))
+
+            delta_path = section_refresh.save_poll(self._poll('9 / 40 / 0', with_b=False))
+            changes = json.loads(delta_path.read_text(encoding='utf-8'))['changes']
+            self.assertEqual(changes['ACCT*1220']['ACCT*1220*01']['seats'], '9 / 40 / 0')
+            self.assertIsNone(changes['ACCT*1220']['ACCT*1220*02'])
+
+            # A subject that failed to load keeps its previous sections
+            self.assertIsNone(section_refresh.save_poll({}, unpolled=['ACCT*1220']))
+
+            snapshot, seq = section_refresh.load_latest_snapshot()
+            self.assertEqual(seq, 2)
+            self.assertEqual(snapshot, self._poll('9 / 40 / 0', with_b=False))
+
+            section_refresh.compact()
+            self.assertEqual(section_refresh.load_latest_snapshot(), (snapshot, 2))
+
+    def test_refresh_reuses_one_page_per_worker_and_logs_cost(self):
+        from connectors.uog.extract import subjects_with_courses
+
+        pages = []
+
+        class FakePage:
+            def __init__(self):
+                self.subjects = []
+                pages.append(self)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                pass
+
+            def load_sections(self, code, known_codes):
+                self.subjects.append(code)
+                # BIOL fails to load, as an error page would
+                return [] if code == 'BIOL' else [{'code': c, 'sections': []} for c in sorted(known_codes)]
+
+        known = {f'S{n}': (f'Subject {n}', [f'S{n}*1000', f'S{n}*2000']) for n in range(12)}
+        known['BIOL'] = ('Biology', ['BIOL*1000'])
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(section_refresh, 'SubjectPage', FakePage), \
+                mock.patch.object(section_refresh, 'known_courses', lambda: known), \
+                mock.patch.object(subjects_with_courses, 'SCRAPE_COST_FILE', Path(tmp) / 'costs.json'):
+            subjects_with_courses.record_scrape_cost('full', 130.0, 13)
+            with self.assertLogs(section_refresh.logger, 'INFO') as logs:
+                snapshot = asyncio.run(section_refresh.refresh_sections(write_json=False))
+            # A dry run logs its cost but leaves the cost file alone
+            self.assertIsNone(subjects_with_courses.last_scrape_cost('sections-only'))
+            section_refresh.log_refresh_cost(26.0, 13)
+            self.assertEqual(subjects_with_courses.last_scrape_cost('sections-only')['subjects'], 13)
+
+        self.assertEqual(len(pages), section_refresh.MAX_WORKERS)
+        self.assertEqual(sorted(code for page in pages for code in page.subjects), sorted(known))
+        self.assertEqual(len(snapshot), 24)
+        self.assertTrue(any('last full Stage 2 run took 10.0 s per subject' in line for line in logs.output))
+
+    def test_scrape_without_write_json_records_no_cost(self):
+        from connectors.uog.extract import subjects_with_courses
+
+        subjects = [{'code': 'ACCT', 'text': 'Accounting'}, {'code': 'BIOL', 'text': 'Biology'}]
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(subjects_with_courses, 'load_courses', lambda text: [{'code': text}]), \
+                mock.patch.object(subjects_with_courses, 'SCRAPE_COST_FILE', Path(tmp) / 'costs.json'):
+            pairs = asyncio.run(subjects_with_courses.scrape_subjects(subjects, write_json=False))
+            self.assertFalse((Path(tmp) / 'costs.json').exists())
+            asyncio.run(subjects_with_courses.scrape_subjects(subjects))
+            self.assertEqual(subjects_with_courses.last_scrape_cost('full')['subjects'], 2)
+        self.assertEqual(pairs, [('ACCT', [{'code': 'Accounting'}]), ('BIOL', [{'code': 'Biology'}])])
+
+
+class TestCrawlPlanner(unittest.TestCase):
+    def test_only_changed_programs_are_fetched(self):
+        programs = [{'name': n, 'degree': 'BSc', 'calendar_url': f'https://cal/{n}'} for n in ('A', 'B', 'C')]
+        previous = {crawl_planner.program_id(p): {**p, 'sections': {}} for p in programs[:2]}
+        state = {'programs': {}}
+        crawl_planner.record_programs(state, list(previous.values()),
+                                      probe=lambda url, prev: {'status': 'changed', 'page_digest': url})
+
+        def probe(url, prev):
+            return {'status': 'changed' if url.endswith('B') else 'unchanged', 'page_digest': url}
+
+        plan = crawl_planner.plan_programs(programs, previous, state, probe=probe)
+        self.assertEqual([p['name'] for p in plan.fetch], ['B', 'C'])
+        self.assertEqual(plan.reasons['A|BSc'], 'unchanged')
+        self.assertEqual(plan.reasons['C|BSc'], 'new program')
+
+    def test_subjects_probe_course_lists_and_expire_spread_out(self):
+        subjects = [{'code': code} for code in ('ACCT', 'BIOL', 'CHEM')]
+        previous = {s['code']: [{'code': f"{s['code']}*1000"}] for s in subjects}
+        state = {'subjects': {}}
+        crawl_planner.record_subjects(state, previous)
+
+        listed = {'ACCT': ['ACCT*1000'], 'BIOL': ['BIOL*1000', 'BIOL*2000'], 'CHEM': []}
+
+        def probe(subj):
+            codes = listed[subj['code']]
+            return crawl_planner.course_list_digest(codes) if codes else None
+
+        plan = crawl_planner.plan_subjects(subjects, previous, state, subject_probe=probe)
+        self.assertEqual(plan.reasons, {'ACCT': 'unchanged', 'BIOL': 'course list changed', 'CHEM': 'probe failed'})
+
+        with self.assertLogs(crawl_planner.logger, 'WARNING'):
+            crawl_planner.plan_subjects(subjects, previous, state)
+
+        # Subjects recorded together get different age limits within the spread
+        limits = [crawl_planner.subject_max_age(f'S{n}', 7) for n in range(50)]
+        self.assertTrue(all(3.5 <= limit <= 7 for limit in limits))
+        self.assertGreater(max(limits) - min(limits), 2)
+
+    def test_course_list_probe_opens_and_closes_each_page_on_its_own_thread(self):
+        import threading
+        from connectors.uog.extract import subjects_with_courses
+
+        pages = []
+
+        class FakePage:
+            def __init__(self):
+                self.opened_on = threading.get_ident()
+                self.closed_on = None
+                pages.append(self)
+
+            def list_course_codes(self, code):
+                self.assert_owner()
+                return [] if code == 'CHEM' else [f'{code}*1000']
+
+            def close(self):
+                self.assert_owner()
+                self.closed_on = threading.get_ident()
+
+            def assert_owner(self):
+                # Sync Playwright raises when used from another thread
+                if threading.get_ident() != self.opened_on:
+                    raise RuntimeError('page used across threads')
+
+        subjects = [{'code': f'S{n}'} for n in range(12)] + [{'code': 'CHEM'}]
+        previous = {s['code']: [{'code': f"{s['code']}*1000"}] for s in subjects}
+        state = {'subjects': {}}
+        crawl_planner.record_subjects(state, previous)
+        with mock.patch.object(subjects_with_courses, 'SubjectPage', FakePage):
+            with subjects_with_courses.CourseListProbe(workers=3) as probe:
+                plan = crawl_planner.plan_subjects(subjects, previous, state, subject_probe=probe)
+
+        self.assertEqual([s['code'] for s in plan.fetch], ['CHEM'])
+        self.assertEqual(plan.reasons['CHEM'], 'probe failed')
+        self.assertTrue(1 <= len(pages) <= 3)
+        main_thread = threading.get_ident()
+        for page in pages:
+            self.assertEqual(page.closed_on, page.opened_on)
+            self.assertNotEqual(page.opened_on, main_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestProgramsWithSectionsParser(unittest.TestCase):
+    def test_parses_section_and_skips_empty_ones(self):
+        from connectors.uog.extract.parsers.programs_with_sections_parser import parse_programs_with_sections
+        raw = [{
+            'name': ' Accounting ', 'degree': 'BComm', 'calendar_url': 'u',
+            'sections': {
+                'Co-op': [],
+                'Major': [
+                    'Major Requirements (Honours)', 'A description', '',
+                    'Credit Summary', '(20.00 Total Credits)', 'Required\t10.00', 'Electives 10.00',
+                    'Course List', 'Code\tTitle\tCredits',
+                    'Semester 1', 'ACCT*1220\tIntroductory Financial Accounting\t0.50',
+                    '0.50 Electives 0.50', 'Select 1.00 credits from:', 'A note',
+                ],
+            },
+        }]
+        prog, = parse_programs_with_sections(raw)
+        self.assertEqual(prog['name'], 'Accounting')
+        self.assertEqual(list(prog['sections']), ['Major'])
+        major = prog['sections']['Major']
+        self.assertEqual(major['requirements'],
+                         {'title': 'Major', 'type': 'Honours', 'description': 'A description'})
+        self.assertEqual(major['credit_summary'],
+                         {'total_credits': 20.0, 'breakdown': {'Required': 10.0, 'Electives': 10.0}})
+        self.assertEqual(major['program_sequence'], {'Semester 1': [
+            {'course_code': 'ACCT*1220', 'title': 'Introductory Financial Accounting', 'credits': 0.5},
+            {'title': 'Electives', 'credits': 0.5},
+        ]})
+        self.assertEqual(major['elective_options'], ['Select 1.00 credits from:'])
+        self.assertEqual(major['notes'], ['A note'])
+
+
+class TestSubjectsWithCoursesStream(unittest.TestCase):
+    def test_stream_matches_full_parse_across_read_boundaries(self):
+        from core import artifacts
+        from connectors.uog.extract.parsers import subjects_with_courses_parser as parser
+        raw = {
+            'ACCT': [{'code': ' ACCT*1220 ', 'name': 'Introé ', 'credits': '[0.50]',
+                      'sections': [{'section_code': '01', 'meetings': [{'day_time': ' LEC Mon '}, {}]}]},
+                     {'code': '', 'name': 'dropped'}],
+            'EMPTY': [],
+            'ZOO': [{'code': 'ZOO*2000', 'name': 'Zoo "Biology"', 'extra': [1, 2.5]}],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'subjects_with_courses_raw.json'
+            path.write_text(json.dumps(raw, ensure_ascii=False, indent=2), encoding='utf-8')
+            with mock.patch.object(artifacts, 'READ_CHUNK', 5):
+                streamed = list(parser.iter_raw_courses(path))
+                loaded = parser.load_subjects_with_courses(path)
+                cleaned = list(parser.iter_subject_courses(path))
+
+        self.assertEqual(streamed, [(s, c) for s, courses in raw.items() for c in courses])
+        self.assertEqual(loaded, parser.parse_subjects_with_courses(raw))
+        self.assertEqual(list(loaded), ['ACCT', 'EMPTY', 'ZOO'])
+        self.assertEqual([(s, c['code']) for s, c in cleaned], [('ACCT', 'ACCT*1220'), ('ZOO', 'ZOO*2000')])
+
+
+class TestCourseRecords(unittest.TestCase):
+    def test_records_round_trip_and_share_repeated_strings(self):
+        from connectors.uog.extract.parsers.course_records import CourseRecord
+        from connectors.uog.extract.parsers.subjects_with_courses_parser import clean_course
+        meeting = {'day_time': 'TBD', 'dates': '5/8/2025 - 8/13/2025', 'location': 'Guelph', 'instructor': 'Staff'}
+        raw = [{'code': f'ACCT*{n}', 'name': 'Accounting', 'description': 'd',
+                'sections': [{'section_code': '01', 'section_name': 'Accounting', 'seats': '1 / 2 / 0',
+                              'meetings': [{k: ''.join(v) for k, v in meeting.items()}]}]}
+               for n in (1000, 2000)]
+        cleaned = [clean_course(c) for c in raw]
+        records = [CourseRecord.from_dict(c) for c in cleaned]
+
+        self.assertEqual([r.as_dict() for r in records], cleaned)
+        self.assertEqual(records[0]['sections'][0].get('meetings')[0]['location'], 'Guelph')
+        self.assertEqual(dict(records[1])['code'], 'ACCT*2000')
+        first, second = (r.sections[0].meetings[0] for r in records)
+        self.assertIs(first.dates, second.dates)
+        with self.assertRaises(KeyError):
+            records[0]['missing']
@@ -0,0 +1,690 @@
+import unittest
+
+from connectors.uog.transformers.course_transformer.course_helper_parsers import section_parser
+
+
+class TestSectionParser(unittest.TestCase):
+    def test_parses_meetings_seats_and_term(self):
+        source = [{
+            'section_code': 'ACCT*1220*0101',
+            'section_name': 'Intro Financial Accounting',
+            'seats': '66 / 250 / 3',
+            'meetings': [
+                {'day_time': 'Meeting Times TBD', 'dates': 'N/A', 'location': '', 'instructor': 'N/A'},
+                {'day_time': 'T/Th 11:30 AM - 12:50 PM\n9/4/2025 - 12/12/2025', 'dates': '9/4/2025 - 12/12/2025',
+                 'location': 'Guelph\nLEC', 'instructor': 'Tam, W (LEC)'},
+                {'day_time': 'F 7:00 PM - 9:00 PM\n12/15/2025 - 12/15/2025', 'dates': 'N/A',
+                 'location': 'Guelph\nEXAM', 'instructor': 'N/A'},
+            ],
+        }]
+        section, = section_parser.parse_sections(source, 'ACCT*1220')
+
+        self.assertEqual(section['sectionCode'], '0101')
+        self.assertEqual(section['termId'], '2025FA')
+        self.assertEqual((section['capacity'], section['enrolled'], section['waitlist']), (250, 184, 3))
+        self.assertEqual(section['delivery'], 'InPerson')
+        lecture, exam = section['meetings']
+        self.assertEqual(lecture['type'], 'Lecture')
+        self.assertEqual(lecture['dayOfWeek'], ['Tue', 'Thu'])
+        self.assertEqual((lecture['startTime'], lecture['endTime']), ('11:30', '12:50'))
+        self.assertEqual((lecture['startDate'], lecture['endDate']), ('2025-09-04', '2025-12-12'))
+        self.assertEqual(lecture['location'], 'Guelph')
+        self.assertEqual(exam['type'], 'Exam')
+        self.assertEqual((exam['startTime'], exam['startDate']), ('19:00', '2025-12-15'))
+
+    def test_schedule_strings_are_memoized(self):
+        section_parser._parse_meeting_parts.cache_clear()
+        meeting = {'day_time': 'TBD\n5/8/2025 - 8/13/2025', 'dates': '5/8/2025 - 8/13/2025',
+                   'location': 'Guelph\nDistance Education'}
+        sections = section_parser.parse_sections(
+            [{'section_code': f'X*1000*DE0{i}', 'meetings': [dict(meeting)]} for i in range(3)], 'X*1000')
+        self.assertEqual(section_parser._parse_meeting_parts.cache_info().misses, 1)
+        self.assertEqual({s['delivery'] for s in sections}, {'Distance'})
+        self.assertEqual({s['termId'] for s in sections}, {'2025SU'})
+
+
+class TestParseCache(unittest.TestCase):
+    def test_normalized_hits_persist_and_model_changes_miss(self):
+        import tempfile
+        from pathlib import Path
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.parse_cache import (
+            ParseCache, normalize_requisite_string)
+
+        first = normalize_requisite_string("ACCT*1220  or\nACCT*2220 - Must be completed prior to taking this course.")
+        second = normalize_requisite_string(" ACCT*1220 or ACCT*2220")
+        self.assertEqual(first, second)
+
+        result = {'type': 'OR', 'courses': ['ACCT*1220', 'ACCT*2220']}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'cache.sqlite3'
+            cache = ParseCache(path)
+            self.assertEqual(cache.get('prerequisite', 'ft:a', '1', first), (False, None))
+            cache.put('prerequisite', 'ft:a', '1', first, result)
+            cache.put('prerequisite', 'ft:old', '1', first, {'type': 'RAW_UNPARSED'})
+            cache.close()
+
+            reopened = ParseCache(path)
+            self.assertEqual(reopened.get('prerequisite', 'ft:a', '1', second), (True, result))
+            self.assertEqual(reopened.get('prerequisite', 'ft:b', '1', second), (False, None))
+            self.assertEqual(reopened.get('prerequisite', 'ft:a', '2', second), (False, None))
+            self.assertEqual(reopened.stats()['hits'], 1)
+            self.assertEqual(reopened.stats()['misses'], 2)
+            self.assertEqual(reopened.purge_stale('prerequisite', 'ft:a', '1'), 1)
+            self.assertEqual(reopened.entry_counts(), {('prerequisite', 'ft:a', '1'): 1})
+            reopened.close()
+
+
+class TestGoldenIndex(unittest.TestCase):
+    def test_lookup_prefers_course_entry_then_exact_then_normalized(self):
+        import json
+        import tempfile
+        from pathlib import Path
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.golden_index import GoldenIndex
+
+        suffix = " - Must be completed prior to taking this course."
+        entries = [
+            {"course_code": "ACCT*1240", "raw_requisite": "ACCT*1220" + suffix,
+             "prerequisites": {"type": "COURSE", "courses": ["ACCT*1220"]}},
+            {"course_code": "ACCT*9999", "raw_requisite": "ACCT*1220",
+             "prerequisites": {"type": "RAW_UNPARSED", "value": "ACCT*1220"}},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'golden.jsonl'
+            path.write_text("".join(json.dumps(e) + "\n" for e in entries), encoding='utf-8')
+            index = GoldenIndex(path)
+
+            self.assertEqual(index.lookup("ACCT*1220", "ACCT*9999")[1]["type"], "RAW_UNPARSED")
+            self.assertEqual(index.lookup("ACCT*1220", "ACCT*1240")[1]["type"], "COURSE")
+            self.assertEqual(index.lookup("ACCT*1220" + suffix)[1]["type"], "COURSE")
+            self.assertEqual(index.lookup("  ACCT*1220\n" + suffix)[1]["type"], "COURSE")
+            self.assertEqual(index.lookup("ACCT*1220 or ACCT*2220"), (False, None))
+            self.assertEqual((index.hits, index.misses), (4, 1))
+
+            # Each hit is the caller's own copy
+            index.lookup("ACCT*1220", "ACCT*1240")[1]["courses"].append("X*1000")
+            self.assertEqual(index.lookup("ACCT*1220", "ACCT*1240")[1]["courses"], ["ACCT*1220"])
+
+    def test_missing_dataset_misses(self):
+        from pathlib import Path
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.golden_index import GoldenIndex
+
+        index = GoldenIndex(Path('/nonexistent/golden.jsonl'))
+        self.assertEqual(index.lookup("ACCT*1220"), (False, None))
+        self.assertEqual(len(index), 0)
+
+
+class TestRequisiteGrammar(unittest.TestCase):
+    def test_common_forms(self):
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.requisite_grammar import parse_requisite
+
+        self.assertEqual(parse_requisite("ACCT*1220 - Must be completed prior to taking this course."),
+                         {"type": "COURSE", "courses": ["ACCT*1220"]})
+        self.assertEqual(parse_requisite("CLAS*3060 or CLAS*3120"),
+                         {"type": "OR", "courses": ["CLAS*3060", "CLAS*3120"]})
+        self.assertEqual(parse_requisite("2 of BIOL*1050, BIOL*1070, BIOL*1080"),
+                         {"type": "N_OF", "count": 2, "courses": ["BIOL*1050", "BIOL*1070", "BIOL*1080"]})
+        self.assertEqual(parse_requisite("15.00 credits including ANSC*3080, (ANSC*1210 or ANSC*2210)"),
+                         {"type": "AND", "expressions": [
+                             {"type": "CREDITS", "credits": 15.0},
+                             {"type": "COURSE", "courses": ["ANSC*3080"]},
+                             {"type": "OR", "courses": ["ANSC*1210", "ANSC*2210"]}]})
+        self.assertEqual(parse_requisite("1.00 credits in MATH or STAT at the 2000 level or above."),
+                         {"type": "OR", "expressions": [
+                             {"type": "SUBJECT_CREDITS_AT_LEVEL", "credits": 1.0, "subject": "MATH", "level": 2000},
+                             {"type": "SUBJECT_CREDITS_AT_LEVEL", "credits": 1.0, "subject": "STAT", "level": 2000}]})
+        self.assertEqual(parse_requisite("All Phase 2 courses"), {"type": "PHASE_REQUIREMENT", "phase": 2})
+
+        # Memoized trees are copied out, so editing one does not touch the next caller's
+        parse_requisite("CLAS*3060 or CLAS*3120")["courses"].clear()
+        self.assertEqual(parse_requisite("CLAS*3060 or CLAS*3120")["courses"], ["CLAS*3060", "CLAS*3120"])
+
+    def test_unsupported_forms_are_left_for_the_model(self):
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.requisite_grammar import parse_requisite
+
+        for text in ("4U Calculus and Vectors or 4U Advanced Functions",
+                     "A minimum grade of 70% in MUSC*2410.",
+                     "3 of ACCT*1220, ACCT*2220",
+                     "GEOG*1220 is recommended"):
+            self.assertIsNone(parse_requisite(text), text)
+
+    def test_golden_dataset_coverage(self):
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.golden_index import DEFAULT_GOLDEN_PATH
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.requisite_grammar import golden_coverage
+
+        report = golden_coverage(DEFAULT_GOLDEN_PATH)
+        self.assertGreaterEqual(report["parsed"] / report["strings"], 0.9)
+        self.assertGreaterEqual(report["matched"] / report["parsed"], 0.99)
+
+
+class TestTextScanner(unittest.TestCase):
+    def test_one_pass_finds_codes_triggers_and_offering_tokens(self):
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.text_scanner import scan_text
+
+        scanned = scan_text('Credit may be obtained for only one of ECON*2300, ECON*2310 in Fall and Winter')
+        self.assertEqual([t.value for t in scanned.codes], ['ECON*2300', 'ECON*2310'])
+        self.assertEqual([t.value for t in scanned.triggers], ['credit may be obtained for only one of'])
+        self.assertEqual([t.value for t in scanned.seasons], ['Fall', 'Winter'])
+        self.assertFalse(scanned.starts_with_code)
+        self.assertTrue(scan_text('ECON*2300. Restricted.').starts_with_code)
+
+    def test_parsers_match_their_documented_behaviour(self):
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.antirequisite_parser import (
+            parse_antirequisites
+        )
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.terms_offered_parser import (
+            parse_terms_offered
+        )
+        from connectors.uog.transformers.course_transformer.course_processor import strip_antirequisites
+
+        text = 'ECON*2300, ECON*2310. Restricted to BComm students; see ECON*2300X.'
+        antireqs = parse_antirequisites(text, 'ECON*2310')
+        self.assertEqual(antireqs, ['ECON*2300', 'ECON*2300'])
+        # Only whole-word codes are cut, each with its trailing punctuation
+        self.assertEqual(strip_antirequisites(text, antireqs), 'ECON*2310. Restricted to BComm students; see ECON*2300X.')
+        self.assertEqual(parse_antirequisites('Restricted to BComm. ECON*2300', 'ECON*2310'), [])
+
+        self.assertEqual(parse_terms_offered('Summer, Fall, and Winter, All Years'),
+                         [{'terms': ['Winter', 'Summer', 'Fall'], 'years': ['All'], 'note': None}])
+        self.assertEqual(parse_terms_offered('Winter Only, Even Years & odd'),
+                         [{'terms': ['Winter'], 'years': ['Even', 'Odd'], 'note': 'Only  Years'}])
+        self.assertEqual(parse_terms_offered('N/A'), [])
+
+
+class TestCourseColumns(unittest.TestCase):
+    def test_columnar_fields_match_per_record_parsing(self):
+        from connectors.uog.transformers.course_transformer.course_columns import local_course_fields
+        from connectors.uog.transformers.course_transformer.course_processor import local_fields_of
+
+        courses = [
+            {'code': 'ECON*2310', 'credits': '[0.50]', 'departments': 'Department of Economics and Finance',
+             'offered': 'Fall and Winter, All Years'},
+            {'code': 'ECON*2310', 'credits': '[0.50]', 'departments': 'Department of Economics and Finance',
+             'offered': 'Fall and Winter, All Years'},
+            {'code': 'ACCT*1220', 'credits': '1 Credit', 'departments': ' Accounting ', 'offered': 'N/A'},
+            {'code': None, 'credits': 0.5, 'departments': '   ', 'offered': None},
+            {'code': 'XYZ*9', 'credits': 'none', 'departments': 'Nowhere & Co'},
+        ]
+        columnar = local_course_fields(courses)
+        self.assertEqual(columnar, [local_fields_of(course) for course in courses])
+        self.assertEqual(columnar[2]['credits'], 1.0)
+        self.assertIsInstance(columnar[2]['credits'], float)
+        # Repeated values still give each course its own objects
+        self.assertIsNot(columnar[0]['department'], columnar[1]['department'])
+        self.assertIsNot(columnar[0]['termsOffered'][0]['terms'], columnar[1]['termsOffered'][0]['terms'])
+        self.assertEqual(local_course_fields([]), [])
+
+
+class TestRestrictionBatches(unittest.TestCase):
+    """Batched restriction parsing against a local stand-in for the Gemini endpoint."""
+
+    def setUp(self):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.prompts = []
+        prompts = self.prompts
+
+        class StubGemini(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['contents'][0]['parts'][0]['text']
+                prompts.append(prompt)
+                if 'Inputs: ' in prompt:
+                    inputs = json.loads(prompt.rsplit('Inputs: ', 1)[1])
+                    reply = {key: self.parse(text) for key, text in inputs.items()}
+                else:
+                    reply = self.parse(prompt.rsplit('Input: "', 1)[1].rstrip('"'))
+                answer = {'candidates': [{'content': {'parts': [{'text': json.dumps(reply)}]}}],
+                          'usageMetadata': {'promptTokenCount': len(prompt) // 4}}
+                data = json.dumps(answer).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            @staticmethod
+            def parse(text):
+                if text.startswith('Priority'):
+                    return {}
+                if text.startswith('Garbled') and 'Inputs: ' in prompts[-1]:
+                    return 'not an expression'
+                return {'type': 'PROGRAM_REGISTRATION', 'program': text}
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGemini)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_batches_cut_calls_and_retry_bad_entries(self):
+        from unittest import mock
+        from core.llm_backend import GeminiRestBackend
+        from core.llm_batch import BatchParser
+        from core.rate_limit import RateLimiter
+        from connectors.uog.transformers.course_transformer.course_helper_parsers import program_restriction_parser as prp
+
+        batches = BatchParser(prp.BATCH_PARSER.instructions, prp._call_gemini, prp._validate_restriction,
+                              prp.parse_program_restrictions, batch_size=25)
+        url = f'http://127.0.0.1:{self.server.server_port}/generateContent'
+        strings = [f'Restricted to Program {n}' for n in range(28)] + ['Priority Access Course', 'Garbled text']
+        backend = GeminiRestBackend(url, limiter=RateLimiter('stub-gemini'))
+        with mock.patch.multiple(prp, GEMINI_API_KEY='test', BACKEND=backend, BATCH_PARSER=batches, _PRIMED={}):
+            self.assertEqual(prp.prime_program_restrictions(strings + strings[:5] + [None, '']), 30)
+            calls_after_priming = len(self.prompts)
+            results = [prp.parse_program_restrictions(s) for s in strings]
+
+        # 30 strings: two batched requests plus one single retry for the garbled entry
+        self.assertEqual(calls_after_priming, 3)
+        self.assertEqual(len(self.prompts), 3)
+        self.assertEqual(results[0], {'type': 'PROGRAM_REGISTRATION', 'program': 'Restricted to Program 0'})
+        self.assertIsNone(results[-2])
+        self.assertEqual(results[-1], {'type': 'PROGRAM_REGISTRATION', 'program': 'Garbled text'})
+        self.assertEqual(batches.stats()['retries'], 1)
+        self.assertLess(batches.stats()['prompt_tokens'], 30 * len(prp.RESTRICTION_SYSTEM_PROMPT) // 4 / 5)
+
+
+def _stub_parsers(stub, tmp):
+    """Points both remote parsers at a StubLLMServer, unthrottled, with fresh run state, caches and store."""
+    from contextlib import ExitStack
+    from pathlib import Path
+    from unittest import mock
+    from core.llm_backend import GeminiRestBackend, OpenAIChatBackend
+    from core.rate_limit import RateLimiter
+    from connectors.uog.transformers.course_transformer.course_helper_parsers import (
+        program_restriction_parser as prp, requisite_parser as rp
+    )
+    from connectors.uog.transformers.course_transformer.course_helper_parsers.parse_cache import ParseCache
+    from connectors.uog.transformers import main
+    from core.transform_store import TransformStore
+
+    stack = ExitStack()
+    stack.enter_context(mock.patch.object(main, 'TRANSFORM_STORE', TransformStore(Path(tmp) / 'transforms.sqlite3')))
+    stack.enter_context(mock.patch.multiple(
+        prp, GEMINI_API_KEY='test', _PRIMED={},
+        BACKEND=GeminiRestBackend(stub.gemini_url, limiter=RateLimiter('stub-gemini'))))
+    stack.enter_context(mock.patch.multiple(
+        rp, _MODEL_RESULTS={}, PARSE_CACHE=ParseCache(Path(tmp) / 'cache.sqlite3'),
+        BACKEND=OpenAIChatBackend(rp.FINE_TUNED_MODEL_ID, base_url=stub.openai_base_url, api_key='test',
+                                  limiter=RateLimiter('stub-openai'))))
+    return stack
+
+
+class TestAsyncTransform(unittest.TestCase):
+    def test_async_engine_keeps_order_and_overlaps_calls(self):
+        import asyncio
+        import tempfile
+        from benchmarks.bench_async_transform import synthetic_courses
+        from benchmarks.stub_llm_server import StubLLMServer
+        from connectors.uog.transformers import main
+
+        courses = synthetic_courses(40, 'async')
+        with StubLLMServer(latency=0.05) as stub, tempfile.TemporaryDirectory() as tmp, _stub_parsers(stub, tmp):
+            result = asyncio.run(main.transform_courses_universal_async(courses, max_in_flight=20,
+                                                                        batch_restrictions=False))
+
+        self.assertEqual([c['courseCode'] for c in result], [c['code'] for c in courses])
+        self.assertEqual(stub.requests, 80)
+        self.assertGreater(stub.peak_in_flight, 10)
+        first = result[0]['prerequisites']
+        self.assertEqual(first['type'], 'AND')
+        self.assertEqual([e['value'] for e in first['expressions']],
+                         [courses[0]['requisites'], courses[0]['restrictions']])
+
+    def test_failed_course_leaves_no_remote_parse_running(self):
+        import asyncio
+        from unittest import mock
+        from connectors.uog.transformers.course_transformer import course_processor
+
+        finished = []
+
+        async def prerequisites(*args):
+            raise RuntimeError('bad requisite')
+
+        async def restrictions(*args):
+            await asyncio.sleep(0.01)
+            finished.append('restrictions')
+
+        course = {'code': 'ACCT*1220', 'requisites': 'ACCT*1000', 'restrictions': 'Not open to X.'}
+
+        async def run():
+            with mock.patch.object(course_processor, 'parse_prerequisite_string_async', prerequisites), \
+                    mock.patch.object(course_processor, 'parse_program_restrictions_async', restrictions):
+                failed = await course_processor.process_single_course_async(course, None, None)
+                # A local failure starts no remote parse at all
+                with mock.patch.object(course_processor, '_assemble_course', side_effect=ValueError('bad')):
+                    local = await course_processor.process_single_course_async(course, None, None)
+            return failed, local
+
+        with self.assertLogs(course_processor.logger, 'ERROR'):
+            self.assertEqual(asyncio.run(run()), (None, None))
+        # The restriction parse was awaited to the end, not orphaned
+        self.assertEqual(finished, ['restrictions'])
+
+    def test_failed_course_leaves_no_remote_parse_running_in_threads(self):
+        import time
+        from unittest import mock
+        from connectors.uog.transformers.course_transformer import course_processor
+
+        calls, finished = [], []
+
+        def prerequisites(*args):
+            calls.append('prerequisites')
+            raise RuntimeError('bad requisite')
+
+        def restrictions(*args):
+            calls.append('restrictions')
+            time.sleep(0.05)
+            finished.append('restrictions')
+
+        course = {'code': 'ACCT*1220', 'requisites': 'ACCT*1000', 'restrictions': 'Not open to X.'}
+        with mock.patch.multiple(course_processor, parse_prerequisite_string=prerequisites,
+                                 parse_program_restrictions=restrictions), \
+                self.assertLogs(course_processor.logger, 'ERROR'):
+            # A local failure starts no remote parse at all
+            with mock.patch.object(course_processor, '_assemble_course', side_effect=ValueError('bad')):
+                self.assertIsNone(course_processor.process_single_course(course))
+            self.assertEqual(calls, [])
+            self.assertIsNone(course_processor.process_single_course(course))
+            # The restriction parse was waited on to the end, not left running
+            self.assertEqual(finished, ['restrictions'])
+
+
+class TestConcurrentCourseParses(unittest.TestCase):
+    def test_remote_parses_overlap_and_combine(self):
+        import time
+        from unittest import mock
+        from connectors.uog.transformers.course_transformer import course_processor
+
+        def slow(result):
+            def parse(*args):
+                time.sleep(0.3)
+                return result
+            return parse
+
+        prereqs = {'type': 'COURSE', 'code': 'ECON*1050'}
+        restrictions = {'type': 'PROGRAM_REGISTRATION', 'program': 'BComm'}
+        course = {'code': 'ECON*2310', 'credits': '[0.50]', 'requisites': 'ECON*1050',
+                  'restrictions': 'ECON*2300. Restricted to BComm.', 'offered': 'Fall Only', 'sections': []}
+        with mock.patch.multiple(course_processor, parse_prerequisite_string=slow(prereqs),
+                                 parse_program_restrictions=slow(restrictions)):
+            start = time.perf_counter()
+            result = course_processor.process_single_course(course)
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(result['prerequisites'], {'type': 'AND', 'expressions': [prereqs, restrictions]})
+        self.assertEqual(result['antirequisites'], ['ECON*2300'])
+        self.assertEqual(result['credits'], 0.5)
+
+
+class TestDedupBeforeDispatch(unittest.TestCase):
+    def test_each_distinct_string_is_sent_once(self):
+        import tempfile
+        from benchmarks.bench_async_transform import synthetic_courses
+        from benchmarks.stub_llm_server import StubLLMServer
+        from connectors.uog.transformers import main
+
+        # 40 courses carrying 4 requisite and 5 restriction strings between them
+        courses = synthetic_courses(40, 'dedup')
+        for n, course in enumerate(courses):
+            course['requisites'] = f'Consent of the instructor (dedup group {n % 4})'
+            course['restrictions'] = f'Restricted to students in Program dedup {n % 5}.'
+
+        requisites, restrictions = main.group_remote_strings(courses)
+        self.assertEqual((len(requisites), len(restrictions)), (4, 5))
+        self.assertEqual(len(requisites['Consent of the instructor (dedup group 0)']), 10)
+
+        with StubLLMServer(latency=0.1) as stub, tempfile.TemporaryDirectory() as tmp, _stub_parsers(stub, tmp):
+            result = main.transform_courses_universal(courses, batch_restrictions=False)
+
+        self.assertEqual(len(result), 40)
+        # One model call per distinct string, not per course
+        self.assertEqual(stub.requests, 9)
+        last = result[-1]['prerequisites']['expressions']
+        self.assertEqual([e['value'] for e in last], [courses[-1]['requisites'], courses[-1]['restrictions']])
+
+
+class TestModelFailuresNotCached(unittest.TestCase):
+    def test_failed_calls_are_retried_and_answers_are_copied(self):
+        import tempfile
+        from pathlib import Path
+        from types import SimpleNamespace
+        from unittest import mock
+        import requests
+        from connectors.uog.transformers.course_transformer.course_helper_parsers import (
+            program_restriction_parser as prp, requisite_parser as rp
+        )
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.parse_cache import ParseCache
+
+        openai = mock.Mock()
+        openai.complete.side_effect = [ConnectionError('down'),
+                                       SimpleNamespace(text='{"type": "COURSE", "courses": ["A*1000"]}')]
+        gemini = mock.Mock()
+        gemini.complete.side_effect = [requests.exceptions.ConnectionError('down'),
+                                       SimpleNamespace(text='{"type": "PROGRAM_REGISTRATION", "program": "BSc"}',
+                                                       prompt_tokens=10)]
+        requisite = 'Completion of the unusual failure-retry requirement'
+        restriction = 'Restricted to the unusual failure-retry program.'
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.multiple(rp, _MODEL_RESULTS={}, BACKEND=openai,
+                                    PARSE_CACHE=ParseCache(Path(tmp) / 'cache.sqlite3')), \
+                mock.patch.multiple(prp, GEMINI_API_KEY='test', _PRIMED={}, BACKEND=gemini), \
+                self.assertLogs(rp.logger, 'ERROR'), self.assertLogs(prp.logger, 'ERROR'):
+            self.assertTrue(rp.parse_prerequisite_string(requisite)['value'].startswith('PARSING_FAILED'))
+            self.assertTrue(prp.parse_program_restrictions(restriction)['value'].startswith(prp.FAILURE_PREFIX))
+
+            # The next course with the same string tries again instead of inheriting the failure
+            rp.parse_prerequisite_string(requisite)['courses'].append('X*1000')
+            self.assertEqual(rp.parse_prerequisite_string(requisite), {'type': 'COURSE', 'courses': ['A*1000']})
+            prp.parse_program_restrictions(restriction)['program'] = 'edited'
+            self.assertEqual(prp.parse_program_restrictions(restriction)['program'], 'BSc')
+        self.assertEqual((openai.complete.call_count, gemini.complete.call_count), (2, 2))
+
+
+class TestProgramTransform(unittest.TestCase):
+    def test_references_resolve_against_the_course_index(self):
+        from connectors.uog.transformers import main
+        from connectors.uog.transformers.program_transformer.program_processor import build_course_index
+
+        courses = [
+            {'courseId': 'ACCT*1220', 'courseCode': 'ACCT*1220', 'title': 'Intro Financial Accounting',
+             'credits': 0.5, 'prerequisites': None},
+            {'courseId': 'ACCT*2230', 'courseCode': 'ACCT*2230', 'title': 'Management Accounting', 'credits': 0.5,
+             'prerequisites': {'type': 'AND', 'expressions': [
+                 {'type': 'COURSE', 'courses': ['ACCT*1220']},
+                 {'type': 'MIN_GRADE', 'course': 'MATH*1030', 'percentage': 60},
+                 {'type': 'EXCLUDE_COURSE', 'courses': ['ACCT*2220']}]}},
+        ]
+        index = build_course_index(courses)
+        self.assertEqual(index['ACCT*2230'].prerequisites, ('ACCT*1220', 'MATH*1030'))
+
+        program = {
+            'name': 'Accounting', 'degree': 'Bachelor of Commerce',
+            'calendar_url': 'https://calendar.uoguelph.ca/undergraduate-calendar/programs-majors-minors/accounting-acct/',
+            'sections': {
+                'Overview': {'paragraphs': ['Department of Management, Lang School', 'About.'],
+                             'collapsibles': [{'header': 'Learning Outcomes', 'content': 'Think\nWrite'}]},
+                'Major': {
+                    'requirements': {'title': 'Major', 'type': 'Honours', 'description': 'A major.'},
+                    'program_sequence': {
+                        'Semester 1 - Fall': [{'course_code': 'ACCT*1220', 'title': 'Listed title', 'credits': 0.5},
+                                              {'title': 'electives', 'credits': 1.0}],
+                        'Semester 2 - Winter': [{'course_code': 'ACCT*2230', 'title': 'MA', 'credits': 0.5},
+                                                {'course_code': 'GONE*1000', 'title': 'Old', 'credits': 0.5}]},
+                    'notes': ['Take electives early.']},
+                'Co-op': {'credit_summary': {'total_credits': 21.0, 'breakdown': {}}},
+            },
+        }
+        # The degree page has no requirement sections; its type comes from the degree
+        degree_page = {'name': 'Bachelor of Commerce', 'degree': 'Minor', 'calendar_url': '', 'sections': {}}
+        result = main.transform_programs_universal([program, degree_page], courses)
+
+        accounting, degree = result
+        self.assertEqual((accounting['programId'], accounting['code']), ('accounting', 'ACCT'))
+        self.assertEqual(accounting['programTypes'], ['Major', 'Cooperative'])
+        self.assertEqual(accounting['department'], 'Department of Management')
+        # No credit summary on the primary section: the credits its sequence lists
+        self.assertEqual(accounting['totalCredits'], 2.5)
+        fall, winter = accounting['requirementGroups']
+        self.assertEqual((fall['groupId'], fall['creditsMin'], fall['description']),
+                         ('major-semester-1-fall', 1.5, '1 credits of electives'))
+        # The index wins over the listing; unknown codes keep the listing
+        self.assertEqual(fall['courses'][0]['title'], 'Intro Financial Accounting')
+        self.assertEqual(winter['courses'][1], {'courseId': 'GONE*1000', 'code': 'GONE*1000', 'title': 'Old',
+                                                'credits': 0.5})
+        self.assertEqual(accounting['extensions'], {'unresolvedCourses': ['GONE*1000']})
+        self.assertEqual(accounting['prerequisiteMap'], {'ACCT*2230': ['ACCT*1220', 'MATH*1030']})
+        self.assertEqual(accounting['panels'], [{'title': 'Learning Outcomes', 'bulletList': ['Think', 'Write']}])
+        self.assertEqual(degree['programTypes'], ['Minor'])
+        self.assertTrue(main.validate_programs(result).ok)
+
+
+class TestIncrementalTransform(unittest.TestCase):
+    def test_only_changed_courses_are_recomputed(self):
+        import asyncio
+        import tempfile
+        from unittest import mock
+        from benchmarks.bench_async_transform import synthetic_courses
+        from benchmarks.stub_llm_server import StubLLMServer
+        from connectors.uog.transformers import main
+
+        courses = synthetic_courses(12, 'incremental')
+        with StubLLMServer(latency=0.01) as stub, tempfile.TemporaryDirectory() as tmp, _stub_parsers(stub, tmp):
+            first = main.transform_courses_universal(courses, batch_restrictions=False)
+            self.assertEqual(stub.requests, 24)
+
+            courses[5] = dict(courses[5], requisites='Consent of the instructor (changed)')
+            second = main.transform_courses_universal(courses, batch_restrictions=False)
+            # One new requisite string; the restriction string was parsed last run
+            self.assertEqual(stub.requests, 25)
+            self.assertEqual(main.TRANSFORM_STORE.stats(), {'reused': 11, 'recomputed': 13, 'stores': 13})
+            self.assertEqual(second[:5] + second[6:], first[:5] + first[6:])
+            self.assertEqual(second[5]['prerequisites']['expressions'][0]['value'], courses[5]['requisites'])
+
+            # A parser version bump recomputes everything, and the new results replace the old
+            with mock.patch.object(main, 'COURSE_TRANSFORM_VERSION', '2'):
+                third = asyncio.run(main.transform_courses_universal_async(courses, batch_restrictions=False))
+                # The changed course's old row is the one left from version 1
+                self.assertEqual(main.TRANSFORM_STORE.purge_stale(main.parser_version()), 1)
+                self.assertEqual(main.TRANSFORM_STORE.entry_counts(), {main.parser_version(): 12})
+            self.assertEqual(main.TRANSFORM_STORE.stats()['recomputed'], 25)
+            self.assertEqual(third, second)
+
+    def test_golden_dataset_and_grammar_are_part_of_the_version(self):
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+        from connectors.uog.transformers import main
+        from connectors.uog.transformers.course_transformer.course_helper_parsers import requisite_parser
+        from connectors.uog.transformers.course_transformer.course_helper_parsers.golden_index import GoldenIndex
+
+        with tempfile.TemporaryDirectory() as tmp:
+            golden = Path(tmp) / 'golden.jsonl'
+            golden.write_text('{"course_code": "A*1000", "raw_requisite": "B*1000", "prerequisites": null}\n')
+            with mock.patch.object(requisite_parser, 'GOLDEN_INDEX', GoldenIndex(golden)):
+                before = main.parser_version()
+                self.assertEqual(main.parser_version(), before)
+            golden.write_text('{"course_code": "A*1000", "raw_requisite": "B*1000", "prerequisites": {}}\n')
+            with mock.patch.object(requisite_parser, 'GOLDEN_INDEX', GoldenIndex(golden)):
+                edited = main.parser_version()
+                with mock.patch.object(main, 'GRAMMAR_VERSION', 'next'):
+                    regrammared = main.parser_version()
+        self.assertEqual(len({before, edited, regrammared}), 3)
+
+    def test_failed_parses_are_not_reusable(self):
+        from connectors.uog.transformers.course_transformer.course_processor import has_failed_parse
+
+        failed = {'type': 'AND', 'expressions': [{'type': 'COURSE', 'courses': ['A*1000']},
+                                                 {'type': 'RAW_UNPARSED', 'value': 'RESTRICTION_PARSING_FAILED: x'}]}
+        self.assertTrue(has_failed_parse({'prerequisites': failed}))
+        self.assertFalse(has_failed_parse({'prerequisites': {'type': 'RAW_UNPARSED', 'value': 'Consent'}}))
+        self.assertFalse(has_failed_parse({'prerequisites': None}))
+
+
+class TestStreamingTransform(unittest.TestCase):
+    def test_interrupted_run_resumes_from_the_spool(self):
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+        from benchmarks.bench_async_transform import synthetic_courses
+        from benchmarks.stub_llm_server import StubLLMServer
+        from connectors.uog.transformers import main
+        from core.artifacts import read_json
+
+        courses = synthetic_courses(10, 'streaming')
+        with StubLLMServer(latency=0.01) as stub, tempfile.TemporaryDirectory() as tmp, _stub_parsers(stub, tmp):
+            expected = main.transform_courses_universal(courses, batch_restrictions=False, incremental=False)
+            out = Path(tmp) / 'out' / 'universal_courses.json'
+            spool = out.with_name('universal_courses.json.partial.ndjson')
+
+            # Die after four courses: the spool keeps them and no output is written
+            stream = main.iter_courses_universal(courses, batch_restrictions=False, incremental=False)
+            with main.ResultSpool(spool) as partial:
+                for _, item in zip(range(4), stream):
+                    partial.write(item.index, item.course, key=item.source_hash)
+            stream.close()
+            self.assertFalse(out.exists())
+
+            reports = []
+            validate = main.validate_courses
+            with mock.patch.object(main, 'process_single_course', wraps=main.process_single_course) as process, \
+                    mock.patch.object(main, 'validate_courses', lambda c: reports.append(validate(c, sample=1.0))):
+                self.assertEqual(main.transform_courses_to_file(courses, out, batch_restrictions=False,
+                                                                incremental=False), 10)
+            # The written artifact is validated, spooled courses from the first run included
+            self.assertEqual([report.checked for report in reports], [10])
+            # Only the six courses missing from the spool were transformed again
+            self.assertEqual(process.call_count, 6)
+            self.assertEqual(read_json(out), expected)
+            self.assertFalse(spool.exists())
+
+    def test_resume_redoes_positions_whose_input_changed(self):
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+        from benchmarks.bench_async_transform import synthetic_courses
+        from benchmarks.stub_llm_server import StubLLMServer
+        from connectors.uog.transformers import main
+        from core.artifacts import read_json
+
+        courses = synthetic_courses(10, 'reordered')
+        with StubLLMServer(latency=0.01) as stub, tempfile.TemporaryDirectory() as tmp, _stub_parsers(stub, tmp):
+            out = Path(tmp) / 'universal_courses.json'
+            stream = main.iter_courses_universal(courses, batch_restrictions=False, incremental=False)
+            with main.ResultSpool(out.with_name('universal_courses.json.partial.ndjson')) as partial:
+                for _, item in zip(range(4), stream):
+                    partial.write(item.index, item.course, key=item.source_hash)
+            stream.close()
+
+            # The input changed order before the resume: stale positions must not be reused
+            reordered = courses[5:] + courses[:5]
+            expected = main.transform_courses_universal(reordered, batch_restrictions=False, incremental=False)
+            main.transform_courses_to_file(reordered, out, batch_restrictions=False, incremental=False)
+            self.assertEqual(read_json(out), expected)
+
+    def test_input_is_read_one_window_at_a_time(self):
+        import tempfile
+        from benchmarks.bench_async_transform import synthetic_courses
+        from benchmarks.stub_llm_server import StubLLMServer
+        from connectors.uog.transformers import main
+
+        courses = synthetic_courses(10, 'windowed')
+        consumed = []
+
+        def source():
+            for course in courses:
+                consumed.append(course['code'])
+                yield course
+
+        with StubLLMServer(latency=0.01) as stub, tempfile.TemporaryDirectory() as tmp, _stub_parsers(stub, tmp):
+            expected = main.transform_courses_universal(courses, batch_restrictions=False, incremental=False)
+            stream = main.iter_courses_universal(source(), batch_restrictions=False, incremental=False, window=3)
+            first = next(stream)
+            # Two windows are read before the first result comes back, not the whole input
+            self.assertEqual(len(consumed), 6)
+            by_index = dict([(first.index, first.course)] + [(item.index, item.course) for item in stream])
+            self.assertEqual([by_index[index] for index in sorted(by_index)], expected)